@@ -0,0 +1,241 @@
+"""
+Clasificación masiva de leads de Node-RED.
+
+Aplica a exportaciones de marketing (CSV, JSONL o texto plano, una cadena por
+línea) la misma detección que usa `ActionSessionStart`, para que la
+segmentación de campañas coincida con lo que hará el bot. La entrada se lee
+en streaming por lotes, los lotes se reparten entre un pool de procesos y la
+salida se escribe en orden a medida que llegan los resultados; solo hay unos
+pocos lotes en vuelo a la vez, así que la memoria no crece con el archivo.
+
+Uso:
+    python -m actions.clasificador_leads leads.csv clasificados.csv --columna mensaje
+    python -m actions.clasificador_leads leads.jsonl - --procesos 8 > clasificados.jsonl
+"""
+
+import argparse
+import collections
+import csv
+import io
+import json
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Text, TextIO, Tuple
+
+from actions.deteccion import detectar_mensaje_node_red
+
+TAMANO_LOTE = 5000
+
+CAMPOS_SALIDA = ("fila", "texto", "compania", "numero", "formato", "es_inicio")
+
+# Candidatos por orden de preferencia cuando no se indica el campo del mensaje
+_CAMPOS_MENSAJE = ("mensaje", "message", "text", "texto", "lead")
+
+# (fila, texto, compania, numero, formato, es_inicio)
+Lead = Tuple[int, Text, Optional[Text], Optional[Text], Optional[Text], bool]
+
+
+def clasificar_lote(lote: Sequence[Tuple[int, Text]]) -> List[Lead]:
+    """Clasifica un lote de (fila, texto). Se ejecuta dentro de cada proceso."""
+    resultados = []
+    for fila, texto in lote:
+        deteccion = detectar_mensaje_node_red(texto)
+        resultados.append(
+            (fila, texto, deteccion.compania, deteccion.numero, deteccion.formato, deteccion.es_inicio)
+        )
+    return resultados
+
+
+def _en_lotes(filas: Iterable[Tuple[int, Text]], tamano: int) -> Iterator[List[Tuple[int, Text]]]:
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def clasificar_leads(textos: Iterable[Text],
+                     procesos: Optional[int] = None,
+                     tamano_lote: int = TAMANO_LOTE) -> Iterator[Lead]:
+    """
+    Clasifica un flujo de textos conservando el orden de entrada.
+
+    Args:
+        textos: Cualquier iterable de cadenas; se consume de forma perezosa
+        procesos: Procesos del pool; 1 clasifica en el proceso actual y None
+            usa todos los CPUs
+        tamano_lote: Textos por tarea enviada al pool
+
+    Yields:
+        (fila, texto, compania, numero, formato, es_inicio) por cada texto,
+        con fila empezando en 1
+    """
+    lotes = _en_lotes(enumerate(textos, 1), tamano_lote)
+    procesos = procesos or os.cpu_count() or 1
+
+    if procesos == 1:
+        for lote in lotes:
+            yield from clasificar_lote(lote)
+        return
+
+    # Como mucho dos lotes por proceso en vuelo: el pool nunca se adelanta
+    # a la escritura más allá de eso
+    en_vuelo: Deque[Future] = collections.deque()
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for lote in lotes:
+            en_vuelo.append(pool.submit(clasificar_lote, lote))
+            if len(en_vuelo) >= 2 * procesos:
+                yield from en_vuelo.popleft().result()
+        while en_vuelo:
+            yield from en_vuelo.popleft().result()
+
+
+def _detectar_formato(ruta: Text) -> Text:
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension in (".csv", ".tsv"):
+        return "csv"
+    return "texto"
+
+
+def leer_textos(archivo: TextIO, formato: Text, campo: Optional[Text] = None) -> Iterator[Text]:
+    """
+    Lee los mensajes de un archivo abierto, una fila a la vez.
+
+    Args:
+        archivo: Archivo de texto de entrada
+        formato: "csv", "jsonl" o "texto"
+        campo: Columna (CSV) o clave (JSONL) con el mensaje; si no se indica
+            se busca una de las habituales y, en CSV, se usa la primera columna
+
+    Raises:
+        ValueError: Si el CSV no tiene la columna indicada
+    """
+    if formato == "texto":
+        for linea in archivo:
+            yield linea.rstrip("\r\n")
+        return
+
+    if formato == "jsonl":
+        for linea in archivo:
+            if not linea.strip():
+                continue
+            registro = json.loads(linea)
+            if isinstance(registro, str):
+                yield registro
+                continue
+            if campo is None:
+                campo = next((c for c in _CAMPOS_MENSAJE if c in registro), None)
+            yield str(registro.get(campo) or "")
+        return
+
+    lector = csv.DictReader(archivo)
+    columnas = lector.fieldnames or []
+    if campo is None:
+        campo = next((c for c in _CAMPOS_MENSAJE if c in columnas), columnas[0] if columnas else None)
+    elif campo not in columnas:
+        raise ValueError(f"La columna '{campo}' no existe en el CSV; columnas: {', '.join(columnas)}")
+    for registro in lector:
+        yield registro.get(campo) or ""
+
+
+class _Escritor:
+    """Escribe los leads clasificados en CSV o JSONL, fila por fila."""
+
+    def __init__(self, archivo: TextIO, formato: Text) -> None:
+        self._archivo = archivo
+        self._csv = None
+        if formato == "csv":
+            self._csv = csv.writer(archivo)
+            self._csv.writerow(CAMPOS_SALIDA)
+
+    def escribir(self, lead: Lead) -> None:
+        if self._csv is not None:
+            self._csv.writerow(lead)
+        else:
+            self._archivo.write(json.dumps(dict(zip(CAMPOS_SALIDA, lead)), ensure_ascii=False))
+            self._archivo.write("\n")
+
+
+def clasificar_archivo(entrada: Text, salida: Text,
+                       campo: Optional[Text] = None,
+                       formato_entrada: Optional[Text] = None,
+                       formato_salida: Optional[Text] = None,
+                       procesos: Optional[int] = None,
+                       tamano_lote: int = TAMANO_LOTE) -> Dict[Text, Any]:
+    """
+    Clasifica un archivo completo y escribe el resultado de forma incremental.
+
+    Args:
+        entrada: Ruta del archivo de leads o "-" para stdin
+        salida: Ruta del archivo de salida o "-" para stdout
+        campo: Columna o clave del mensaje
+        formato_entrada: "csv", "jsonl" o "texto"; por defecto según la extensión
+        formato_salida: "csv" o "jsonl"; por defecto según la extensión
+        procesos: Procesos del pool (None = todos los CPUs)
+        tamano_lote: Textos por tarea
+
+    Returns:
+        Resumen con el total de filas, conteo por formato detectado y por compañía
+    """
+    formato_entrada = formato_entrada or ("texto" if entrada == "-" else _detectar_formato(entrada))
+    formato_salida = formato_salida or ("jsonl" if salida == "-" else _detectar_formato(salida))
+    if formato_salida not in ("csv", "jsonl"):
+        formato_salida = "jsonl"
+
+    por_formato: Dict[Text, int] = collections.Counter()
+    por_compania: Dict[Text, int] = collections.Counter()
+    total = 0
+
+    archivo_entrada = (io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="") if entrada == "-"
+                       else open(entrada, encoding="utf-8", newline=""))
+    archivo_salida = sys.stdout if salida == "-" else open(salida, "w", encoding="utf-8", newline="")
+    try:
+        escritor = _Escritor(archivo_salida, formato_salida)
+        textos = leer_textos(archivo_entrada, formato_entrada, campo)
+        for lead in clasificar_leads(textos, procesos, tamano_lote):
+            escritor.escribir(lead)
+            total += 1
+            por_formato[lead[4] or "sin_deteccion"] += 1
+            if lead[2]:
+                por_compania[lead[2]] += 1
+    finally:
+        if archivo_salida is not sys.stdout:
+            archivo_salida.close()
+        else:
+            archivo_salida.flush()
+        if entrada != "-":
+            archivo_entrada.close()
+
+    return {"total": total, "por_formato": dict(por_formato), "por_compania": dict(por_compania)}
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Clasifica leads de Node-RED con la detección del bot")
+    parser.add_argument("entrada", help="CSV, JSONL o texto (una cadena por línea); '-' para stdin")
+    parser.add_argument("salida", help="CSV o JSONL de salida; '-' para stdout")
+    parser.add_argument("--columna", dest="campo", help="Columna o clave que contiene el mensaje")
+    parser.add_argument("--formato-entrada", choices=("csv", "jsonl", "texto"))
+    parser.add_argument("--formato-salida", choices=("csv", "jsonl"))
+    parser.add_argument("--procesos", type=int, help="Procesos del pool (por defecto todos los CPUs)")
+    parser.add_argument("--tamano-lote", type=int, default=TAMANO_LOTE, help="Textos por tarea")
+    args = parser.parse_args(argv)
+
+    resumen = clasificar_archivo(
+        args.entrada, args.salida, args.campo, args.formato_entrada, args.formato_salida,
+        args.procesos, args.tamano_lote,
+    )
+
+    print(f"{resumen['total']} leads clasificados", file=sys.stderr)
+    for formato, cantidad in sorted(resumen["por_formato"].items(), key=lambda par: -par[1]):
+        print(f"   {formato}: {cantidad}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Motor de detección de mensajes Node-RED.
+
+Reúne en un solo recorrido del texto lo que antes hacían por separado
+`_es_inicio_conversacion`, `_es_mensaje_node_red`, `_extraer_compania_node_red`
+y `_extraer_numero_node_red` de ActionSessionStart. Los patrones se compilan
+una sola vez al importar el módulo y se respeta el mismo orden de prioridad.
+"""
+
+import logging
+import os
+import re
+from typing import FrozenSet, NamedTuple, Optional, Text
+
+from actions.difuso import DIFUSO
+from actions.numeracion import NUMERACION
+from actions.operadores import REGISTRY, normalizar_clave
+
+logger = logging.getLogger(__name__)
+
+RUTA_NLU = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'nlu.yml')
+
+# Intent cuyos ejemplos sí son nombres de operador
+_INTENCION_COMPANIA = 'informar_compania'
+
+_PALABRAS_VACIAS = (
+    'si', 'no', 'ok', 'okay', 'vale', 'claro', 'listo', 'perfecto', 'bien', 'mal', 'ayuda',
+    'info', 'informacion', 'precio', 'precios', 'plan', 'planes', 'paquete', 'paquetes',
+    'recarga', 'recargas', 'saldo', 'linea', 'numero', 'telefono', 'celular', 'compania',
+    'operador', 'portabilidad', 'cambiarme', 'cambio', 'cancelar', 'gracias', 'adios',
+)
+
+
+_MARCAS = ('TELCEL', 'MOVISTAR', 'AT&T', 'UNEFON', 'VIRGIN', 'ALTAN')
+
+
+def _compilar_patron_node_red():
+    """
+    Compila todos los patrones Node-RED en una sola expresión.
+
+    Cada alternativa consume únicamente su primer carácter y verifica el resto
+    con un lookahead, de modo que una coincidencia nunca oculta a otra que
+    empiece dentro de ella. Como todas las ramas empiezan con una letra o
+    dígito literal, `re` descarta en C las posiciones que no pueden coincidir.
+
+    Returns:
+        Tupla (patrón compilado, mapa de grupo -> (clave, valor fijo))
+    """
+    ramas = [
+        r'C(?=OMPANIA_DETECTADA\s+(?P<detectada>[A-Z&]+))',
+        r'O(?=PERATOR\s+(?:(?P<spot_uno>SPOT\s+UNO)|(?P<operador>[A-Z&]+)))',
+        r'N(?=UMERO\s+(?P<numero>\d{10,})|UMBER\s+(?P<number>\d{10,}))',
+        r'I(?=NICIO_BOT(?P<inicio_bot>))',
+        r'S(?=TART_SESSION(?P<start_session>))',
+    ]
+    grupos = {
+        'detectada': ('detectada', None),
+        'spot_uno': ('spot_uno', None),
+        'operador': ('operador', None),
+        'numero': ('numero', None),
+        'number': ('number', None),
+        'inicio_bot': ('inicio', True),
+        'start_session': ('inicio', True),
+    }
+
+    for i, marca in enumerate(_MARCAS):
+        ramas.append(f'{re.escape(marca[0])}(?={re.escape(marca[1:])}(?P<marca{i}>)(?P<marca{i}_espacio>\\s)?)')
+        grupos[f'marca{i}'] = ('marca', marca)
+        grupos[f'marca{i}_espacio'] = ('marca_espacio', marca)
+
+    # Número directo de 10 dígitos: solo al inicio de una racha de dígitos
+    for digito in '0123456789':
+        ramas.append(f'{digito}(?<!\\d.)(?=\\d{{9}}(?P<digito{digito}>))')
+        grupos[f'digito{digito}'] = ('digitos', None)
+
+    return re.compile('|'.join(ramas)), grupos
+
+
+_PATRON_NODE_RED, _GRUPOS_NODE_RED = _compilar_patron_node_red()
+
+# **IDENTIFICADOR DE INICIO**: patrones anclados al inicio del texto sin espacios
+_PATRON_INICIO = re.compile(r'\s*(?:INICIO|START|BEGIN|NUEVA_CONVERSACION|NEW_CONVERSATION)')
+
+# Solo para textos con dígitos no ASCII, que las ramas literales no cubren
+_PATRON_DIGITOS = re.compile(r'(\d{10})')
+
+_MARCAS_EXACTAS = frozenset(_MARCAS)
+
+# Nombre para mostrar de cada marca, resuelto una vez contra el catálogo
+_COMPANIA_POR_MARCA = {marca: REGISTRY.resolver(marca) for marca in _MARCAS}
+
+# Claves en el orden de prioridad de la extracción de número
+_CLAVES_NUMERO = ('numero', 'number', 'digitos')
+
+
+# "[Telcel](compania_operador)" -> "Telcel"
+_PATRON_ANOTACION = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+
+
+def _cargar_palabras_comunes(ruta: Text = RUTA_NLU) -> FrozenSet[Text]:
+    """
+    Palabras que nunca se buscan de forma aproximada como nombre de operador.
+
+    Son `_PALABRAS_VACIAS` más todas las palabras de los ejemplos
+    de `data/nlu.yml` que no son de `informar_compania` ("adiós", "principal",
+    nombres de personas...).
+    """
+    palabras = set(_PALABRAS_VACIAS)
+    try:
+        import yaml
+
+        with open(ruta, encoding='utf-8') as archivo:
+            datos = yaml.safe_load(archivo) or {}
+    except (OSError, ImportError) as error:
+        logger.warning("No se pudieron leer los ejemplos de %s (%s); solo palabras vacías", ruta, error)
+        return frozenset(palabras)
+
+    for bloque in datos.get('nlu') or ():
+        if 'intent' not in bloque or bloque['intent'] == _INTENCION_COMPANIA:
+            continue
+        for linea in (bloque.get('examples') or '').splitlines():
+            ejemplo = _PATRON_ANOTACION.sub(r'\1', linea.strip().lstrip('-'))
+            palabras.update(normalizar_clave(ejemplo).split())
+    return frozenset(palabras)
+
+
+_PALABRAS_COMUNES = _cargar_palabras_comunes()
+
+
+def _parece_operador(texto: Text) -> bool:
+    """Una sola palabra que no es un ejemplo de otro intent ni una palabra vacía."""
+    clave = normalizar_clave(texto)
+    return bool(clave) and ' ' not in clave and clave not in _PALABRAS_COMUNES
+
+
+class DeteccionNodeRed(NamedTuple):
+    """Resultado de analizar un mensaje entrante de Node-RED."""
+
+    es_node_red: bool
+    compania: Optional[Text]
+    numero: Optional[Text]
+    es_inicio: bool
+    formato: Optional[Text]
+
+
+SIN_DETECCION = DeteccionNodeRed(False, None, None, False, None)
+
+
+def _resolver_etiqueta(compania_raw: Text) -> Text:
+    """Compañía de COMPANIA_DETECTADA/OPERATOR: exacta, aproximada o tal cual."""
+    compania = REGISTRY.resolver(compania_raw)
+    if compania is None:
+        coincidencia = DIFUSO.buscar(compania_raw)
+        compania = coincidencia.nombre if coincidencia else compania_raw.capitalize()
+    return compania
+
+
+def detectar_mensaje_node_red(texto: Optional[Text]) -> DeteccionNodeRed:
+    """
+    Analiza un mensaje de Node-RED en una sola pasada.
+
+    Mantiene el orden de prioridad del Node-RED original:
+    COMPANIA_DETECTADA, OPERATOR SPOT UNO, OPERATOR, marca en el texto y
+    por último el nombre formateado de la base de datos (nombre del catálogo
+    escrito tal cual, o cualquier alias de un operador con `nombre_directo`).
+    Si no hay compañía pero sí un número, el operador se busca en el índice
+    de numeración; si no hay ninguno de los dos y el texto es una sola
+    palabra que no es de otro intent, se prueba la búsqueda aproximada del
+    nombre (actions/difuso.py). El número solo se devuelve cuando se detectó
+    la compañía.
+
+    Args:
+        texto: Texto del mensaje tal como llega en `latest_message`
+
+    Returns:
+        DeteccionNodeRed con la compañía, el número, si es un identificador
+        de inicio y el formato que coincidió
+    """
+    if not texto:
+        return SIN_DETECCION
+
+    texto_upper = texto.upper()
+    encontrados = {}
+    marca_con_espacio = False
+
+    for match in _PATRON_NODE_RED.finditer(texto_upper):
+        grupo = match.lastgroup
+        clave, valor = _GRUPOS_NODE_RED[grupo]
+        if clave == 'marca_espacio':
+            marca_con_espacio = True
+            clave = 'marca'
+        if clave in encontrados:
+            continue
+        if clave == 'digitos':
+            valor = texto_upper[match.start():match.start() + 10]
+        elif valor is None:
+            valor = match.group(grupo)
+        encontrados[clave] = valor
+
+    if not texto_upper.isascii():
+        encontrados.pop('digitos', None)
+        match = _PATRON_DIGITOS.search(texto_upper)
+        if match:
+            encontrados['digitos'] = match.group(1)
+
+    es_inicio = 'inicio' in encontrados or _PATRON_INICIO.match(texto_upper) is not None
+
+    # **PATRONES DE EXTRACCIÓN (orden de prioridad)**
+    if 'detectada' in encontrados:
+        compania = _resolver_etiqueta(encontrados['detectada'])
+        formato = 'compania_detectada'
+    elif 'spot_uno' in encontrados:
+        compania = 'Spot Uno'
+        formato = 'operator_spot_uno'
+    elif 'operador' in encontrados:
+        compania = _resolver_etiqueta(encontrados['operador'])
+        formato = 'operator'
+    elif 'marca' in encontrados and (
+        marca_con_espacio or texto_upper in _MARCAS_EXACTAS or texto in REGISTRY
+    ):
+        compania = _COMPANIA_POR_MARCA[encontrados['marca']]
+        formato = 'marca'
+    else:
+        # Formato Node-RED actual: nombres formateados de la base de datos,
+        # tal cual ("Valor" sí, "valor" no) o de un operador con `nombre_directo`
+        compania = REGISTRY.resolver_exacto(texto)
+        formato = 'nombre_formateado'
+
+    numero = None
+    for clave in _CLAVES_NUMERO:
+        if clave in encontrados:
+            numero = encontrados[clave]
+            break
+
+    if compania is None and numero is None and _parece_operador(texto):
+        # Nombre escrito a mano por el usuario ("movistra", "telecomerce").
+        # Una coincidencia exacta ya la decidió `resolver_exacto`: "valor" en
+        # minúsculas no es el operador Valor
+        coincidencia = DIFUSO.buscar(texto)
+        if coincidencia is not None and coincidencia.distancia:
+            compania = coincidencia.nombre
+            formato = 'difuso'
+
+    if compania is None:
+        # Solo llegó el número: el operador sale del plan de numeración
+        compania = NUMERACION.resolver(numero)
+        if compania is None:
+            return DeteccionNodeRed(False, None, None, es_inicio, None)
+        formato = 'numeracion'
+
+    return DeteccionNodeRed(True, compania, numero, es_inicio, formato)
@@ -0,0 +1,224 @@
+"""
+Búsqueda aproximada de operadores (IndiceDifuso).
+
+Cuando el usuario escribe la compañía a mano ("movistra", "telecomerce") el
+índice exacto de `OperatorRegistry` no la encuentra. Calcular la
+distancia de edición contra todo el catálogo en cada mensaje no escala, así
+que se usa un índice de borrados simétricos:
+
+1. Para cada alias se calcula la distancia máxima D con la que todavía puede
+   cumplir el umbral de confianza (nunca más de DISTANCIA_MAXIMA) y se
+   indexan todas las variantes que resultan de borrarle hasta D letras.
+2. Dos textos a distancia d (sustituciones, inserciones, borrados y
+   transposiciones) comparten una variante con a lo sumo d borrados de cada
+   lado, así que basta con buscar en el diccionario las variantes del texto:
+   el costo depende del largo del texto, no del tamaño del catálogo.
+3. Las variantes se recorren por número de borrados; en cuanto la mejor
+   coincidencia ya no puede ser superada por una más lejana se deja de buscar.
+   A los candidatos se les calcula la distancia acotada (con transposiciones).
+
+La confianza es 1 - distancia / longitud del más largo de los dos textos. El
+precio es memoria: unas decenas de variantes por alias.
+"""
+
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Text, Tuple
+
+from actions.operadores import REGISTRY, OperatorRegistry, normalizar_clave
+
+UMBRAL_DIFUSO = float(os.environ.get("BOTMOBILE_UMBRAL_DIFUSO", "0.8"))
+
+# Textos más cortos dan demasiadas coincidencias con palabras comunes; más
+# largos ya no son un nombre de operador escrito a mano
+LONGITUD_MINIMA = 4
+LONGITUD_MAXIMA = 40
+
+# Errores de dedo en un nombre de operador; con k errores cada alias aporta
+# del orden de largo^k / k! variantes al índice
+DISTANCIA_MAXIMA = 1
+
+# En claves más cortas una sola letra ya lleva de una palabra común a un
+# operador ("adios" -> "axios", "telmex" -> "celmex"): solo coincidencia exacta
+LONGITUD_UNA_EDICION = 8
+
+
+class Coincidencia(NamedTuple):
+    """Mejor operador para un texto y qué tan parecido es."""
+
+    nombre: Text
+    alias: Text
+    confianza: float
+    distancia: int
+
+
+def distancia_acotada(a: Text, b: Text, limite: int) -> Optional[int]:
+    """
+    Distancia de edición con transposiciones (OSA), o None si supera `limite`.
+
+    Solo se recorre la banda de ancho 2·limite+1 alrededor de la diagonal y
+    se corta en cuanto todas las celdas de una fila superan el límite.
+    """
+    if abs(len(a) - len(b)) > limite:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+
+    fuera = limite + 1
+    anterior_previa: List[int] = []
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [fuera] * (len(b) + 1)
+        actual[0] = i
+        desde, hasta = max(1, i - limite), min(len(b), i + limite)
+        minimo = actual[0] if desde == 1 else fuera
+        ca = a[i - 1]
+        for j in range(desde, hasta + 1):
+            cb = b[j - 1]
+            valor = min(
+                anterior[j] + 1,
+                actual[j - 1] + 1,
+                anterior[j - 1] + (ca != cb),
+            )
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                valor = min(valor, anterior_previa[j - 2] + 1)
+            actual[j] = valor
+            if valor < minimo:
+                minimo = valor
+        if minimo > limite:
+            return None
+        anterior_previa, anterior = anterior, actual
+
+    distancia = anterior[len(b)]
+    return distancia if distancia <= limite else None
+
+
+def distancia_permitida(longitud: int, umbral: float) -> int:
+    """
+    Mayor distancia a la que puede quedar un texto de esta longitud de
+    cualquier otro con confianza >= umbral.
+
+    Con el otro texto más largo el denominador crece: d <= (1 - u)(n + d).
+    Por debajo de LONGITUD_UNA_EDICION no se permite ninguna edición.
+    """
+    if longitud < LONGITUD_UNA_EDICION:
+        return 0
+    if umbral <= 0:
+        return DISTANCIA_MAXIMA
+    return min(DISTANCIA_MAXIMA, int((1 - umbral) * longitud / umbral + 1e-9))
+
+
+def borrados(clave: Text) -> Set[Text]:
+    """Variantes de la clave con exactamente una letra menos."""
+    return {clave[:i] + clave[i + 1:] for i in range(len(clave))}
+
+
+class IndiceDifuso:
+    """Índice de borrados simétricos sobre los alias normalizados del catálogo."""
+
+    __slots__ = ('umbral', '_claves', '_nombres', '_exactos', '_variantes')
+
+    def __init__(self, alias: Iterable[Tuple[Text, Text]], umbral: float = UMBRAL_DIFUSO) -> None:
+        """
+        Args:
+            alias: Pares (clave normalizada, nombre para mostrar)
+            umbral: Confianza mínima (0-1) para aceptar una coincidencia
+        """
+        self.umbral = umbral
+        self._claves: List[Text] = []
+        self._nombres: List[Text] = []
+        self._exactos: Dict[Text, int] = {}
+        variantes: Dict[Text, List[int]] = {}
+
+        for clave, nombre in alias:
+            if clave in self._exactos:
+                continue
+            indice = len(self._claves)
+            self._exactos[clave] = indice
+            self._claves.append(clave)
+            self._nombres.append(nombre)
+
+            nivel = {clave}
+            for distancia in range(distancia_permitida(len(clave), umbral) + 1):
+                if distancia:
+                    nivel = {variante for anterior in nivel for variante in borrados(anterior)}
+                for variante in nivel:
+                    variantes.setdefault(variante, []).append(indice)
+
+        self._variantes: Dict[Text, Tuple[int, ...]] = {
+            variante: tuple(ids) for variante, ids in variantes.items()
+        }
+
+    @classmethod
+    def desde_registro(cls, registro: OperatorRegistry, umbral: float = UMBRAL_DIFUSO) -> 'IndiceDifuso':
+        return cls(registro.alias(), umbral)
+
+    def buscar(self, texto: Optional[Text]) -> Optional[Coincidencia]:
+        """
+        Operador más parecido al texto.
+
+        Args:
+            texto: Mensaje del usuario, sin normalizar
+
+        Returns:
+            Coincidencia con confianza >= umbral, o None. Con empate gana el
+            alias que aparece primero en el catálogo.
+        """
+        if not texto:
+            return None
+        clave = normalizar_clave(texto)
+        longitud = len(clave)
+        if not LONGITUD_MINIMA <= longitud <= LONGITUD_MAXIMA:
+            return None
+
+        exacto = self._exactos.get(clave)
+        if exacto is not None:
+            return Coincidencia(self._nombres[exacto], clave, 1.0, 0)
+
+        distancia_maxima = distancia_permitida(longitud, self.umbral)
+        mejor_confianza, mejor = self.umbral, None
+        vistos: Set[int] = set()
+        nivel = {clave}
+
+        for borrados_texto in range(distancia_maxima + 1):
+            if borrados_texto:
+                nivel = {variante for anterior in nivel for variante in borrados(anterior)}
+            candidatos: Set[int] = set()
+            for variante in nivel:
+                ids = self._variantes.get(variante)
+                if ids:
+                    candidatos.update(ids)
+            candidatos -= vistos
+            vistos |= candidatos
+
+            for indice in sorted(candidatos):
+                alias = self._claves[indice]
+                largo = max(longitud, len(alias))
+                limite = min(distancia_maxima, distancia_permitida(len(alias), self.umbral),
+                             int((1 - mejor_confianza) * largo + 1e-9))
+                distancia = distancia_acotada(clave, alias, limite)
+                if distancia is None:
+                    continue
+                confianza = 1 - distancia / largo
+                if mejor is None or confianza > mejor_confianza or (
+                        confianza == mejor_confianza and indice < mejor[0]):
+                    mejor_confianza, mejor = confianza, (indice, distancia)
+
+            # Lo que falta encontrar está a más de `borrados_texto` ediciones
+            if mejor is not None and mejor_confianza > 1 - (borrados_texto + 1) / (longitud + distancia_maxima):
+                break
+
+        if mejor is None:
+            return None
+        indice, distancia = mejor
+        return Coincidencia(self._nombres[indice], self._claves[indice], round(mejor_confianza, 4), distancia)
+
+    @property
+    def variantes(self) -> int:
+        """Entradas del índice de borrados (lo que ocupa en memoria)."""
+        return len(self._variantes)
+
+    def __len__(self) -> int:
+        return len(self._claves)
+
+
+DIFUSO = IndiceDifuso.desde_registro(REGISTRY)
@@ -0,0 +1,106 @@
+"""
+Cliente HTTP asíncrono compartido por las acciones.
+
+Una sola `aiohttp.ClientSession` por proceso y event loop, con pool de
+conexiones acotado y timeouts por defecto. Cada llamada puede además fijar su
+propio plazo, de modo que una consulta lenta (CRM, disponibilidad de agentes)
+nunca retiene la acción más de lo que la conversación puede esperar y nunca
+bloquea el event loop de Sanic.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Optional, Text
+
+import aiohttp
+
+
+class ClienteHTTP:
+    """Sesión aiohttp perezosa con pool y plazos por llamada."""
+
+    def __init__(self,
+                 limite_conexiones: int = 100,
+                 limite_por_host: int = 20,
+                 timeout_total: float = 5.0,
+                 timeout_conexion: float = 1.0) -> None:
+        self.limite_conexiones = limite_conexiones
+        self.limite_por_host = limite_por_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout_total, connect=timeout_conexion)
+        self._sesion: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def desde_entorno(cls) -> 'ClienteHTTP':
+        """
+        Crea el cliente a partir de variables de entorno.
+
+        Variables de entorno:
+            BOTMOBILE_HTTP_CONEXIONES: conexiones simultáneas del pool (100)
+            BOTMOBILE_HTTP_CONEXIONES_HOST: conexiones por host (20)
+            BOTMOBILE_HTTP_TIMEOUT: timeout total por defecto en segundos (5)
+            BOTMOBILE_HTTP_TIMEOUT_CONEXION: timeout de conexión en segundos (1)
+        """
+        return cls(
+            limite_conexiones=int(os.environ.get("BOTMOBILE_HTTP_CONEXIONES", "100")),
+            limite_por_host=int(os.environ.get("BOTMOBILE_HTTP_CONEXIONES_HOST", "20")),
+            timeout_total=float(os.environ.get("BOTMOBILE_HTTP_TIMEOUT", "5")),
+            timeout_conexion=float(os.environ.get("BOTMOBILE_HTTP_TIMEOUT_CONEXION", "1")),
+        )
+
+    def sesion(self) -> aiohttp.ClientSession:
+        """Devuelve la sesión del event loop actual, creándola si hace falta."""
+        loop = asyncio.get_running_loop()
+        if self._sesion is None or self._sesion.closed or self._loop is not loop:
+            conector = aiohttp.TCPConnector(
+                limit=self.limite_conexiones,
+                limit_per_host=self.limite_por_host,
+                ttl_dns_cache=300,
+            )
+            self._sesion = aiohttp.ClientSession(connector=conector, timeout=self.timeout)
+            self._loop = loop
+        return self._sesion
+
+    async def solicitar_json(self, metodo: Text, url: Text, *,
+                             plazo: Optional[float] = None,
+                             **kwargs: Any) -> Any:
+        """
+        Hace una petición y devuelve el cuerpo JSON.
+
+        Args:
+            metodo: Método HTTP ("GET", "POST", ...)
+            url: URL completa
+            plazo: Segundos máximos para esta llamada; si es None se usa el
+                timeout por defecto del cliente
+            **kwargs: Argumentos para `aiohttp.ClientSession.request`
+                (params, json, headers...)
+
+        Returns:
+            Cuerpo de la respuesta decodificado como JSON
+
+        Raises:
+            asyncio.TimeoutError: Si se agota el plazo
+            aiohttp.ClientError: Si la petición falla o el estado no es 2xx
+        """
+        if plazo is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=plazo)
+
+        async with self.sesion().request(metodo, url, **kwargs) as respuesta:
+            respuesta.raise_for_status()
+            return await respuesta.json(content_type=None)
+
+    async def get_json(self, url: Text, *, params: Optional[Dict[Text, Any]] = None,
+                       plazo: Optional[float] = None) -> Any:
+        return await self.solicitar_json("GET", url, params=params, plazo=plazo)
+
+    async def post_json(self, url: Text, datos: Any, *, plazo: Optional[float] = None) -> Any:
+        return await self.solicitar_json("POST", url, json=datos, plazo=plazo)
+
+    async def cerrar(self) -> None:
+        """Cierra la sesión y libera las conexiones del pool."""
+        if self._sesion is not None and not self._sesion.closed:
+            await self._sesion.close()
+        self._sesion = None
+        self._loop = None
+
+
+CLIENTE_HTTP = ClienteHTTP.desde_entorno()
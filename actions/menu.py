@@ -0,0 +1,213 @@
+"""
+Máquina de estados del menú de opciones numeradas.
+
+El grafo se declara en `config/menu.yml` (estados × opción -> estado destino)
+y se compila una vez al importar en una tabla (estado, opción) -> pantalla
+destino, con la imagen y los slots ya resueltos. `ActionElegirOpcion` solo
+hace una búsqueda en diccionario por mensaje, a cualquier profundidad del
+menú y sin historias extra para la política. Los payloads de los botones de
+cada estado (actions/postback.py) también se generan al compilar.
+
+Al compilar se valida el grafo: estados destino que no existen, estados a
+los que no se puede llegar desde el inicial, textos que no están en
+`PLANTILLAS` e imágenes que no están en `ARCHIVOS_IMAGENES`. Cualquier error
+detiene el arranque del servidor de acciones. Al cargar y en cada recarga del
+contenido se revisa además que los títulos de botones de cada pantalla
+correspondan a opciones válidas en ese estado.
+"""
+
+import collections
+import os
+from typing import Any, Container, Dict, Iterable, List, Mapping, NamedTuple, Optional, Text, Tuple
+
+from actions.plantillas import PLANTILLAS, Plantillas
+from actions.postback import MAX_BYTES_POSTBACK, crear_postback, leer_postback
+from config.image_config import ARCHIVOS_IMAGENES, ImageConfig
+
+RUTA_MENU = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'menu.yml'
+)
+
+
+class Pantalla(NamedTuple):
+    """Lo que se muestra al entrar a un estado del menú."""
+
+    estado: Text
+    texto: Text
+    personalizado: bool
+    imagen: Optional[Text]
+    slots: Tuple[Tuple[Text, Any], ...]
+
+
+class MenuCompilado:
+    """Tabla de despacho (estado, opción) -> pantalla destino."""
+
+    __slots__ = ('estado_inicial', 'pantallas', '_tabla', '_postbacks')
+
+    def __init__(self, estado_inicial: Text, pantallas: Dict[Text, Pantalla],
+                 tabla: Dict[Tuple[Text, Text], Pantalla]) -> None:
+        self.estado_inicial = estado_inicial
+        self.pantallas = pantallas
+        self._tabla = tabla
+        self._postbacks = {clave: crear_postback(*clave) for clave in tabla}
+
+    @classmethod
+    def desde_definicion(cls, definicion: Mapping[Text, Any],
+                         plantillas: Container[Text] = PLANTILLAS,
+                         imagenes: Mapping[Text, Text] = ARCHIVOS_IMAGENES) -> 'MenuCompilado':
+        """
+        Compila y valida la definición del menú.
+
+        Args:
+            definicion: Contenido de `config/menu.yml`
+            plantillas: Textos disponibles para las pantallas
+            imagenes: Nombres de imagen válidos
+
+        Raises:
+            ValueError: Con todos los problemas encontrados en el grafo
+        """
+        estados: Mapping[Text, Mapping[Text, Any]] = definicion.get('estados') or {}
+        globales = {str(opcion): destino for opcion, destino in (definicion.get('globales') or {}).items()}
+        inicial = definicion.get('estado_inicial')
+        externas = list(definicion.get('entradas_externas') or [])
+        errores: List[Text] = []
+
+        if inicial not in estados:
+            errores.append(f"estado_inicial '{inicial}' no está definido")
+        for estado in externas:
+            if estado not in estados:
+                errores.append(f"entrada externa '{estado}' no está definida")
+
+        pantallas: Dict[Text, Pantalla] = {}
+        transiciones: Dict[Text, Dict[Text, Text]] = {}
+        for estado, datos in estados.items():
+            datos = datos or {}
+            texto = datos.get('texto')
+            if texto not in plantillas:
+                errores.append(f"{estado}: el texto '{texto}' no está en las plantillas")
+            imagen = datos.get('imagen')
+            if imagen is not None and imagen not in imagenes:
+                errores.append(f"{estado}: la imagen '{imagen}' no está en ARCHIVOS_IMAGENES")
+            pantallas[estado] = Pantalla(
+                estado=estado,
+                texto=texto,
+                personalizado=bool(datos.get('personalizado', False)),
+                imagen=ImageConfig.get_image_url(imagen) if imagen else None,
+                slots=(('estado_menu', estado),) + tuple((datos.get('slots') or {}).items()),
+            )
+
+            opciones = dict(globales)
+            opciones.update((str(opcion), destino) for opcion, destino in (datos.get('opciones') or {}).items())
+            payload = crear_postback(estado, '10')
+            if leer_postback(payload) is None:
+                errores.append(f"{estado}: el nombre no sirve para el payload de un botón (solo letras, dígitos y _)")
+            elif len(payload.encode('utf-8')) > MAX_BYTES_POSTBACK:
+                errores.append(f"{estado}: el payload de sus botones pasa de {MAX_BYTES_POSTBACK} bytes; "
+                               f"acorta el nombre del estado")
+            for opcion, destino in opciones.items():
+                if not opcion.isdigit():
+                    errores.append(f"{estado}: la opción '{opcion}' no es un número")
+                if destino not in estados:
+                    errores.append(f"{estado}: la opción {opcion} lleva a '{destino}', que no existe")
+            transiciones[estado] = opciones
+
+        if inicial in estados:
+            alcanzables = _alcanzables([inicial, *externas], transiciones)
+            for estado in estados:
+                if estado not in alcanzables:
+                    errores.append(f"{estado}: no se puede llegar desde '{inicial}'")
+
+        if errores:
+            raise ValueError("Menú inválido:\n  " + "\n  ".join(errores))
+
+        tabla = {
+            (estado, opcion): pantallas[destino]
+            for estado, opciones in transiciones.items()
+            for opcion, destino in opciones.items()
+        }
+        return cls(inicial, pantallas, tabla)
+
+    @classmethod
+    def desde_yaml(cls, ruta: Text = RUTA_MENU) -> 'MenuCompilado':
+        """Lee y compila `config/menu.yml`."""
+        import yaml
+
+        with open(ruta, encoding='utf-8') as archivo:
+            return cls.desde_definicion(yaml.safe_load(archivo) or {})
+
+    def estado(self, estado: Optional[Text]) -> Text:
+        """El estado dado si existe; si no, el inicial."""
+        return estado if estado in self.pantallas else self.estado_inicial
+
+    def elegir(self, estado: Optional[Text], opcion: Optional[Text]) -> Optional[Pantalla]:
+        """
+        Pantalla a la que lleva una opción.
+
+        Args:
+            estado: Valor del slot `estado_menu`
+            opcion: Número elegido por el usuario
+
+        Returns:
+            Pantalla destino, o None si la opción no es válida en ese estado
+        """
+        return self._tabla.get((self.estado(estado), opcion))
+
+    def postback(self, estado: Optional[Text], opcion: Text) -> Optional[Text]:
+        """Payload del botón de una opción, o None si no es válida en ese estado."""
+        return self._postbacks.get((self.estado(estado), opcion))
+
+    def opciones(self, estado: Optional[Text]) -> List[Text]:
+        """Números válidos en un estado, ordenados."""
+        estado = self.estado(estado)
+        return sorted(opcion for (origen, opcion) in self._tabla if origen == estado)
+
+    def __len__(self) -> int:
+        return len(self._tabla)
+
+
+def _alcanzables(origenes: Iterable[Text], transiciones: Mapping[Text, Mapping[Text, Text]]) -> set:
+    vistos = set(origenes)
+    pendientes = collections.deque(vistos)
+    while pendientes:
+        for destino in transiciones.get(pendientes.popleft(), {}).values():
+            if destino in transiciones and destino not in vistos:
+                vistos.add(destino)
+                pendientes.append(destino)
+    return vistos
+
+
+def validar_contenido(plantillas: Plantillas) -> None:
+    """
+    Rechaza un contenido que deje sin texto a alguna pantalla o que muestre
+    como botón una opción que el estado no tiene.
+    """
+    faltantes = sorted({pantalla.texto for pantalla in MENU.pantallas.values()
+                        if pantalla.texto not in plantillas})
+    if faltantes:
+        raise ValueError(f"Faltan textos usados por el menú: {', '.join(faltantes)}")
+
+    errores = []
+    for pantalla in MENU.pantallas.values():
+        variantes = [plantillas.texto_botones(pantalla.texto)]
+        if pantalla.personalizado:
+            variantes.append(plantillas.personalizada_botones(pantalla.texto, "{compania}"))
+        for _, titulos in variantes:
+            sobrantes = [str(numero) for numero in range(1, len(titulos) + 1)
+                         if MENU.postback(pantalla.estado, str(numero)) is None]
+            if sobrantes:
+                errores.append(f"{pantalla.estado}: '{pantalla.texto}' muestra las opciones "
+                               f"{', '.join(sobrantes)}, que no existen en ese estado")
+    if errores:
+        raise ValueError("Opciones del contenido sin destino en el menú:\n  " + "\n  ".join(errores))
+
+
+MENU = MenuCompilado.desde_yaml()
+validar_contenido(PLANTILLAS.actual)
+PLANTILLAS.validadores.append(validar_contenido)
+
+
+if __name__ == '__main__':
+    for estado in MENU.pantallas:
+        destinos = ", ".join(f"{opcion}->{MENU.elegir(estado, opcion).estado}" for opcion in MENU.opciones(estado))
+        print(f"{estado:20} {destinos}")
+    print(f"\nMenú válido: {len(MENU.pantallas)} estados, {len(MENU)} transiciones")
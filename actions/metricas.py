@@ -0,0 +1,248 @@
+"""
+Métricas del servidor de acciones en formato de texto Prometheus.
+
+Contadores, medidores e histogramas en memoria del proceso, sin dependencias
+externas. `medir_accion` envuelve el `run` de cada acción para registrar
+latencia, llamadas y excepciones; las acciones además cuentan qué rama
+tomaron (compañía detectada, saludo genérico, opción inválida...).
+La exposición se sirve en `/metrics` desde `rasa_sdk_plugins`.
+
+Lo que corre dentro de `sin_registro()` (el calentamiento al arrancar) no
+suma en contadores ni histogramas. La marca es una variable de contexto, así
+que solo afecta a la tarea de asyncio que la puso: las peticiones reales que
+llegan mientras tanto se registran normalmente.
+"""
+
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import functools
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Text, Tuple
+
+# Latencias de acciones: de 100 µs a 2.5 s
+BUCKETS_LATENCIA = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+_SIN_REGISTRO: "contextvars.ContextVar[bool]" = contextvars.ContextVar("botmobile_sin_registro", default=False)
+
+
+@contextlib.contextmanager
+def sin_registro() -> Iterator[None]:
+    """Contadores e histogramas ignoran lo que se registre dentro, en esta tarea."""
+    marca = _SIN_REGISTRO.set(True)
+    try:
+        yield
+    finally:
+        _SIN_REGISTRO.reset(marca)
+
+
+def registrando() -> bool:
+    """False dentro de `sin_registro()`: se puede omitir el cálculo de lo que se iba a registrar."""
+    return not _SIN_REGISTRO.get()
+
+
+def _etiquetas(nombres: Sequence[Text], valores: Sequence[Text], extra: Text = "") -> Text:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _escapar(valor: Text) -> Text:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor: float) -> Text:
+    return repr(float(valor)) if valor != int(valor) else str(int(valor))
+
+
+class Contador:
+    """Contador monotónico con etiquetas; opcionalmente calculado al exponer."""
+
+    tipo = "counter"
+
+    def __init__(self, nombre: Text, ayuda: Text, etiquetas: Sequence[Text] = (),
+                 funcion: Optional[Callable[[], float]] = None) -> None:
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._funcion = funcion
+        self._valores: Dict[Tuple[Text, ...], float] = {}
+
+    def inc(self, *valores: Text, cantidad: float = 1) -> None:
+        if _SIN_REGISTRO.get():
+            return
+        self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def valor(self, *valores: Text) -> float:
+        return self._valores.get(valores, 0)
+
+    def series(self) -> Dict[Tuple[Text, ...], float]:
+        """Copia de los valores por combinación de etiquetas."""
+        return dict(self._valores)
+
+    def reiniciar(self) -> None:
+        """Descarta todas las series."""
+        self._valores.clear()
+
+    def exponer(self) -> List[Text]:
+        if self._funcion is not None:
+            self._valores[()] = self._funcion()
+        return [
+            f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(valor)}"
+            for valores, valor in sorted(self._valores.items())
+        ]
+
+
+class Medidor(Contador):
+    """Valor que sube y baja; opcionalmente calculado al exponer."""
+
+    tipo = "gauge"
+
+    def set(self, valor: float, *valores: Text) -> None:
+        self._valores[valores] = valor
+
+    def dec(self, *valores: Text, cantidad: float = 1) -> None:
+        self.inc(*valores, cantidad=-cantidad)
+
+
+class Histograma:
+    """Histograma con buckets fijos, compatible con histogram_quantile()."""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre: Text, ayuda: Text, etiquetas: Sequence[Text] = (),
+                 buckets: Sequence[float] = BUCKETS_LATENCIA) -> None:
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinación de etiquetas: [conteo por bucket (no acumulado)..., +Inf, suma]
+        self._series: Dict[Tuple[Text, ...], List[float]] = {}
+
+    def observar(self, valor: float, *valores: Text) -> None:
+        if _SIN_REGISTRO.get():
+            return
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [0] * (len(self.buckets) + 2)
+        serie[bisect.bisect_left(self.buckets, valor)] += 1
+        serie[-1] += valor
+
+    def conteo(self, *valores: Text) -> int:
+        serie = self._series.get(valores)
+        return int(sum(serie[:-1])) if serie else 0
+
+    def reiniciar(self) -> None:
+        """Descarta todas las series."""
+        self._series.clear()
+
+    def exponer(self) -> List[Text]:
+        lineas = []
+        for valores, serie in sorted(self._series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, serie):
+                acumulado += conteo
+                le = f'le="{limite}"'
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}")
+            acumulado += serie[-2]
+            le = 'le="+Inf"'
+            lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {_numero(serie[-1])}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {acumulado}")
+        return lineas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas de un proceso."""
+
+    def __init__(self) -> None:
+        self._metricas: Dict[Text, object] = {}
+
+    def _registrar(self, metrica):
+        existente = self._metricas.setdefault(metrica.nombre, metrica)
+        if type(existente) is not type(metrica):
+            raise ValueError(f"La métrica '{metrica.nombre}' ya existe con otro tipo")
+        return existente
+
+    def contador(self, nombre: Text, ayuda: Text, etiquetas: Sequence[Text] = (),
+                 funcion: Optional[Callable[[], float]] = None) -> Contador:
+        return self._registrar(Contador(nombre, ayuda, etiquetas, funcion))
+
+    def medidor(self, nombre: Text, ayuda: Text, etiquetas: Sequence[Text] = (),
+                funcion: Optional[Callable[[], float]] = None) -> Medidor:
+        return self._registrar(Medidor(nombre, ayuda, etiquetas, funcion))
+
+    def histograma(self, nombre: Text, ayuda: Text, etiquetas: Sequence[Text] = (),
+                   buckets: Sequence[float] = BUCKETS_LATENCIA) -> Histograma:
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def exponer(self) -> Text:
+        """Todas las métricas en formato de texto Prometheus 0.0.4."""
+        lineas = []
+        for metrica in self._metricas.values():
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.exponer())
+        return "\n".join(lineas) + "\n"
+
+
+METRICAS = RegistroMetricas()
+
+LATENCIA_ACCION = METRICAS.histograma(
+    "botmobile_accion_duracion_segundos", "Duración de Action.run por acción", ("accion",)
+)
+LLAMADAS_ACCION = METRICAS.contador(
+    "botmobile_accion_llamadas_total", "Llamadas a Action.run por acción", ("accion",)
+)
+ERRORES_ACCION = METRICAS.contador(
+    "botmobile_accion_errores_total", "Excepciones en Action.run por acción y tipo", ("accion", "error")
+)
+RESULTADOS_ACCION = METRICAS.contador(
+    "botmobile_accion_resultado_total",
+    "Rama tomada por cada acción (formato de detección, saludo genérico, opción de menú...)",
+    ("accion", "resultado"),
+)
+
+
+def medir_accion(run: Callable) -> Callable:
+    """
+    Decorador para `Action.run` que registra latencia, llamadas y excepciones.
+
+    Funciona con implementaciones síncronas y asíncronas de `run`.
+    """
+    if asyncio.iscoroutinefunction(run):
+        @functools.wraps(run)
+        async def envoltura_async(self, dispatcher, tracker, domain):
+            accion = self.name()
+            inicio = time.perf_counter()
+            try:
+                return await run(self, dispatcher, tracker, domain)
+            except Exception as error:
+                ERRORES_ACCION.inc(accion, type(error).__name__)
+                raise
+            finally:
+                LATENCIA_ACCION.observar(time.perf_counter() - inicio, accion)
+                LLAMADAS_ACCION.inc(accion)
+
+        return envoltura_async
+
+    @functools.wraps(run)
+    def envoltura(self, dispatcher, tracker, domain):
+        accion = self.name()
+        inicio = time.perf_counter()
+        try:
+            return run(self, dispatcher, tracker, domain)
+        except Exception as error:
+            ERRORES_ACCION.inc(accion, type(error).__name__)
+            raise
+        finally:
+            LATENCIA_ACCION.observar(time.perf_counter() - inicio, accion)
+            LLAMADAS_ACCION.inc(accion)
+
+    return envoltura
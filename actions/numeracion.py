@@ -0,0 +1,304 @@
+"""
+Índice de numeración: número de 10 dígitos -> operador asignado.
+
+El plan de numeración (series y rangos asignados a cada operador) tiene
+cientos de miles de rangos. Se guarda como tres arreglos ordenados
+(inicio, fin, operador) en un archivo binario que se abre con mmap: cargarlo
+no copia nada a memoria, los procesos del servidor comparten las mismas
+páginas y cada consulta es un bisect sobre los inicios.
+
+El archivo se genera a partir del CSV del plan de numeración con:
+    python -m actions.numeracion pnn_Publico.csv --codificacion latin-1
+"""
+
+import argparse
+import array
+import bisect
+import csv
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+from typing import Iterable, List, Optional, Sequence, Text, Tuple
+
+from actions.operadores import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RUTA_INDICE = os.environ.get(
+    "BOTMOBILE_NUMERACION",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "numeracion.idx"),
+)
+
+# magic, versión, reservado, número de rangos, bytes de nombres
+_CABECERA = struct.Struct("<4sHHII")
+_MAGIC = b"BMNR"
+_VERSION = 1
+
+# Sufijos societarios en la razón social del plan de numeración
+_SUFIJO_SOCIETARIO = re.compile(r"[,.]?\s+S\.?\s*(?:A\.?|DE\s+R\.?\s*L\.?)(?:\s|\.|,|$).*$", re.IGNORECASE)
+
+_NO_DIGITOS = re.compile(r"\D")
+
+# Un rango: (inicio, fin, nombre del operador), ambos extremos incluidos
+Rango = Tuple[int, int, Text]
+
+
+def normalizar_numero(numero: Text) -> Optional[int]:
+    """
+    Convierte un número en cualquier formato a sus 10 dígitos nacionales.
+
+    "+52 1 55 1234 5678", "5215512345678" y "5512345678" dan 5512345678.
+    Devuelve None si tiene menos de 10 dígitos.
+    """
+    digitos = numero if numero.isdigit() else _NO_DIGITOS.sub("", numero)
+    if len(digitos) < 10:
+        return None
+    return int(digitos[-10:])
+
+
+def nombre_operador(razon_social: Text) -> Text:
+    """
+    Nombre para mostrar a partir de la razón social del plan de numeración.
+
+    Se quita el sufijo societario y se resuelve contra el catálogo de
+    operadores, donde las razones sociales conocidas son alias (por ejemplo
+    "Radiomovil Dipsa" -> Telcel). Si no está en el catálogo se devuelve la
+    razón social limpia.
+    """
+    limpia = _SUFIJO_SOCIETARIO.sub("", razon_social.strip()).strip(" ,.")
+    return REGISTRY.resolver(limpia) or REGISTRY.resolver(razon_social) or limpia.title()
+
+
+class IndiceNumeracion:
+    """Rangos ordenados y disjuntos con búsqueda por bisect."""
+
+    __slots__ = ("_inicios", "_fines", "_operadores", "_nombres", "_mmap")
+
+    def __init__(self, inicios: Sequence[int], fines: Sequence[int],
+                 operadores: Sequence[int], nombres: Sequence[Text],
+                 mapa: Optional[mmap.mmap] = None) -> None:
+        self._inicios = inicios
+        self._fines = fines
+        self._operadores = operadores
+        self._nombres = tuple(nombres)
+        self._mmap = mapa
+
+    @classmethod
+    def vacio(cls) -> "IndiceNumeracion":
+        return cls((), (), (), ())
+
+    @classmethod
+    def desde_archivo(cls, ruta: Text = RUTA_INDICE) -> "IndiceNumeracion":
+        """
+        Abre el índice con mmap sin copiar los arreglos.
+
+        Raises:
+            OSError: Si el archivo no se puede abrir
+            ValueError: Si no es un índice de numeración válido
+        """
+        with open(ruta, "rb") as archivo:
+            mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, total, bytes_nombres = _CABECERA.unpack_from(mapa, 0)
+        if magic != _MAGIC or version != _VERSION:
+            mapa.close()
+            raise ValueError(f"{ruta} no es un índice de numeración versión {_VERSION}")
+
+        vista = memoryview(mapa)
+        inicio_fines = _CABECERA.size + 8 * total
+        inicio_ids = inicio_fines + 8 * total
+        inicio_nombres = _alinear(inicio_ids + 2 * total)
+
+        inicios = vista[_CABECERA.size:inicio_fines]
+        fines = vista[inicio_fines:inicio_ids]
+        operadores = vista[inicio_ids:inicio_ids + 2 * total]
+        if sys.byteorder == "little":
+            inicios, fines, operadores = inicios.cast("Q"), fines.cast("Q"), operadores.cast("H")
+        else:
+            inicios, fines, operadores = (
+                _arreglo("Q", inicios), _arreglo("Q", fines), _arreglo("H", operadores)
+            )
+
+        nombres = bytes(vista[inicio_nombres:inicio_nombres + bytes_nombres]).decode("utf-8").split("\n")
+        return cls(inicios, fines, operadores, nombres, mapa)
+
+    @classmethod
+    def cargar(cls, ruta: Text = RUTA_INDICE) -> "IndiceNumeracion":
+        """Abre el índice o devuelve uno vacío si no se ha generado."""
+        try:
+            indice = cls.desde_archivo(ruta)
+        except FileNotFoundError:
+            logger.info("Sin índice de numeración en %s; detección por número desactivada", ruta)
+            return cls.vacio()
+        except (OSError, ValueError, struct.error) as error:
+            logger.warning("No se pudo cargar el índice de numeración %s: %s", ruta, error)
+            return cls.vacio()
+
+        logger.info("Índice de numeración cargado: %d rangos, %d operadores", len(indice), len(indice.nombres))
+        return indice
+
+    def resolver(self, numero: Optional[Text]) -> Optional[Text]:
+        """
+        Operador asignado a un número.
+
+        Args:
+            numero: Número con o sin prefijos (+52, 1) ni separadores
+
+        Returns:
+            Nombre para mostrar del operador o None si el número no cae en
+            ningún rango
+        """
+        if not numero or not self._inicios:
+            return None
+        valor = normalizar_numero(numero)
+        if valor is None:
+            return None
+        posicion = bisect.bisect_right(self._inicios, valor) - 1
+        if posicion < 0 or valor > self._fines[posicion]:
+            return None
+        return self._nombres[self._operadores[posicion]]
+
+    @property
+    def nombres(self) -> Tuple[Text, ...]:
+        return self._nombres
+
+    def __len__(self) -> int:
+        return len(self._inicios)
+
+
+def _alinear(posicion: int) -> int:
+    return (posicion + 7) & ~7
+
+
+def _arreglo(tipo: Text, datos: memoryview) -> array.array:
+    arreglo = array.array(tipo, bytes(datos))
+    arreglo.byteswap()
+    return arreglo
+
+
+def compactar_rangos(rangos: Iterable[Rango]) -> List[Rango]:
+    """
+    Ordena los rangos y une los contiguos del mismo operador.
+
+    Raises:
+        ValueError: Si un rango está invertido o dos rangos se solapan
+    """
+    compactos: List[Rango] = []
+    for inicio, fin, nombre in sorted(rangos):
+        if fin < inicio:
+            raise ValueError(f"Rango invertido {inicio}-{fin} ({nombre})")
+        if compactos:
+            inicio_previo, fin_previo, nombre_previo = compactos[-1]
+            if inicio <= fin_previo:
+                raise ValueError(
+                    f"El rango {inicio}-{fin} ({nombre}) se solapa con "
+                    f"{inicio_previo}-{fin_previo} ({nombre_previo})"
+                )
+            if inicio == fin_previo + 1 and nombre == nombre_previo:
+                compactos[-1] = (inicio_previo, fin, nombre)
+                continue
+        compactos.append((inicio, fin, nombre))
+    return compactos
+
+
+def escribir_indice(rangos: Iterable[Rango], ruta: Text = RUTA_INDICE) -> int:
+    """
+    Escribe el índice binario de manera atómica.
+
+    Returns:
+        Número de rangos escritos después de compactar
+    """
+    compactos = compactar_rangos(rangos)
+
+    nombres: List[Text] = []
+    ids = {}
+    inicios, fines, operadores = array.array("Q"), array.array("Q"), array.array("H")
+    for inicio, fin, nombre in compactos:
+        if nombre not in ids:
+            ids[nombre] = len(nombres)
+            nombres.append(nombre)
+        inicios.append(inicio)
+        fines.append(fin)
+        operadores.append(ids[nombre])
+
+    if sys.byteorder != "little":
+        for arreglo in (inicios, fines, operadores):
+            arreglo.byteswap()
+
+    datos_nombres = "\n".join(nombres).encode("utf-8")
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(_CABECERA.pack(_MAGIC, _VERSION, 0, len(compactos), len(datos_nombres)))
+        archivo.write(inicios.tobytes())
+        archivo.write(fines.tobytes())
+        archivo.write(operadores.tobytes())
+        archivo.write(b"\0" * (_alinear(archivo.tell()) - archivo.tell()))
+        archivo.write(datos_nombres)
+    os.replace(temporal, ruta)
+    return len(compactos)
+
+
+def leer_plan_numeracion(archivo: Iterable[Text]) -> Iterable[Rango]:
+    """
+    Lee rangos de un CSV del plan de numeración.
+
+    Acepta el formato público del IFT (NIR, SERIE, NUMERACION_INICIAL,
+    NUMERACION_FINAL, RAZON_SOCIAL) o un CSV simple con columnas
+    inicio, fin y operador.
+
+    Raises:
+        ValueError: Si faltan columnas o un rango no tiene 10 dígitos
+    """
+    lector = csv.DictReader(archivo)
+    columnas = {c.strip().upper(): c for c in lector.fieldnames or ()}
+    nombres_vistos = {}
+
+    def operador(razon: Text) -> Text:
+        nombre = nombres_vistos.get(razon)
+        if nombre is None:
+            nombre = nombres_vistos[razon] = nombre_operador(razon)
+        return nombre
+
+    if {"NIR", "SERIE", "NUMERACION_INICIAL", "NUMERACION_FINAL", "RAZON_SOCIAL"} <= columnas.keys():
+        nir, serie = columnas["NIR"], columnas["SERIE"]
+        inicial, final = columnas["NUMERACION_INICIAL"], columnas["NUMERACION_FINAL"]
+        razon = columnas["RAZON_SOCIAL"]
+        for fila in lector:
+            prefijo = fila[nir].strip() + fila[serie].strip()
+            inicio = prefijo + fila[inicial].strip().zfill(4)
+            fin = prefijo + fila[final].strip().zfill(4)
+            if len(inicio) != 10 or len(fin) != 10:
+                raise ValueError(f"Rango con longitud distinta de 10 dígitos: {inicio}-{fin}")
+            yield int(inicio), int(fin), operador(fila[razon])
+    elif {"INICIO", "FIN", "OPERADOR"} <= columnas.keys():
+        inicio, fin, razon = columnas["INICIO"], columnas["FIN"], columnas["OPERADOR"]
+        for fila in lector:
+            yield int(fila[inicio]), int(fila[fin]), operador(fila[razon])
+    else:
+        raise ValueError(
+            "Columnas no reconocidas; se esperan las del plan de numeración del IFT "
+            "o inicio,fin,operador"
+        )
+
+
+NUMERACION = IndiceNumeracion.cargar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera el índice de numeración desde el CSV del plan")
+    parser.add_argument("plan", help="CSV del plan de numeración")
+    parser.add_argument("--salida", default=RUTA_INDICE, help="Archivo del índice")
+    parser.add_argument("--codificacion", default="utf-8-sig", help="Codificación del CSV (el IFT usa latin-1)")
+    args = parser.parse_args()
+
+    with open(args.plan, encoding=args.codificacion, newline="") as plan:
+        total = escribir_indice(leer_plan_numeracion(plan), args.salida)
+
+    indice = IndiceNumeracion.desde_archivo(args.salida)
+    print(f"Índice de numeración escrito en {args.salida}: {total} rangos, {len(indice.nombres)} operadores")
+    for nombre in indice.nombres:
+        if nombre not in REGISTRY:
+            print(f"   ⚠️ '{nombre}' no está en config/operadores.yml; añádelo como alias para personalizar el saludo")
@@ -0,0 +1,227 @@
+"""
+Catálogo de operadores (OperatorRegistry).
+
+Un solo registro por operador, cargado una vez al arrancar desde
+`config/operadores.yml`. Todos los alias se normalizan al construir el índice,
+así que resolver cualquier variante a su nombre para mostrar es una sola
+búsqueda en un diccionario.
+
+El índice ya normalizado se guarda además en una forma compacta (marshal)
+junto al catálogo, para que el servidor de acciones lo cargue sin parsear
+YAML ni construir diccionarios literales al importar. Esa forma compacta se
+escribe solo al construir la imagen (`python -m actions.operadores`); en
+tiempo de ejecución el módulo nunca escribe en el árbol de código.
+"""
+
+import hashlib
+import logging
+import marshal
+import os
+import unicodedata
+from typing import Any, Dict, Iterable, Optional, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DIRECTORIO_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config')
+
+RUTA_CATALOGO = os.path.join(_DIRECTORIO_CONFIG, 'operadores.yml')
+RUTA_COMPACTA = os.path.join(_DIRECTORIO_CONFIG, 'operadores.marshal')
+
+# Se incrementa si cambia la normalización o la estructura del archivo compacto
+_VERSION_COMPACTA = 2
+
+
+def normalizar_clave(texto: Text) -> Text:
+    """
+    Normaliza un nombre de operador para usarlo como clave del índice.
+
+    Args:
+        texto: Nombre o alias tal como lo escribe Node-RED o el usuario
+
+    Returns:
+        Clave sin acentos, en minúsculas, con "&" como " and " y un solo
+        espacio entre palabras. Ejemplo: "AT & T" -> "at and t"
+    """
+    if not texto.isascii():
+        texto = ''.join(
+            c for c in unicodedata.normalize('NFKD', texto)
+            if not unicodedata.combining(c)
+        )
+    return ' '.join(texto.casefold().replace('&', ' and ').split())
+
+
+def _huella_archivo(ruta: Text) -> Text:
+    with open(ruta, 'rb') as archivo:
+        return hashlib.sha1(archivo.read()).hexdigest()
+
+
+class OperatorRegistry:
+    """Índice de alias normalizados -> nombre para mostrar del operador."""
+
+    __slots__ = ('_indice', '_nombres', '_exactos', '_directos', 'huella')
+
+    def __init__(self, indice: Dict[Text, Text], nombres: Tuple[Text, ...], huella: Text = '',
+                 directos: Tuple[Text, ...] = ()) -> None:
+        self._indice = indice
+        self._nombres = nombres
+        self._exactos = frozenset(nombres)
+        self._directos = frozenset(directos)
+        self.huella = huella
+
+    @classmethod
+    def desde_catalogo(cls, operadores: Iterable[Dict[Text, Any]], huella: Text = '') -> 'OperatorRegistry':
+        """
+        Construye el índice a partir de las entradas del catálogo.
+
+        Args:
+            operadores: Entradas con `nombre` y opcionalmente `alias` y
+                `nombre_directo`
+            huella: Identificador de la versión del catálogo de origen
+
+        Returns:
+            Registro listo para consultas
+
+        Raises:
+            ValueError: Si un alias normalizado apunta a dos operadores
+        """
+        indice: Dict[Text, Text] = {}
+        nombres = []
+        directos = []
+
+        for entrada in operadores:
+            nombre = entrada['nombre']
+            nombres.append(nombre)
+            if entrada.get('nombre_directo'):
+                directos.append(nombre)
+            for alias in (nombre, *entrada.get('alias', ())):
+                clave = normalizar_clave(str(alias))
+                existente = indice.setdefault(clave, nombre)
+                if existente != nombre:
+                    raise ValueError(
+                        f"El alias '{alias}' de '{nombre}' ya pertenece a '{existente}'"
+                    )
+
+        return cls(indice, tuple(nombres), huella, tuple(directos))
+
+    @classmethod
+    def desde_yaml(cls, ruta: Text = RUTA_CATALOGO) -> 'OperatorRegistry':
+        """Construye el registro leyendo el catálogo YAML."""
+        import yaml
+
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+
+        datos = yaml.safe_load(contenido) or {}
+        return cls.desde_catalogo(datos.get('operadores', []), hashlib.sha1(contenido).hexdigest())
+
+    @classmethod
+    def desde_compacto(cls, ruta: Text = RUTA_COMPACTA) -> 'OperatorRegistry':
+        """Carga el registro desde su forma compacta."""
+        with open(ruta, 'rb') as archivo:
+            version, huella, nombres, indice, directos = marshal.load(archivo)
+
+        if version != _VERSION_COMPACTA:
+            raise ValueError(f"Versión de índice compacto no soportada: {version}")
+
+        return cls(indice, nombres, huella, directos)
+
+    def guardar_compacto(self, ruta: Text = RUTA_COMPACTA) -> None:
+        """Escribe la forma compacta de manera atómica."""
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'wb') as archivo:
+            marshal.dump((_VERSION_COMPACTA, self.huella, self._nombres, self._indice, self.directos), archivo)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta_catalogo: Text = RUTA_CATALOGO,
+               ruta_compacta: Text = RUTA_COMPACTA) -> 'OperatorRegistry':
+        """
+        Carga el registro usando la forma compacta si corresponde al catálogo.
+
+        Si la forma compacta no existe o es de otra versión del catálogo, se
+        construye desde el YAML sin escribir nada: la forma compacta solo se
+        genera al construir la imagen (`python -m actions.operadores`), así
+        el arranque funciona en contenedores de solo lectura y con workers
+        pre-forkeados.
+        """
+        huella = _huella_archivo(ruta_catalogo)
+
+        try:
+            registro = cls.desde_compacto(ruta_compacta)
+            if registro.huella == huella:
+                return registro
+            logger.info("Índice compacto de operadores desactualizado; se usa %s "
+                        "(regenerar con `python -m actions.operadores`)", ruta_catalogo)
+        except FileNotFoundError:
+            logger.info("Sin índice compacto de operadores en %s; se usa %s",
+                        ruta_compacta, ruta_catalogo)
+        except (OSError, EOFError, ValueError, TypeError) as error:
+            logger.warning("No se pudo cargar el índice compacto de operadores %s: %s",
+                           ruta_compacta, error)
+
+        return cls.desde_yaml(ruta_catalogo)
+
+    def resolver(self, texto: Optional[Text]) -> Optional[Text]:
+        """
+        Resuelve un alias a su nombre para mostrar.
+
+        Args:
+            texto: Nombre o alias en cualquier combinación de mayúsculas,
+                acentos o espacios
+
+        Returns:
+            Nombre para mostrar del operador o None si no está en el catálogo
+        """
+        if not texto:
+            return None
+        return self._indice.get(normalizar_clave(texto))
+
+    def resolver_directo(self, texto: Optional[Text]) -> Optional[Text]:
+        """
+        Como `resolver`, pero solo para los operadores con `nombre_directo`.
+
+        El resto del catálogo incluye palabras comunes ("Valor", "Rosa",
+        "Marketing") que escritas solas no son necesariamente un operador.
+        """
+        nombre = self.resolver(texto)
+        return nombre if nombre in self._directos else None
+
+    def resolver_exacto(self, texto: Optional[Text]) -> Optional[Text]:
+        """
+        Nombre para mostrar escrito tal cual (mayúsculas y acentos incluidos),
+        como lo manda Node-RED desde la base de datos; si no, `resolver_directo`.
+        """
+        if not texto:
+            return None
+        nombre = texto.strip()
+        return nombre if nombre in self._exactos else self.resolver_directo(nombre)
+
+    @property
+    def nombres(self) -> Tuple[Text, ...]:
+        """Nombres para mostrar de todos los operadores, en orden del catálogo."""
+        return self._nombres
+
+    @property
+    def directos(self) -> Tuple[Text, ...]:
+        """Operadores con `nombre_directo`, en orden del catálogo."""
+        return tuple(nombre for nombre in self._nombres if nombre in self._directos)
+
+    def alias(self) -> Iterable[Tuple[Text, Text]]:
+        """Pares (clave normalizada, nombre para mostrar) del índice."""
+        return self._indice.items()
+
+    def __contains__(self, texto: Text) -> bool:
+        return self.resolver(texto) is not None
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+
+REGISTRY = OperatorRegistry.cargar()
+
+
+if __name__ == '__main__':
+    registro = OperatorRegistry.desde_yaml()
+    registro.guardar_compacto()
+    print(f"Índice compacto escrito en {RUTA_COMPACTA}: "
+          f"{len(registro.nombres)} operadores, {len(registro)} alias")
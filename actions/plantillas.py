@@ -0,0 +1,406 @@
+"""
+Plantillas de mensajes pre-renderizadas.
+
+El contenido (menús, textos, saludos por operador con sus precios) vive en
+`contenido/campanas.yml`. Los menús estáticos y los saludos de cada operador
+se renderizan una sola vez al cargar el archivo. Las plantillas que dependen de la compañía del usuario
+(saludo genérico y portabilidad) se renderizan bajo demanda y se guardan en
+una caché LRU acotada por (plantilla, compañía), así que en el camino de una
+acción solo queda una búsqueda en diccionario.
+
+Cada menú tiene además una versión para canales con botones (ver
+actions/respuestas.py): la intro sin las opciones numeradas ni el cierre, y
+los títulos de las opciones, también renderizada al cargar.
+
+`PLANTILLAS` se recarga en caliente cuando cambia el archivo: la versión
+nueva se pre-renderiza completa y se activa con un solo cambio de referencia.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Text, Tuple
+
+from actions.operadores import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Mapear números a emojis
+_EMOJI_OPCIONES = {
+    1: "1️⃣", 2: "2️⃣", 3: "3️⃣", 4: "4️⃣", 5: "5️⃣",
+    6: "6️⃣", 7: "7️⃣", 8: "8️⃣", 9: "9️⃣", 10: "🔟"
+}
+
+CAPACIDAD_CACHE = int(os.environ.get("BOTMOBILE_CACHE_PLANTILLAS", "1024"))
+
+
+def format_as_button_option(number: int, text: str) -> str:
+    """
+    Formatea un texto como opción de botón con identificadores.
+
+    Args:
+        number: Número de la opción (1, 2, 3, etc.)
+        text: Texto de la opción
+
+    Returns:
+        Texto formateado como: "1️⃣ Texto de la opción."
+    """
+    emoji = _EMOJI_OPCIONES.get(number, f"{number}️⃣")
+
+    # Asegurar que termine con punto
+    if not text.endswith('.'):
+        text += '.'
+
+    return f"{emoji} {text}"
+
+
+def format_message_with_options(intro_text: str, options: List[str]) -> str:
+    """
+    Formatea un mensaje con texto introductorio y opciones numeradas.
+
+    Args:
+        intro_text: Texto introductorio (mensaje simple)
+        options: Lista de opciones que serán formateadas como botones
+
+    Returns:
+        Mensaje completo formateado
+    """
+    formatted_options = []
+    for i, option in enumerate(options, 1):
+        formatted_options.append(format_as_button_option(i, option))
+
+    return f"{intro_text}\n\n" + "\n".join(formatted_options)
+
+
+RUTA_CONTENIDO = os.environ.get(
+    "BOTMOBILE_CONTENIDO",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "contenido", "campanas.yml"),
+)
+
+# Menú con opciones numeradas: (intro, opciones, cierre)
+Menu = Tuple[Text, Tuple[Text, ...], Text]
+
+# Menú para canales con botones: (texto, títulos de las opciones); los textos
+# sin opciones tienen títulos vacíos
+MenuBotones = Tuple[Text, Tuple[Text, ...]]
+
+
+def _menus_de_contenido(menus: Mapping[Text, Mapping[Text, Any]],
+                        opciones_principal: Tuple[Text, ...], cierre_menu: Text) -> Dict[Text, Menu]:
+    resultado = {}
+    for clave, menu in menus.items():
+        opciones = menu.get("opciones", ())
+        if opciones == "menu_principal":
+            opciones = opciones_principal
+        elif not isinstance(opciones, (list, tuple)):
+            raise ValueError(f"Menú '{clave}': opciones debe ser una lista o 'menu_principal'")
+        resultado[clave] = (
+            str(menu["intro"]),
+            tuple(str(opcion) for opcion in opciones),
+            cierre_menu if menu.get("cierre_menu") else "",
+        )
+    return resultado
+
+
+class Plantillas:
+    """Mensajes renderizados una vez más una caché LRU para los dinámicos."""
+
+    def __init__(self,
+                 menus: Mapping[Text, Menu],
+                 textos: Mapping[Text, Text],
+                 saludos: Mapping[Text, Text],
+                 dinamicas: Mapping[Text, Menu],
+                 opciones_principal: Tuple[Text, ...] = (),
+                 cierre_menu: Text = "",
+                 operadores: Iterable[Text] = (),
+                 capacidad: int = CAPACIDAD_CACHE,
+                 version: Any = None) -> None:
+        self.version = version
+        self._estaticos: Dict[Text, Text] = dict(textos)
+        for clave, (intro, opciones, cierre) in menus.items():
+            self._estaticos[clave] = format_message_with_options(intro, list(opciones)) + cierre
+
+        self._saludos: Dict[Text, Text] = {
+            compania: format_message_with_options(intro, list(opciones_principal)) + cierre_menu
+            for compania, intro in saludos.items()
+        }
+
+        # Intro y opciones ya formateadas; solo falta sustituir {compania}
+        self._dinamicas: Dict[Text, Text] = {
+            clave: format_message_with_options(intro, list(opciones)) + cierre
+            for clave, (intro, opciones, cierre) in dinamicas.items()
+        }
+
+        self._estaticos_botones: Dict[Text, MenuBotones] = {clave: (texto, ()) for clave, texto in textos.items()}
+        self._estaticos_botones.update(
+            (clave, (intro, tuple(opciones))) for clave, (intro, opciones, _) in menus.items()
+        )
+        self._saludos_botones: Dict[Text, MenuBotones] = {
+            compania: (intro, tuple(opciones_principal)) for compania, intro in saludos.items()
+        }
+        self._dinamicas_botones: Dict[Text, MenuBotones] = {
+            clave: (intro, tuple(opciones)) for clave, (intro, opciones, _) in dinamicas.items()
+        }
+
+        # Los operadores del catálogo sin saludo propio también se pre-renderizan;
+        # la caché solo recibe compañías que no están en el catálogo
+        for compania in operadores:
+            if compania not in self._saludos:
+                self._saludos[compania] = self._renderizar_sin_cache("saludo_compania", compania)
+                self._saludos_botones[compania] = self._botones_sin_cache("saludo_compania", compania)
+
+        self._renderizar = functools.lru_cache(maxsize=capacidad)(self._renderizar_sin_cache)
+        self._renderizar_botones = functools.lru_cache(maxsize=capacidad)(self._botones_sin_cache)
+
+    @classmethod
+    def desde_contenido(cls, datos: Mapping[Text, Any], operadores: Iterable[Text] = (),
+                        capacidad: int = CAPACIDAD_CACHE) -> 'Plantillas':
+        """
+        Construye y pre-renderiza las plantillas del archivo de contenido.
+
+        Raises:
+            ValueError: Si falta una sección o un menú está mal formado
+        """
+        try:
+            principal = datos["menu_principal"]
+            opciones_principal = tuple(str(opcion) for opcion in principal["opciones"])
+            cierre_menu = "\n\n" + str(principal["cierre"]) if principal.get("cierre") else ""
+            return cls(
+                menus=_menus_de_contenido(datos.get("menus") or {}, opciones_principal, cierre_menu),
+                textos={clave: str(texto) for clave, texto in (datos.get("textos") or {}).items()},
+                saludos={compania: str(intro) for compania, intro in (datos.get("saludos_operador") or {}).items()},
+                dinamicas=_menus_de_contenido(datos["dinamicas"], opciones_principal, cierre_menu),
+                opciones_principal=opciones_principal,
+                cierre_menu=cierre_menu,
+                operadores=operadores,
+                capacidad=capacidad,
+                version=datos.get("version"),
+            )
+        except (KeyError, TypeError) as error:
+            raise ValueError(f"Contenido inválido: falta o sobra {error}") from error
+
+    @classmethod
+    def desde_yaml(cls, ruta: Text = RUTA_CONTENIDO, operadores: Iterable[Text] = ()) -> 'Plantillas':
+        """Lee el archivo de contenido y pre-renderiza todo."""
+        import yaml
+
+        with open(ruta, encoding="utf-8") as archivo:
+            datos = yaml.safe_load(archivo)
+        if not isinstance(datos, dict):
+            raise ValueError(f"{ruta} no contiene un mapa de contenido")
+        return cls.desde_contenido(datos, operadores)
+
+    def _renderizar_sin_cache(self, plantilla: Text, compania: Text) -> Text:
+        return self._dinamicas[plantilla].replace("{compania}", compania)
+
+    def _botones_sin_cache(self, plantilla: Text, compania: Text) -> MenuBotones:
+        intro, opciones = self._dinamicas_botones[plantilla]
+        return (intro.replace("{compania}", compania),
+                tuple(opcion.replace("{compania}", compania) for opcion in opciones))
+
+    def texto(self, clave: Text) -> Text:
+        """Devuelve un mensaje estático ya renderizado."""
+        return self._estaticos[clave]
+
+    def dinamica(self, plantilla: Text, compania: Text) -> Text:
+        """Renderiza una plantilla dinámica usando la caché (plantilla, compañía)."""
+        return self._renderizar(plantilla, compania)
+
+    def saludo_operador(self, compania: Text) -> Text:
+        """
+        Saludo con menú para la compañía del usuario.
+
+        Los operadores con saludo propio están pre-renderizados; el resto usa
+        la plantilla genérica con {compania}.
+        """
+        saludo = self._saludos.get(compania)
+        if saludo is None:
+            saludo = self._renderizar("saludo_compania", compania)
+        return saludo
+
+    def personalizada(self, clave: Text, compania: Optional[Text] = None) -> Text:
+        """
+        Mensaje estático o, si se conoce la compañía y existe la plantilla
+        `<clave>_compania`, su versión personalizada.
+        """
+        plantilla = f"{clave}_compania"
+        if compania and plantilla in self._dinamicas:
+            return self._renderizar(plantilla, compania)
+        return self._estaticos[clave]
+
+    def portabilidad(self, compania: Optional[Text] = None) -> Text:
+        """Menú de portabilidad, personalizado si se conoce la compañía."""
+        return self.personalizada("portabilidad", compania)
+
+    def texto_botones(self, clave: Text) -> MenuBotones:
+        """Versión con botones de un mensaje estático."""
+        return self._estaticos_botones[clave]
+
+    def saludo_botones(self, compania: Text) -> MenuBotones:
+        """Versión con botones de `saludo_operador`."""
+        saludo = self._saludos_botones.get(compania)
+        if saludo is None:
+            saludo = self._renderizar_botones("saludo_compania", compania)
+        return saludo
+
+    def personalizada_botones(self, clave: Text, compania: Optional[Text] = None) -> MenuBotones:
+        """Versión con botones de `personalizada`."""
+        plantilla = f"{clave}_compania"
+        if compania and plantilla in self._dinamicas_botones:
+            return self._renderizar_botones(plantilla, compania)
+        return self._estaticos_botones[clave]
+
+    def __contains__(self, clave: Text) -> bool:
+        return clave in self._estaticos
+
+    def estadisticas(self) -> Dict[Text, Any]:
+        """Contadores de las cachés de plantillas dinámicas (texto y botones), sumados."""
+        texto = self._renderizar.cache_info()
+        botones = self._renderizar_botones.cache_info()
+        return {
+            "aciertos": texto.hits + botones.hits,
+            "fallos": texto.misses + botones.misses,
+            "entradas": texto.currsize + botones.currsize,
+            "capacidad": (texto.maxsize or 0) + (botones.maxsize or 0),
+            "pre_renderizados": len(self._estaticos) + len(self._saludos),
+        }
+
+
+class PlantillasRecargables:
+    """
+    Contenido activo con recarga en caliente.
+
+    Guarda una instantánea `Plantillas` inmutable. `recargar` construye y
+    pre-renderiza la nueva por completo (y pasa los validadores) antes de
+    reemplazar la referencia, una sola asignación; cada llamada lee la
+    referencia una vez, así que una petición nunca mezcla dos versiones.
+
+    Cada instantánea trae cachés nuevas; los aciertos y fallos de las que se
+    retiran se acumulan para que `estadisticas` siga siendo monotónica.
+    """
+
+    def __init__(self, ruta: Text = RUTA_CONTENIDO, operadores: Iterable[Text] = ()) -> None:
+        self.ruta = ruta
+        self._operadores = tuple(operadores)
+        self.validadores: List[Callable[[Plantillas], None]] = []
+        self.recargas = 0
+        self.errores_recarga = 0
+        # Aciertos y fallos de caché de las instantáneas ya reemplazadas
+        self._aciertos_retirados = 0
+        self._fallos_retirados = 0
+        self._firma = self._firma_archivo()
+        self._actual = Plantillas.desde_yaml(ruta, self._operadores)
+
+    def _firma_archivo(self) -> Optional[Tuple[int, int]]:
+        try:
+            estado = os.stat(self.ruta)
+        except OSError:
+            return None
+        return estado.st_mtime_ns, estado.st_size
+
+    @property
+    def actual(self) -> Plantillas:
+        return self._actual
+
+    @property
+    def version(self) -> Any:
+        return self._actual.version
+
+    def cambio(self) -> bool:
+        """Si el archivo cambió (mtime o tamaño) desde la última carga."""
+        firma = self._firma_archivo()
+        return firma is not None and firma != self._firma
+
+    def recargar(self) -> bool:
+        """
+        Carga el archivo y, si es válido, lo activa. Bloqueante: desde el
+        event loop se llama en un executor (ver `vigilar`).
+
+        Returns:
+            True si se activó una versión nueva; con errores se conserva la
+            anterior y se devuelve False
+        """
+        firma = self._firma_archivo()
+        try:
+            nuevas = Plantillas.desde_yaml(self.ruta, self._operadores)
+            for validar in self.validadores:
+                validar(nuevas)
+        except (OSError, ValueError) as error:
+            # Se guarda la firma para no reintentar el mismo archivo roto en cada ciclo
+            self._firma = firma
+            self.errores_recarga += 1
+            logger.error("Contenido de %s descartado, sigue activa la versión %s: %s",
+                         self.ruta, self.version, error)
+            return False
+
+        retirada = self._actual
+        anterior, self._actual, self._firma = self.version, nuevas, firma
+        retiradas = retirada.estadisticas()
+        self._aciertos_retirados += retiradas["aciertos"]
+        self._fallos_retirados += retiradas["fallos"]
+        self.recargas += 1
+        logger.info("Contenido recargado: versión %s -> %s", anterior, nuevas.version,
+                    extra={"version_anterior": anterior, "version": nuevas.version})
+        return True
+
+    async def vigilar(self, intervalo: float = 5.0,
+                      al_recargar: Optional[Callable[[bool], None]] = None) -> None:
+        """
+        Revisa el mtime cada `intervalo` segundos y recarga fuera del loop.
+
+        Args:
+            intervalo: Segundos entre revisiones
+            al_recargar: Se llama con el resultado de cada recarga intentada
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(intervalo)
+            if self.cambio():
+                activada = await loop.run_in_executor(None, self.recargar)
+                if al_recargar is not None:
+                    al_recargar(activada)
+
+    # Misma interfaz que Plantillas, sobre la instantánea activa
+
+    def texto(self, clave: Text) -> Text:
+        return self._actual.texto(clave)
+
+    def dinamica(self, plantilla: Text, compania: Text) -> Text:
+        return self._actual.dinamica(plantilla, compania)
+
+    def saludo_operador(self, compania: Text) -> Text:
+        return self._actual.saludo_operador(compania)
+
+    def personalizada(self, clave: Text, compania: Optional[Text] = None) -> Text:
+        return self._actual.personalizada(clave, compania)
+
+    def portabilidad(self, compania: Optional[Text] = None) -> Text:
+        return self._actual.portabilidad(compania)
+
+    def texto_botones(self, clave: Text) -> MenuBotones:
+        return self._actual.texto_botones(clave)
+
+    def saludo_botones(self, compania: Text) -> MenuBotones:
+        return self._actual.saludo_botones(compania)
+
+    def personalizada_botones(self, clave: Text, compania: Optional[Text] = None) -> MenuBotones:
+        return self._actual.personalizada_botones(clave, compania)
+
+    def __contains__(self, clave: Text) -> bool:
+        return clave in self._actual
+
+    def estadisticas(self) -> Dict[Text, Any]:
+        """Estadísticas de la instantánea activa con aciertos y fallos acumulados desde el arranque."""
+        actuales = self._actual.estadisticas()
+        return {
+            **actuales,
+            "aciertos": self._aciertos_retirados + actuales["aciertos"],
+            "fallos": self._fallos_retirados + actuales["fallos"],
+            "version": self.version,
+            "recargas": self.recargas,
+            "errores_recarga": self.errores_recarga,
+        }
+
+
+PLANTILLAS = PlantillasRecargables(operadores=REGISTRY.nombres)
@@ -0,0 +1,59 @@
+"""
+Payloads de los botones del menú.
+
+Cada botón manda de vuelta un payload con la sintaxis de intención de Rasa:
+
+    /elegir_opcion{"numero_opcion":"2","menu":"paquetes"}
+
+Solo depende del grafo de `config/menu.yml` (el estado en que se mostró el
+botón y el número de la opción), no del título ni de la versión del
+contenido, así que un botón enviado antes de una recarga sigue valiendo.
+`NLURapida` lo reconoce y el mensaje no pasa por el resto del pipeline; sin
+el atajo lo interpreta el `RegexMessageHandler` de Rasa con el mismo
+resultado. `ActionElegirOpcion` resuelve la opción en el estado de la
+entidad `menu` y no en el slot `estado_menu`: tocar un botón de un mensaje
+anterior lleva a donde dice el botón.
+
+Telegram acepta hasta 64 bytes de `callback_data`, que es donde su conector
+pone el payload; por eso los nombres son cortos y el menú rechaza estados
+cuyo payload no quepa (`MAX_BYTES_POSTBACK`).
+
+Este módulo no importa nada de Rasa ni del contenido; lo usan tanto el
+servidor de acciones como el pipeline de NLU.
+"""
+
+import json
+import re
+from typing import Match, Optional, Text
+
+INTENCION_POSTBACK = "elegir_opcion"
+ENTIDAD_OPCION = "numero_opcion"
+ENTIDAD_ORIGEN = "menu"
+
+MAX_BYTES_POSTBACK = 64
+
+# Exactamente lo que genera `crear_postback`
+_PATRON_POSTBACK = re.compile(
+    rf'\s*/{INTENCION_POSTBACK}\{{"{ENTIDAD_OPCION}":"(?P<opcion>[0-9]+)",'
+    rf'"{ENTIDAD_ORIGEN}":"(?P<estado>\w+)"\}}\s*',
+    re.ASCII,
+)
+
+
+def crear_postback(estado: Text, opcion: Text) -> Text:
+    """Payload del botón de la opción `opcion` mostrado en el estado `estado`."""
+    entidades = json.dumps({ENTIDAD_OPCION: opcion, ENTIDAD_ORIGEN: estado}, separators=(",", ":"))
+    return f"/{INTENCION_POSTBACK}{entidades}"
+
+
+def leer_postback(texto: Optional[Text]) -> Optional[Match]:
+    """
+    Reconoce un payload de botón.
+
+    Returns:
+        Match con los grupos `opcion` y `estado` (sus spans son los de las
+        entidades), o None si el texto no es un postback del menú
+    """
+    if not texto:
+        return None
+    return _PATRON_POSTBACK.fullmatch(texto)
@@ -0,0 +1,106 @@
+"""
+Menús como botones nativos del canal o como texto numerado.
+
+En los canales que muestran botones (`BOTMOBILE_CANALES_BOTONES`, por
+defecto los conectores de Rasa que los traducen a su formato: teclado
+inline de Telegram, quick replies de Messenger y Socket.IO, bloques de
+Slack...) un menú se manda como la intro más `buttons`, y cada botón trae
+el payload estable de su opción (actions/postback.py): tocarlo no pasa por
+el modelo de NLU ni depende de que el usuario escriba bien el número. El
+resto de canales, incluido `rest` de Node-RED mientras su flujo no traduzca
+`buttons`, recibe el texto con opciones numeradas de siempre.
+
+Títulos por plantilla y payloads por estado ya vienen renderizados; la lista
+de botones de cada (estado, títulos) se arma una vez y se reutiliza.
+
+`medir_respuesta` registra los bytes que cada turno manda al canal (textos,
+URLs de imagen, títulos y payloads de botones) por acción y formato en
+`botmobile_respuesta_bytes`. El `_count` del histograma son los turnos, así
+que la tasa de fallback por formato es
+
+    sum by (formato) (rate(botmobile_respuesta_bytes_count{accion="action_default_fallback"}[1h]))
+      / sum by (formato) (rate(botmobile_respuesta_bytes_count[1h]))
+
+Los turnos del calentamiento (dentro de `sin_registro()`) no se cuentan, así
+que un servidor recién arrancado sin tráfico no tiene observaciones.
+"""
+
+import functools
+import os
+from typing import Any, Callable, Dict, Iterable, Text, Tuple
+
+from actions.menu import MENU
+from actions.metricas import METRICAS, registrando
+from actions.plantillas import MenuBotones
+
+BOTONES = "botones"
+TEXTO = "texto"
+
+CANALES_CON_BOTONES = frozenset(
+    canal.strip()
+    for canal in os.environ.get(
+        "BOTMOBILE_CANALES_BOTONES", "telegram,facebook,socketio,slack,botframework"
+    ).split(",")
+    if canal.strip()
+)
+
+# Un dígito escrito ronda los 10 bytes; un menú completo con intro, 1-2 KB
+BUCKETS_BYTES = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+BYTES_RESPUESTA = METRICAS.histograma(
+    "botmobile_respuesta_bytes",
+    "Bytes de la respuesta de cada turno (textos, imágenes y botones) por acción y formato",
+    ("accion", "formato"),
+    buckets=BUCKETS_BYTES,
+)
+
+
+def formato(tracker) -> Text:
+    """`BOTONES` si el último mensaje del usuario llegó por un canal con botones."""
+    return BOTONES if tracker.get_latest_input_channel() in CANALES_CON_BOTONES else TEXTO
+
+
+@functools.lru_cache(maxsize=256)
+def botones(estado: Text, titulos: Tuple[Text, ...]) -> Tuple[Dict[Text, Text], ...]:
+    """Botones de un menú mostrado en `estado`, con el payload de cada opción."""
+    resultado = []
+    for numero, titulo in enumerate(titulos, 1):
+        payload = MENU.postback(estado, str(numero))
+        # El contenido se valida contra el menú al cargar; por si acaso, una
+        # opción sin destino no se ofrece como botón
+        if payload is not None:
+            resultado.append({"title": titulo, "payload": payload})
+    return tuple(resultado)
+
+
+def enviar_menu(dispatcher, estado: Text, menu: MenuBotones) -> None:
+    """Manda la versión con botones de un menú; sin títulos, solo el texto."""
+    texto, titulos = menu
+    if titulos:
+        dispatcher.utter_message(text=texto, buttons=list(botones(estado, titulos)))
+    else:
+        dispatcher.utter_message(text=texto)
+
+
+def bytes_mensajes(mensajes: Iterable[Dict[Text, Any]]) -> int:
+    """Bytes en UTF-8 del contenido de los mensajes del dispatcher, payloads incluidos."""
+    total = 0
+    for mensaje in mensajes:
+        total += len((mensaje.get("text") or "").encode("utf-8"))
+        total += len((mensaje.get("image") or "").encode("utf-8"))
+        for boton in mensaje.get("buttons") or ():
+            total += len(boton.get("title", "").encode("utf-8")) + len(boton.get("payload", "").encode("utf-8"))
+    return total
+
+
+def medir_respuesta(run: Callable) -> Callable:
+    """Decorador para el `run` asíncrono de una acción: bytes del turno por formato."""
+    @functools.wraps(run)
+    async def envoltura(self, dispatcher, tracker, domain):
+        eventos = await run(self, dispatcher, tracker, domain)
+        if registrando():
+            BYTES_RESPUESTA.observar(bytes_mensajes(dispatcher.messages), self.name(), formato(tracker))
+        return eventos
+
+    return envoltura
+
@@ -0,0 +1,7 @@
+"""
+Benchmarks offline de BotMobile.
+
+Cada módulo se ejecuta con `python -m benchmarks.<modulo>` desde la raíz del
+repositorio, guarda sus resultados en JSON y puede compararlos contra una
+línea base anterior.
+"""
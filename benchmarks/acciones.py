@@ -0,0 +1,172 @@
+"""
+Benchmark de las acciones personalizadas.
+
+Ejecuta cada acción con los mocks de `verificacion_final.py` sobre corpus
+sintéticos y mide throughput y percentiles de latencia por (acción, corpus).
+Los corpus cubren todos los operadores del catálogo en cada formato de
+Node-RED, dígitos de menú, texto libre largo y basura.
+
+Uso:
+    python -m benchmarks.acciones
+    python -m benchmarks.acciones --salida benchmarks/resultados/base.json
+    python -m benchmarks.acciones --baseline benchmarks/resultados/base.json --umbral 0.2
+
+Con --baseline el proceso termina con código 1 si algún caso empeora más que
+el umbral (p50, p95 o throughput), para poder usarlo como paso de CI.
+"""
+
+import argparse
+import asyncio
+import random
+import string
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Text, Tuple
+
+from actions.actions import (
+    ActionDefaultFallback,
+    ActionElegirOpcion,
+    ActionFinalizarConversacion,
+    ActionSessionStart,
+)
+from actions.operadores import REGISTRY
+from benchmarks import comun
+from verificacion_final import MockDispatcher, MockTracker
+
+RUTA_SALIDA = "benchmarks/resultados/acciones.json"
+
+# (texto, slots)
+Caso = Tuple[Text, Dict[Text, Text]]
+
+_TEXTO_LARGO = (
+    "Hola buenas tardes, quería preguntar por los planes que tienen porque ahorita "
+    "estoy con otra compañía y la verdad me cobran mucho y casi no tengo señal en mi "
+    "casa, vi su anuncio en Facebook y me interesa saber si puedo conservar mi número "
+    "y cuánto tardaría el cambio, también si tienen eSIM para mi teléfono nuevo. "
+)
+
+
+def _numero(rng: random.Random) -> Text:
+    return "".join(rng.choice(string.digits) for _ in range(10))
+
+
+def _basura(rng: random.Random) -> Text:
+    alfabeto = string.ascii_letters + string.digits + string.punctuation + " ñáéíóú🙂"
+    return "".join(rng.choice(alfabeto) for _ in range(rng.randint(1, 120)))
+
+
+def corpus_inicio_sesion(rng: random.Random) -> Dict[Text, List[Caso]]:
+    """Mensajes de Node-RED en cada formato para todos los operadores."""
+    nombres = REGISTRY.nombres
+    return {
+        "compania_detectada": [(f"COMPANIA_DETECTADA {n.upper()}", {}) for n in nombres],
+        "operator_numero": [(f"OPERATOR {n.upper()} NUMERO {_numero(rng)}", {}) for n in nombres],
+        "marca_numero": [(f"{n.upper()} NUMERO {_numero(rng)}", {}) for n in nombres],
+        "nombre": [(n, {}) for n in nombres],
+        "inicio": [(f"INICIO_BOT COMPANIA_DETECTADA {n.upper()}", {}) for n in nombres],
+        "texto_largo": [(_TEXTO_LARGO * rng.randint(1, 8), {}) for _ in range(100)],
+        "basura": [(_basura(rng), {}) for _ in range(200)],
+    }
+
+
+def corpus_elegir_opcion(rng: random.Random) -> Dict[Text, List[Caso]]:
+    """Opciones de menú con y sin compañía conocida."""
+    nombres = REGISTRY.nombres
+    return {
+        "digito": [(str(rng.randint(1, 3)), {"compania_operador": rng.choice(nombres)}) for _ in range(300)],
+        "digito_sin_compania": [(str(rng.randint(1, 3)), {}) for _ in range(300)],
+        "opcion_en_frase": [(f"quiero la opción {rng.randint(1, 3)} por favor", {}) for _ in range(100)],
+        "opcion_invalida": [(str(rng.randint(4, 99)), {}) for _ in range(100)],
+        "texto_largo": [(_TEXTO_LARGO * rng.randint(1, 8), {}) for _ in range(100)],
+        "basura": [(_basura(rng), {}) for _ in range(200)],
+    }
+
+
+def corpus_texto_libre(rng: random.Random) -> Dict[Text, List[Caso]]:
+    return {
+        "texto_largo": [(_TEXTO_LARGO * rng.randint(1, 8), {}) for _ in range(100)],
+        "basura": [(_basura(rng), {}) for _ in range(200)],
+    }
+
+
+ESCENARIOS: Tuple[Tuple[type, Callable[[random.Random], Dict[Text, List[Caso]]]], ...] = (
+    (ActionSessionStart, corpus_inicio_sesion),
+    (ActionElegirOpcion, corpus_elegir_opcion),
+    (ActionFinalizarConversacion, corpus_texto_libre),
+    (ActionDefaultFallback, corpus_texto_libre),
+)
+
+
+def _ciclo(casos: List[Caso], total: int) -> Iterator[Caso]:
+    for i in range(total):
+        yield casos[i % len(casos)]
+
+
+async def medir(accion, casos: List[Caso], iteraciones: int, calentamiento: int) -> Dict[Text, float]:
+    """Ejecuta la acción `iteraciones` veces recorriendo el corpus en ciclo."""
+    for texto, slots in _ciclo(casos, calentamiento):
+        await accion.run(MockDispatcher(), MockTracker(texto, slots), {})
+
+    latencias = []
+    reloj = time.perf_counter_ns
+    for texto, slots in _ciclo(casos, iteraciones):
+        dispatcher, tracker = MockDispatcher(), MockTracker(texto, slots)
+        inicio = reloj()
+        await accion.run(dispatcher, tracker, {})
+        latencias.append(reloj() - inicio)
+
+    return comun.resumir_latencias(latencias)
+
+
+async def ejecutar(iteraciones: int, calentamiento: int, semilla: int,
+                   filtro: Optional[Text] = None) -> Dict[Text, Dict[Text, float]]:
+    rng = random.Random(semilla)
+    resultados = {}
+    for clase, generar_corpus in ESCENARIOS:
+        accion = clase()
+        for nombre_corpus, casos in generar_corpus(rng).items():
+            caso = f"{accion.name()}/{nombre_corpus}"
+            if filtro and filtro not in caso:
+                continue
+            resultados[caso] = await medir(accion, casos, iteraciones, calentamiento)
+    return resultados
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de las acciones personalizadas de BotMobile")
+    parser.add_argument("--iteraciones", type=int, default=5000, help="Llamadas medidas por caso")
+    parser.add_argument("--calentamiento", type=int, default=500, help="Llamadas previas sin medir")
+    parser.add_argument("--semilla", type=int, default=1234, help="Semilla de los corpus sintéticos")
+    parser.add_argument("--filtro", help="Solo casos cuyo nombre contenga este texto")
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--umbral", type=float, default=0.15,
+                        help="Empeoramiento relativo tolerado antes de marcar regresión")
+    parser.add_argument("--tolerancia-us", type=float, default=2.0,
+                        help="Diferencia absoluta de latencia (µs) que nunca cuenta como regresión")
+    args = parser.parse_args(argv)
+
+    resultados = asyncio.run(ejecutar(args.iteraciones, args.calentamiento, args.semilla, args.filtro))
+
+    comun.imprimir_tabla(
+        ([caso, r["ops_por_segundo"], r["p50_us"], r["p95_us"], r["p99_us"]] for caso, r in resultados.items()),
+        ("caso", "ops/s", "p50 µs", "p95 µs", "p99 µs"),
+    )
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "iteraciones": args.iteraciones, "semilla": args.semilla},
+        "resultados": resultados,
+    })
+    print(f"\nResultados guardados en {args.salida}")
+
+    if args.baseline:
+        base = comun.cargar_json(args.baseline)["resultados"]
+        regresiones = comun.comparar(resultados, base, args.umbral, args.tolerancia_us)
+        comun.imprimir_regresiones(regresiones, args.umbral)
+        if regresiones:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
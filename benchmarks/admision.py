@@ -0,0 +1,193 @@
+"""
+Ráfagas de Node-RED contra el servidor de acciones, con y sin admisión.
+
+Levanta servidor_acciones.py con un trabajador y, para cada tamaño de
+ráfaga, abre tantas conexiones keep-alive como llamadas (como el pool del
+servidor de Rasa cuando Node-RED dispara una campaña); en cada ronda escribe
+una llamada a `/webhook` por conexión a la vez. Mide dos
+configuraciones: sin control de admisión (BOTMOBILE_ADMISION_CONCURRENCIA=0)
+y con él (rasa_sdk_plugins/admision.py), para cada tamaño de ráfaga. Reporta
+los percentiles de latencia de las llamadas atendidas, cuántas se rechazaron
+con 429/503 y si traían `Retry-After`, y cuántas no respondieron antes de
+`--timeout` (el timeout de acciones del lado de Rasa).
+
+Sin admisión el p99 crece con la ráfaga; con ella, del lado del servidor,
+ninguna acción empieza después de la espera máxima (más una vuelta del event
+loop, porque la llegada se conoce al leer el socket).
+
+El cliente escribe HTTP/1.1 a mano sobre `asyncio` en lugar de usar aiohttp:
+comparte la máquina con el servidor y tiene que costar mucho menos que él
+por petición, o lo que se mide es su propio event loop. Aun así, con pocos
+núcleos las ráfagas grandes le quitan CPU al cliente y la cola de latencias
+que mide incluye el tiempo que tarda en leer las respuestas.
+
+Uso:
+    python -m benchmarks.admision
+    python -m benchmarks.admision --rafagas 1000,4000,8000 --espera 0.25
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from benchmarks import comun
+from benchmarks.multiproceso import esperar_listo, llamadas_webhook, puerto_libre
+
+RUTA_SALIDA = "benchmarks/resultados/admision.json"
+
+Conexion = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+def peticion_http(cuerpo: Dict[Text, Any], puerto: int) -> bytes:
+    """POST /webhook serializado una sola vez."""
+    datos = json.dumps(cuerpo).encode("utf-8")
+    return (
+        f"POST /webhook HTTP/1.1\r\nHost: 127.0.0.1:{puerto}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(datos)}\r\n\r\n"
+    ).encode("ascii") + datos
+
+
+async def _leer_respuesta(lector: asyncio.StreamReader) -> Tuple[int, bool]:
+    """Estado y si trae Retry-After; consume el cuerpo para dejar la conexión lista."""
+    encabezados = (await lector.readuntil(b"\r\n\r\n")).lower()
+    estado = int(encabezados[9:12])
+    largo = int(encabezados.split(b"content-length:", 1)[1].split(b"\r\n", 1)[0])
+    await lector.readexactly(largo)
+    return estado, b"\r\nretry-after:" in encabezados
+
+
+async def _rafagas(puerto: int, peticiones: List[bytes], tamanos: List[int], rondas: int,
+                   pausa: float, timeout: float) -> Dict[Text, Any]:
+    reloj = time.perf_counter_ns
+    resultados: Dict[Text, Any] = {}
+
+    for tamano in tamanos:
+        latencias: List[int] = []
+        estados: "collections.Counter[Text]" = collections.Counter()
+        con_retry_after = 0
+        # Abiertas justo antes: las ociosas las cierra el keep-alive de Sanic
+        conexiones: List[Conexion] = []
+        for _ in range(tamano):
+            conexiones.append(await asyncio.open_connection("127.0.0.1", puerto))
+
+        async def llamada(lector: asyncio.StreamReader, inicio: int) -> None:
+            nonlocal con_retry_after
+            try:
+                estado, retry_after = await asyncio.wait_for(_leer_respuesta(lector), timeout)
+            except asyncio.TimeoutError:
+                estados["timeout"] += 1
+                return
+            except (asyncio.IncompleteReadError, ConnectionError):
+                estados["error_conexion"] += 1
+                return
+            estados[str(estado)] += 1
+            if estado == 200:
+                latencias.append(reloj() - inicio)
+            con_retry_after += retry_after
+
+        for ronda in range(rondas):
+            inicio = reloj()
+            for i, (_, escritor) in enumerate(conexiones):
+                escritor.write(peticiones[(ronda * tamano + i) % len(peticiones)])
+            await asyncio.gather(*(llamada(lector, inicio) for lector, _ in conexiones))
+            # Las que vencieron dejan la respuesta a medias: no se reutilizan
+            await asyncio.sleep(pausa)
+            if estados["timeout"] or estados["error_conexion"]:
+                break
+
+        resultado: Dict[Text, Any] = {"llamadas": 0}
+        if latencias:
+            resultado = comun.resumir_latencias(latencias)
+            # El inverso de la latencia no dice nada con ráfagas
+            del resultado["ops_por_segundo"]
+            resultado["max_us"] = round(latencias[-1] / 1e3, 2)
+        resultado["estados"] = dict(estados)
+        resultado["rechazadas_con_retry_after"] = con_retry_after
+        resultados[f"rafaga_{tamano}"] = resultado
+        for _, escritor in conexiones:
+            escritor.close()
+    return resultados
+
+
+def medir(admision: Dict[Text, Text], tamanos: List[int], rondas: int, pausa: float, timeout: float,
+          semilla: int) -> Dict[Text, Any]:
+    """Levanta un trabajador con la configuración de admisión y le lanza las ráfagas."""
+    puerto = puerto_libre()
+    entorno = {**os.environ, **admision,
+               "BOTMOBILE_CONTENIDO_INTERVALO": "0", "BOTMOBILE_LOG_LEVEL": "WARNING"}
+    servidor = subprocess.Popen(
+        [sys.executable, "servidor_acciones.py", "--port", str(puerto), "--workers", "1", "--quiet"],
+        env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        esperar_listo(f"http://127.0.0.1:{puerto}", servidor)
+        peticiones = [peticion_http(cuerpo, puerto) for cuerpo in llamadas_webhook(semilla)]
+        return asyncio.run(_rafagas(puerto, peticiones, tamanos, rondas, pausa, timeout))
+    finally:
+        servidor.send_signal(signal.SIGTERM)
+        try:
+            servidor.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            servidor.kill()
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ráfagas contra /webhook con y sin control de admisión")
+    parser.add_argument("--rafagas", default="1000,3000,6000", help="Tamaños de ráfaga separados por comas")
+    parser.add_argument("--rondas", type=int, default=3, help="Ráfagas de cada tamaño")
+    parser.add_argument("--pausa", type=float, default=1.0, help="Segundos entre ráfagas")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="Segundos para responder (el timeout de acciones de Rasa)")
+    parser.add_argument("--concurrencia", type=int, default=32, help="BOTMOBILE_ADMISION_CONCURRENCIA")
+    parser.add_argument("--cola", type=int, default=128, help="BOTMOBILE_ADMISION_COLA")
+    parser.add_argument("--espera", type=float, default=0.5, help="BOTMOBILE_ADMISION_ESPERA")
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    tamanos = [int(n) for n in args.rafagas.split(",")]
+    configuraciones = {
+        "sin_admision": {"BOTMOBILE_ADMISION_CONCURRENCIA": "0"},
+        "con_admision": {
+            "BOTMOBILE_ADMISION_CONCURRENCIA": str(args.concurrencia),
+            "BOTMOBILE_ADMISION_COLA": str(args.cola),
+            "BOTMOBILE_ADMISION_ESPERA": str(args.espera),
+        },
+    }
+    resultados: Dict[Text, Any] = {}
+    filas = []
+    for nombre, admision in configuraciones.items():
+        print(f"Midiendo {nombre}...")
+        resultados[nombre] = medir(admision, tamanos, args.rondas, args.pausa, args.timeout, args.semilla)
+        for tamano in tamanos:
+            resultado = resultados[nombre][f"rafaga_{tamano}"]
+            estados = resultado["estados"]
+            filas.append([
+                nombre, tamano, resultado["llamadas"], resultado.get("p50_us", 0), resultado.get("p99_us", 0),
+                resultado.get("max_us", 0), estados.get("429", 0), estados.get("503", 0),
+                resultado["rechazadas_con_retry_after"],
+                estados.get("timeout", 0) + estados.get("error_conexion", 0),
+            ])
+
+    comun.imprimir_tabla(filas, ("configuración", "ráfaga", "atendidas", "p50 µs", "p99 µs", "máx µs",
+                                 "429", "503", "Retry-After", "sin respuesta"))
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "rafagas": tamanos, "rondas": args.rondas,
+                      "timeout_s": args.timeout, "concurrencia": args.concurrencia,
+                      "cola": args.cola, "espera_s": args.espera},
+        "resultados": resultados,
+    })
+    print(f"Resultados guardados en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Benchmark del almacén de analítica y del embudo por operador.
+
+Genera millones de eventos de conversaciones sintéticas intercaladas como en
+tráfico real (inicios de sesión, compañía, número, recorridos por el menú,
+cierres), los escribe en lotes con `AlmacenEventos.escribir` -lo que hace el
+event broker en su hilo- y calcula el embudo con `calcular_embudos` sobre el
+recorrido ordenado por conversación. Reporta eventos por segundo de cada
+fase, el tamaño del archivo y la memoria máxima del proceso, y verifica que
+los totales del embudo coincidan con los que se generaron.
+
+Uso:
+    python -m benchmarks.analitica
+    python -m benchmarks.analitica --eventos 5000000 --lote 1000
+"""
+
+import argparse
+import collections
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Text
+
+from benchmarks import comun
+from extensiones.analitica import TIPO_SESION, TIPO_SLOT, AlmacenEventos, Fila, calcular_embudos
+
+RUTA_SALIDA = "benchmarks/resultados/analitica.json"
+
+_OPERADORES = ("Telcel", "Movistar", "AT&T", "Unefon", "Altan Redes", "Virgin Mobile", "Bait", "Izzi")
+_RECORRIDOS = (
+    ("menu_principal",),
+    ("menu_principal", "paquetes", "plan_ilimitado"),
+    ("menu_principal", "portabilidad"),
+    ("menu_principal", "portabilidad", "como_obtener_nip", "nip_listo"),
+    ("menu_principal", "portabilidad", "nip_listo", "como_obtener_imei"),
+    ("menu_principal", "portabilidad", "menu_principal", "contacto"),
+    ("menu_principal", "paquetes", "plan_premium", "portabilidad", "menu_principal", "contacto"),
+    ("menu_principal", "contacto"),
+)
+
+
+def _sesion(sender_id: Text, compania: Optional[Text], rng: random.Random,
+            esperado: "collections.Counter[Text]") -> List[Fila]:
+    """Eventos de una sesión; suma al embudo esperado lo que recorre."""
+    eventos: List[Fila] = [(sender_id, 0.0, TIPO_SESION, None, None)]
+    if compania:
+        eventos.append((sender_id, 0.0, TIPO_SLOT, "compania_operador", compania))
+        if rng.random() < 0.7:
+            eventos.append((sender_id, 0.0, TIPO_SLOT, "numero_telefono", f"{rng.getrandbits(64):016x}"))
+    recorrido = rng.choice(_RECORRIDOS)
+    eventos.extend((sender_id, 0.0, TIPO_SLOT, "estado_menu", estado) for estado in recorrido)
+    if rng.random() < 0.3:
+        eventos.append((sender_id, 0.0, TIPO_SLOT, "estado_menu", "despedida"))
+        eventos.append((sender_id, 0.0, TIPO_SLOT, "conversation_ending", "true"))
+
+    esperado["sesiones"] += 1
+    if "portabilidad" in recorrido:
+        esperado["portabilidad"] += 1
+        if "contacto" in recorrido[recorrido.index("portabilidad"):]:
+            esperado["contacto"] += 1
+    return eventos
+
+
+def eventos_sinteticos(total: int, rng: random.Random, activas: int,
+                       esperado: "collections.Counter[Text]") -> Iterator[Fila]:
+    """
+    Unos `total` eventos de `activas` conversaciones simultáneas, intercalados.
+
+    Al llegar a `total` no se abren sesiones nuevas pero se terminan las
+    abiertas, para que el embudo esperado corresponda a sesiones completas.
+    """
+    siguiente_id = 0
+    conversaciones = []  # [sender_id, compania, eventos pendientes]
+    reloj = time.time()
+    generados = 0
+    while conversaciones or generados < total:
+        if generados < total and len(conversaciones) < activas:
+            sender_id = f"sender-{siguiente_id}"
+            siguiente_id += 1
+            compania = rng.choice(_OPERADORES) if rng.random() < 0.8 else None
+            conversaciones.append([sender_id, compania, _sesion(sender_id, compania, rng, esperado)])
+        posicion = rng.randrange(len(conversaciones))
+        conversacion = conversaciones[posicion]
+        sender_id = conversacion[0]
+        _, _, tipo, slot, valor = conversacion[2].pop(0)
+        reloj += 0.001
+        generados += 1
+        yield sender_id, reloj, tipo, slot, valor
+        if not conversacion[2]:
+            if generados < total and rng.random() < 0.25:
+                # Vuelve más tarde: sesión nueva con los slots conservados
+                conversacion[2] = _sesion(sender_id, None, rng, esperado)
+            else:
+                conversaciones[posicion] = conversaciones[-1]
+                conversaciones.pop()
+
+
+def _rss_maxima_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del almacén de analítica y el embudo")
+    parser.add_argument("--eventos", type=int, default=2_000_000, help="Eventos a generar")
+    parser.add_argument("--lote", type=int, default=500, help="Eventos por escritura (batch_size)")
+    parser.add_argument("--activas", type=int, default=2000, help="Conversaciones simultáneas")
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.semilla)
+    esperado: "collections.Counter[Text]" = collections.Counter()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "eventos.db")
+        almacen = AlmacenEventos(ruta)
+
+        escritura_s = 0.0
+        lote: List[Fila] = []
+        for fila in eventos_sinteticos(args.eventos, rng, args.activas, esperado):
+            lote.append(fila)
+            if len(lote) >= args.lote:
+                inicio = time.perf_counter()
+                almacen.escribir(lote)
+                escritura_s += time.perf_counter() - inicio
+                lote = []
+        if lote:
+            inicio = time.perf_counter()
+            almacen.escribir(lote)
+            escritura_s += time.perf_counter() - inicio
+        tamano_mb = os.path.getsize(ruta) / 1e6
+        total = almacen.contar()
+
+        rss_antes = _rss_maxima_mb()
+        inicio = time.perf_counter()
+        embudos = calcular_embudos(almacen.recorrer())
+        embudo_s = time.perf_counter() - inicio
+        rss_despues = _rss_maxima_mb()
+        almacen.cerrar()
+
+    obtenido = collections.Counter()
+    for conteos in embudos.por_operador.values():
+        obtenido.update(dict(zip(("sesiones", "portabilidad", "contacto"), conteos)))
+    coincide = all(obtenido[etapa] == esperado[etapa] for etapa in ("sesiones", "portabilidad", "contacto"))
+
+    resultados: Dict[Text, Dict[Text, float]] = {
+        "escritura": {"eventos_por_segundo": round(total / escritura_s, 1), "segundos": round(escritura_s, 3)},
+        "embudo": {"eventos_por_segundo": round(total / embudo_s, 1), "segundos": round(embudo_s, 3)},
+    }
+    comun.imprimir_tabla(
+        ([fase, r["eventos_por_segundo"], r["segundos"]] for fase, r in resultados.items()),
+        ("fase", "eventos/s", "segundos"),
+    )
+    print(f"\n{total} eventos, {embudos.conversaciones} conversaciones, {obtenido['sesiones']} sesiones; "
+          f"archivo de {tamano_mb:.1f} MB")
+    print(f"RSS máxima: {rss_antes:.1f} MB antes del embudo, {rss_despues:.1f} MB después")
+    print(f"Embudo {'igual' if coincide else 'DISTINTO'} al generado: "
+          f"{dict(obtenido)} vs {dict(esperado)}")
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "eventos": total, "lote": args.lote, "activas": args.activas},
+        "resultados": resultados,
+        "archivo_mb": round(tamano_mb, 2),
+        "rss_maxima_mb": {"antes_embudo": round(rss_antes, 1), "despues_embudo": round(rss_despues, 1)},
+        "embudo": embudos.como_dict(),
+    })
+    print(f"Resultados guardados en {args.salida}")
+    return 0 if coincide else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Benchmark de la cache de NLU (extensiones/cache_nlu.py).
+
+Entrena (o carga) dos modelos solo de NLU con los mismos datos: uno con el
+`config.yml` actual y otro con `CacheNLU` y `GuardarCacheNLU` agregados al
+pipeline. Les pasa el mismo tráfico repetitivo -textos de los ejemplos de
+NLU, dígitos, nombres de operador y mensajes de Node-RED elegidos con una
+distribución de Zipf, con variantes de mayúsculas y espacios- y mide la
+latencia de `Agent.parse_message`, cuántas veces coincide el intent y las
+estadísticas de la cache (tasa de aciertos, tiempo ahorrado, ocupación).
+
+Uso:
+    python -m benchmarks.cache_nlu
+    python -m benchmarks.cache_nlu --modelo-base models/base.tar.gz --modelo-cache models/cache.tar.gz
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Text
+
+import yaml
+
+from actions.operadores import REGISTRY
+from benchmarks import comun
+from benchmarks.carga import RUTA_DATOS, ejemplos_nlu, mensaje_inicio
+from benchmarks.nlu_rapida import RUTA_CONFIG, entrenar
+
+RUTA_SALIDA = "benchmarks/resultados/cache_nlu.json"
+
+_CACHE = "extensiones.cache_nlu.CacheNLU"
+_GUARDAR = "extensiones.cache_nlu.GuardarCacheNLU"
+
+
+def config_con_cache(ruta_config: Text, destino: Text, max_entradas: int) -> Text:
+    """Escribe el config.yml con la cache después de NLURapida y el guardado al final."""
+    with open(ruta_config, encoding="utf-8") as archivo:
+        config = yaml.safe_load(archivo)
+    pipeline = [componente for componente in config["pipeline"] if componente["name"] not in (_CACHE, _GUARDAR)]
+    posicion = next((i + 1 for i, componente in enumerate(pipeline)
+                     if componente["name"].endswith(".NLURapida")), 0)
+    pipeline.insert(posicion, {"name": _CACHE, "max_entradas": max_entradas})
+    pipeline.append({"name": _GUARDAR})
+    config["pipeline"] = pipeline
+    with open(destino, "w", encoding="utf-8") as archivo:
+        yaml.safe_dump(config, archivo, allow_unicode=True, sort_keys=False)
+    return destino
+
+
+def trafico(rng: random.Random, mensajes: int, exponente: float) -> List[Text]:
+    """Textos con repetición tipo Zipf sobre el vocabulario de mensajes."""
+    ejemplos = ejemplos_nlu(os.path.join(RUTA_DATOS, "nlu.yml"))
+    vocabulario = [texto for textos in ejemplos.values() for texto in textos]
+    vocabulario += list("0123456789") + list(REGISTRY.nombres)
+    vocabulario += [mensaje_inicio(rng) for _ in range(50)]
+    rng.shuffle(vocabulario)
+    pesos = [1 / (rango + 1) ** exponente for rango in range(len(vocabulario))]
+
+    variantes = (str, str.lower, str.upper, lambda texto: f"  {texto} ")
+    return [rng.choice(variantes)(texto) for texto in rng.choices(vocabulario, pesos, k=mensajes)]
+
+
+async def medir(modelo: Text, mensajes: List[Text], calentamiento: int) -> Dict[Text, Any]:
+    """Latencias y el intent predicho para cada mensaje."""
+    from rasa.core.agent import Agent
+
+    agente = Agent.load(modelo)
+    for texto in mensajes[:calentamiento]:
+        await agente.parse_message(texto)
+
+    latencias: List[int] = []
+    intents = []
+    reloj = time.perf_counter_ns
+    for texto in mensajes:
+        inicio = reloj()
+        resultado = await agente.parse_message(texto)
+        latencias.append(reloj() - inicio)
+        intents.append((resultado.get("intent") or {}).get("name"))
+    return {"latencias": comun.resumir_latencias(latencias), "intents": intents}
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de la cache de resultados de NLU")
+    parser.add_argument("--modelo-base", help="Modelo ya entrenado con config.yml")
+    parser.add_argument("--modelo-cache", help="Modelo ya entrenado con la cache en el pipeline")
+    parser.add_argument("--config", default=RUTA_CONFIG)
+    parser.add_argument("--mensajes", type=int, default=5000, help="Mensajes medidos")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Exponente de la distribución de textos")
+    parser.add_argument("--max-entradas", type=int, default=10000)
+    parser.add_argument("--calentamiento", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    mensajes = trafico(random.Random(args.semilla), args.mensajes, args.zipf)
+    distintos = len({texto.strip().casefold() for texto in mensajes})
+
+    with tempfile.TemporaryDirectory() as directorio:
+        modelo_base = args.modelo_base or entrenar(args.config, directorio, "base")
+        modelo_cache = args.modelo_cache or entrenar(
+            config_con_cache(args.config, os.path.join(directorio, "config_cache.yml"), args.max_entradas),
+            directorio, "cache",
+        )
+        base = asyncio.run(medir(modelo_base, mensajes, args.calentamiento))
+
+        from extensiones import cache_nlu
+        cache_nlu.reiniciar_estadisticas()
+        con_cache = asyncio.run(medir(modelo_cache, mensajes, 0))
+        estadisticas = cache_nlu.estadisticas()
+
+    resultados = {"base": base["latencias"], "cache": con_cache["latencias"]}
+    comun.imprimir_tabla(
+        ([nombre, r["llamadas"], r["media_us"], r["p50_us"], r["p95_us"], r["p99_us"]]
+         for nombre, r in resultados.items()),
+        ("modelo", "mensajes", "media µs", "p50 µs", "p95 µs", "p99 µs"),
+    )
+    iguales = sum(a == b for a, b in zip(base["intents"], con_cache["intents"]))
+    print(f"\n{len(mensajes)} mensajes, {distintos} textos distintos (normalizados)")
+    print(f"Intent igual en ambos modelos: {iguales / len(mensajes):.1%}")
+    print(f"Cache: {estadisticas}")
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "mensajes": args.mensajes, "zipf": args.zipf,
+                      "textos_distintos": distintos, "semilla": args.semilla},
+        "resultados": resultados,
+        "cache": estadisticas,
+        "coincidencia_intent": round(iguales / len(mensajes), 4),
+    })
+    print(f"Resultados guardados en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
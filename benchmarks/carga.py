@@ -0,0 +1,318 @@
+"""
+Generador de carga y reproducción de tráfico contra el canal REST de Rasa.
+
+Mide cuántas conversaciones concurrentes aguanta un par botmobile-rasa +
+botmobile-actions (docker-compose.yml) enviando mensajes a
+`/webhooks/rest/webhook`. Los escenarios salen de dos fuentes:
+
+- Capturas JSONL de Node-RED (`debug_webhook.py --captura`, o cualquier JSONL
+  con `message`/`text` y opcionalmente `sender`): se reproducen agrupadas por
+  remitente y en el orden original.
+- Escenarios sintéticos multi-turno generados de `data/stories.yml` y
+  `data/rules.yml`: inicio de sesión con un operador del catálogo en algún
+  formato de Node-RED, seguido de los intents de la historia (dígitos de
+  menú, regresar al menú, despedida...) con ejemplos de `data/nlu.yml`.
+
+Cada conversación usa un sender_id propio. Las conversaciones llegan a una
+tasa fija (--tasa por segundo) y como mucho --concurrencia están activas a la
+vez; dentro de una conversación los turnos son secuenciales, como con un
+usuario real. Se reportan throughput y p50/p95/p99 por tipo de turno.
+
+Uso:
+    docker compose up -d
+    python -m benchmarks.carga --concurrencia 50 --tasa 20 --duracion 60
+    python -m benchmarks.carga --capturas capturas/ --concurrencia 100
+"""
+
+import argparse
+import asyncio
+import collections
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Text, Tuple
+
+import aiohttp
+import yaml
+
+from actions.operadores import REGISTRY
+from benchmarks import comun
+
+RUTA_SALIDA = "benchmarks/resultados/carga.json"
+RUTA_DATOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Intents que abren la conversación; en el escenario se sustituyen por el
+# mensaje de Node-RED con el operador
+_INTENTS_INICIO = ("saludar", "informar_compania")
+
+_ANOTACION = re.compile(r"\[([^\]]*)\](?:\([^)]*\)|\{[^}]*\})")
+
+# (tipo de turno, texto)
+Turno = Tuple[Text, Text]
+Escenario = List[Turno]
+
+
+def ejemplos_nlu(ruta: Text) -> Dict[Text, List[Text]]:
+    """Ejemplos de cada intent de un nlu.yml, sin anotaciones de entidades."""
+    with open(ruta, encoding="utf-8") as archivo:
+        datos = yaml.safe_load(archivo) or {}
+    ejemplos = {}
+    for bloque in datos.get("nlu", []):
+        if "intent" not in bloque:
+            continue
+        lineas = [linea.strip()[2:] for linea in str(bloque.get("examples", "")).splitlines()
+                  if linea.strip().startswith("- ")]
+        ejemplos[bloque["intent"]] = [_ANOTACION.sub(r"\1", linea) for linea in lineas]
+    return ejemplos
+
+
+def _pasos_de_usuario(ruta: Text, clave: Text) -> List[List[Tuple[Text, Optional[Text]]]]:
+    """(intent, valor de numero_opcion) de cada historia o regla."""
+    with open(ruta, encoding="utf-8") as archivo:
+        datos = yaml.safe_load(archivo) or {}
+    flujos = []
+    for flujo in datos.get(clave, []):
+        pasos = []
+        for paso in flujo.get("steps", []):
+            if "intent" not in paso:
+                continue
+            opcion = None
+            for entidad in paso.get("entities", []) or []:
+                if isinstance(entidad, dict) and "numero_opcion" in entidad:
+                    opcion = str(entidad["numero_opcion"])
+            pasos.append((paso["intent"], opcion))
+        if pasos:
+            flujos.append(pasos)
+    return flujos
+
+
+def mensaje_inicio(rng: random.Random) -> Text:
+    """Primer mensaje de Node-RED con un operador del catálogo."""
+    operador = rng.choice(REGISTRY.nombres)
+    numero = "".join(rng.choice("0123456789") for _ in range(10))
+    return rng.choice((
+        f"COMPANIA_DETECTADA {operador.upper()}",
+        f"OPERATOR {operador.upper()} NUMERO {numero}",
+        f"{operador.upper()} NUMERO {numero}",
+        operador,
+    ))
+
+
+def escenarios_sinteticos(rng: random.Random, directorio: Text = RUTA_DATOS) -> Iterator[Escenario]:
+    """
+    Escenarios infinitos a partir de historias y reglas.
+
+    Todos empiezan con un turno "inicio"; los siguientes turnos llevan como
+    tipo el intent de la historia.
+    """
+    ejemplos = ejemplos_nlu(os.path.join(directorio, "nlu.yml"))
+    flujos = (_pasos_de_usuario(os.path.join(directorio, "stories.yml"), "stories")
+              + _pasos_de_usuario(os.path.join(directorio, "rules.yml"), "rules"))
+    if not flujos:
+        raise ValueError(f"No hay historias ni reglas con intents en {directorio}")
+
+    while True:
+        pasos = rng.choice(flujos)
+        escenario = [("inicio", mensaje_inicio(rng))]
+        for intent, opcion in pasos:
+            if intent in _INTENTS_INICIO and len(escenario) == 1:
+                continue
+            texto = opcion if opcion is not None else rng.choice(ejemplos.get(intent) or [intent])
+            escenario.append((intent, texto))
+        yield escenario
+
+
+def escenarios_capturados(rutas: Sequence[Text]) -> List[Escenario]:
+    """
+    Conversaciones de capturas JSONL, agrupadas por remitente.
+
+    El tipo de turno es "captura/<formato>" si el registro trae el campo
+    formato de debug_webhook.py, o "captura" si no.
+    """
+    conversaciones: Dict[Text, Escenario] = collections.OrderedDict()
+    for ruta in rutas:
+        with open(ruta, encoding="utf-8") as archivo:
+            for numero_linea, linea in enumerate(archivo):
+                if not linea.strip():
+                    continue
+                registro = json.loads(linea)
+                cuerpo = registro.get("json") if isinstance(registro.get("json"), dict) else registro
+                texto = registro.get("mensaje") or cuerpo.get("message") or cuerpo.get("text")
+                if isinstance(texto, dict):
+                    texto = texto.get("text")
+                if not texto:
+                    continue
+                remitente = str(cuerpo.get("sender") or f"{ruta}:{numero_linea}")
+                tipo = f"captura/{registro['formato']}" if registro.get("formato") else "captura"
+                conversaciones.setdefault(remitente, []).append((tipo, texto))
+    return list(conversaciones.values())
+
+
+def _expandir_rutas(rutas: Sequence[Text]) -> List[Text]:
+    archivos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            archivos.extend(sorted(glob.glob(os.path.join(ruta, "*.jsonl"))))
+        else:
+            archivos.append(ruta)
+    return archivos
+
+
+class Resultados:
+    """Latencias y errores por tipo de turno."""
+
+    def __init__(self) -> None:
+        self.latencias: Dict[Text, List[int]] = collections.defaultdict(list)
+        self.errores: Dict[Text, int] = collections.Counter()
+        self.conversaciones = 0
+
+    def resumen(self, duracion_s: float) -> Dict[Text, Dict[Text, Any]]:
+        resumen = {}
+        for tipo in sorted(set(self.latencias) | set(self.errores)):
+            latencias = self.latencias.get(tipo, [])
+            datos = comun.resumir_latencias(latencias) if latencias else {"llamadas": 0}
+            # El throughput del caso es el del sistema, no el inverso de la latencia
+            datos["ops_por_segundo"] = round(len(latencias) / duracion_s, 2) if duracion_s else 0.0
+            datos["errores"] = self.errores.get(tipo, 0)
+            resumen[tipo] = datos
+        return resumen
+
+
+async def conversar(sesion: aiohttp.ClientSession, url: Text, escenario: Escenario,
+                    resultados: Resultados, pausa: float, plazo: float) -> None:
+    """Envía los turnos de un escenario en orden con un sender_id nuevo."""
+    remitente = f"carga-{uuid.uuid4().hex[:12]}"
+    reloj = time.perf_counter_ns
+    for tipo, texto in escenario:
+        inicio = reloj()
+        try:
+            async with sesion.post(url, json={"sender": remitente, "message": texto},
+                                   timeout=aiohttp.ClientTimeout(total=plazo)) as respuesta:
+                await respuesta.read()
+                if respuesta.status != 200:
+                    resultados.errores[tipo] += 1
+                    continue
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            resultados.errores[tipo] += 1
+            continue
+        resultados.latencias[tipo].append(reloj() - inicio)
+        if pausa:
+            await asyncio.sleep(pausa)
+    resultados.conversaciones += 1
+
+
+async def generar_carga(url: Text, escenarios: Iterator[Escenario], concurrencia: int,
+                        tasa: float, duracion: float, maximo: Optional[int],
+                        pausa: float, plazo: float) -> Tuple[Resultados, float]:
+    """
+    Lanza conversaciones a `tasa` por segundo con `concurrencia` como tope.
+
+    Termina al pasar `duracion` segundos o al lanzar `maximo` conversaciones
+    (lo que ocurra antes) y espera a que las activas acaben.
+    """
+    resultados = Resultados()
+    limite = asyncio.Semaphore(concurrencia)
+    conector = aiohttp.TCPConnector(limit=concurrencia)
+    tareas = set()
+
+    async def una(escenario: Escenario) -> None:
+        try:
+            await conversar(sesion, url, escenario, resultados, pausa, plazo)
+        finally:
+            limite.release()
+
+    async with aiohttp.ClientSession(connector=conector) as sesion:
+        inicio = time.perf_counter()
+        intervalo = 1.0 / tasa if tasa else 0.0
+        siguiente = inicio
+        lanzadas = 0
+        for escenario in escenarios:
+            if time.perf_counter() - inicio >= duracion or (maximo is not None and lanzadas >= maximo):
+                break
+            await limite.acquire()
+            tarea = asyncio.create_task(una(escenario))
+            tareas.add(tarea)
+            tarea.add_done_callback(tareas.discard)
+            lanzadas += 1
+            if intervalo:
+                siguiente += intervalo
+                espera = siguiente - time.perf_counter()
+                if espera > 0:
+                    await asyncio.sleep(espera)
+        if tareas:
+            await asyncio.gather(*tareas)
+        duracion_real = time.perf_counter() - inicio
+
+    return resultados, duracion_real
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Carga y reproducción de tráfico contra el canal REST")
+    parser.add_argument("--url", default="http://localhost:5005", help="URL base del servidor de Rasa")
+    parser.add_argument("--capturas", nargs="*", help="Archivos o directorios JSONL a reproducir")
+    parser.add_argument("--concurrencia", type=int, default=20, help="Conversaciones activas como máximo")
+    parser.add_argument("--tasa", type=float, default=10.0, help="Conversaciones nuevas por segundo (0 = sin límite)")
+    parser.add_argument("--duracion", type=float, default=30.0, help="Segundos lanzando conversaciones")
+    parser.add_argument("--conversaciones", type=int, help="Máximo de conversaciones a lanzar")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Segundos entre turnos de una conversación")
+    parser.add_argument("--plazo", type=float, default=30.0, help="Timeout por turno en segundos")
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--umbral", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    url = args.url.rstrip("/") + "/webhooks/rest/webhook"
+    if args.capturas:
+        capturados = escenarios_capturados(_expandir_rutas(args.capturas))
+        if not capturados:
+            print("❌ Las capturas no tienen mensajes", file=sys.stderr)
+            return 1
+        escenarios: Iterator[Escenario] = iter(capturados)
+        maximo = min(args.conversaciones or len(capturados), len(capturados))
+        fuente = f"{len(capturados)} conversaciones capturadas"
+    else:
+        escenarios = escenarios_sinteticos(random.Random(args.semilla))
+        maximo = args.conversaciones
+        fuente = "escenarios sintéticos de stories.yml y rules.yml"
+
+    print(f"🚀 {fuente} -> {url} (concurrencia {args.concurrencia}, tasa {args.tasa}/s)")
+    resultados, duracion = asyncio.run(generar_carga(
+        url, escenarios, args.concurrencia, args.tasa, args.duracion, maximo, args.pausa, args.plazo,
+    ))
+    resumen = resultados.resumen(duracion)
+
+    comun.imprimir_tabla(
+        ([tipo, r["llamadas"], r["errores"], r["ops_por_segundo"],
+          *(round(r.get(p, 0) / 1e3, 1) for p in ("p50_us", "p95_us", "p99_us"))]
+         for tipo, r in resumen.items()),
+        ("turno", "ok", "errores", "turnos/s", "p50 ms", "p95 ms", "p99 ms"),
+    )
+    turnos = sum(len(l) for l in resultados.latencias.values())
+    print(f"\n{resultados.conversaciones} conversaciones, {turnos} turnos en {duracion:.1f}s "
+          f"({turnos / duracion:.1f} turnos/s)")
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "url": args.url, "fuente": fuente,
+                      "concurrencia": args.concurrencia, "tasa": args.tasa, "duracion_s": round(duracion, 2)},
+        "resultados": resumen,
+    })
+    print(f"Resultados guardados en {args.salida}")
+
+    errores = sum(resultados.errores.values())
+    if args.baseline:
+        base = comun.cargar_json(args.baseline)["resultados"]
+        regresiones = comun.comparar(resumen, base, args.umbral)
+        comun.imprimir_regresiones(regresiones, args.umbral)
+        if regresiones:
+            return 1
+    return 1 if errores and not turnos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Utilidades compartidas por los benchmarks: percentiles, metadatos del
+entorno y comparación de resultados contra una línea base en JSON.
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Sequence, Text, Tuple
+
+# Métricas comparadas contra la línea base. p99 queda fuera: con pocas miles
+# de muestras depende de un puñado de pausas del GC o del planificador
+_MAYOR_ES_PEOR = ("p50_us", "p95_us")
+_MAYOR_ES_MEJOR = ("ops_por_segundo",)
+
+
+def percentil(ordenados: Sequence[float], p: float) -> float:
+    """Percentil p (0-100) por rango más cercano sobre una secuencia ordenada."""
+    if not ordenados:
+        return 0.0
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+def resumir_latencias(latencias_ns: List[int]) -> Dict[Text, float]:
+    """Throughput y percentiles (en microsegundos) de una serie de latencias."""
+    latencias_ns.sort()
+    total_s = sum(latencias_ns) / 1e9
+    return {
+        "llamadas": len(latencias_ns),
+        "ops_por_segundo": round(len(latencias_ns) / total_s, 1) if total_s else 0.0,
+        "media_us": round(sum(latencias_ns) / len(latencias_ns) / 1e3, 2),
+        "p50_us": round(percentil(latencias_ns, 50) / 1e3, 2),
+        "p95_us": round(percentil(latencias_ns, 95) / 1e3, 2),
+        "p99_us": round(percentil(latencias_ns, 99) / 1e3, 2),
+    }
+
+
+def metadatos() -> Dict[Text, Any]:
+    """Datos del entorno para saber si dos resultados son comparables."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+
+    return {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def guardar_json(ruta: Text, datos: Dict[Text, Any]) -> None:
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=2)
+        archivo.write("\n")
+
+
+def cargar_json(ruta: Text) -> Dict[Text, Any]:
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def comparar(actual: Dict[Text, Dict[Text, float]],
+             base: Dict[Text, Dict[Text, float]],
+             umbral: float,
+             tolerancia_us: float = 0.0) -> List[Tuple[Text, Text, float, float, float]]:
+    """
+    Compara dos conjuntos de resultados caso por caso.
+
+    Args:
+        actual: {caso: {métrica: valor}} de la ejecución actual
+        base: Lo mismo, de la línea base
+        umbral: Cambio relativo tolerado (0.15 = 15 %)
+        tolerancia_us: Diferencia absoluta de latencia que se ignora aunque
+            supere el umbral relativo (ruido en casos de pocos microsegundos)
+
+    Returns:
+        Regresiones como (caso, métrica, base, actual, cambio relativo); los
+        casos que solo existen en uno de los dos lados se ignoran
+    """
+    regresiones = []
+    for caso in sorted(actual.keys() & base.keys()):
+        for metrica in _MAYOR_ES_PEOR + _MAYOR_ES_MEJOR:
+            valor_base = base[caso].get(metrica)
+            valor = actual[caso].get(metrica)
+            if not valor_base or valor is None:
+                continue
+            cambio = (valor - valor_base) / valor_base
+            if metrica in _MAYOR_ES_PEOR:
+                empeora = cambio > umbral and valor - valor_base > tolerancia_us
+            else:
+                empeora = -cambio > umbral
+            if empeora:
+                regresiones.append((caso, metrica, valor_base, valor, cambio))
+    return regresiones
+
+
+def imprimir_tabla(filas: Iterable[Sequence[Any]], encabezados: Sequence[Text]) -> None:
+    filas = [[str(celda) for celda in fila] for fila in filas]
+    anchos = [max(len(str(e)), *(len(f[i]) for f in filas)) if filas else len(str(e))
+              for i, e in enumerate(encabezados)]
+    print("  ".join(str(e).ljust(a) for e, a in zip(encabezados, anchos)))
+    print("  ".join("-" * a for a in anchos))
+    for fila in filas:
+        print("  ".join(c.ljust(a) for c, a in zip(fila, anchos)))
+
+
+def imprimir_regresiones(regresiones: List[Tuple[Text, Text, float, float, float]], umbral: float) -> None:
+    if not regresiones:
+        print(f"\n✅ Sin regresiones mayores a {umbral:.0%} respecto a la línea base")
+        return
+    print(f"\n❌ {len(regresiones)} regresiones mayores a {umbral:.0%}:", file=sys.stderr)
+    for caso, metrica, valor_base, valor, cambio in regresiones:
+        print(f"   {caso} {metrica}: {valor_base} -> {valor} ({cambio:+.1%})", file=sys.stderr)
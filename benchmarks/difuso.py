@@ -0,0 +1,197 @@
+"""
+Benchmark de la búsqueda aproximada de operadores (actions/difuso.py).
+
+Construye catálogos sintéticos del tamaño pedido (nombres inventados a partir
+de sílabas más los alias reales) y mide la latencia de `IndiceDifuso.buscar`
+con nombres con errores de dedo (1 y 2 ediciones), nombres exactos y texto
+libre que no es un operador. Para una muestra de las consultas compara contra
+el recorrido ingenuo (distancia acotada contra cada alias) y reporta en
+cuántas ambos dan el mismo operador, cuántos errores de dedo se resuelven al
+operador correcto y el tamaño del índice (variantes de borrado).
+
+Uso:
+    python -m benchmarks.difuso
+    python -m benchmarks.difuso --alias 1000,10000,50000 --umbral-confianza 0.75
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Text, Tuple
+
+from actions.difuso import (
+    LONGITUD_MAXIMA,
+    LONGITUD_MINIMA,
+    UMBRAL_DIFUSO,
+    IndiceDifuso,
+    distancia_acotada,
+    distancia_permitida,
+)
+from actions.operadores import REGISTRY, normalizar_clave
+from benchmarks import comun
+
+RUTA_SALIDA = "benchmarks/resultados/difuso.json"
+
+_SILABAS = ("tel", "mo", "vi", "star", "cel", "net", "com", "fon", "red", "uni", "al", "tan",
+            "max", "go", "bi", "tra", "lo", "kia", "sur", "nor", "te", "le", "plus", "mex")
+
+_TEXTO_LIBRE = (
+    "hola buenas tardes", "quiero cambiarme", "cuanto cuesta el plan", "no se cual es mi compania",
+    "tengo problemas con la señal", "me interesa la portabilidad", "gracias", "ok perfecto",
+    "quisiera mas informacion", "como obtengo mi nip", "buen dia", "ya tengo mi nip",
+)
+
+# (clave normalizada, nombre)
+Alias = Tuple[Text, Text]
+
+
+def catalogo_sintetico(total: int, rng: random.Random) -> List[Alias]:
+    """Alias reales más nombres inventados hasta llegar a `total`."""
+    alias = list(REGISTRY.alias())
+    vistos = {clave for clave, _ in alias}
+    while len(alias) < total:
+        palabras = [
+            "".join(rng.choice(_SILABAS) for _ in range(rng.randint(1, 3)))
+            for _ in range(rng.choice((1, 1, 1, 2, 2, 3)))
+        ]
+        clave = " ".join(palabras)
+        if clave not in vistos:
+            vistos.add(clave)
+            alias.append((clave, clave.title()))
+    return alias
+
+
+def con_errores(clave: Text, ediciones: int, rng: random.Random) -> Text:
+    """La clave con `ediciones` sustituciones, inserciones, borrados o transposiciones."""
+    letras = list(clave)
+    for _ in range(ediciones):
+        posicion = rng.randrange(len(letras))
+        operacion = rng.randrange(4)
+        if operacion == 0:
+            letras[posicion] = rng.choice(string.ascii_lowercase)
+        elif operacion == 1:
+            letras.insert(posicion, rng.choice(string.ascii_lowercase))
+        elif operacion == 2 and len(letras) > 1:
+            del letras[posicion]
+        elif posicion + 1 < len(letras):
+            letras[posicion], letras[posicion + 1] = letras[posicion + 1], letras[posicion]
+    return "".join(letras)
+
+
+def buscar_ingenuo(alias: List[Alias], texto: Text, umbral: float) -> Optional[Text]:
+    """Distancia acotada contra todo el catálogo: la referencia de exactitud."""
+    clave = normalizar_clave(texto)
+    if not LONGITUD_MINIMA <= len(clave) <= LONGITUD_MAXIMA:
+        return None
+    mejor, nombre = umbral, None
+    for candidato, nombre_candidato in alias:
+        largo = max(len(clave), len(candidato))
+        limite = min(distancia_permitida(len(clave), umbral), distancia_permitida(len(candidato), umbral),
+                     int((1 - mejor) * largo + 1e-9))
+        distancia = distancia_acotada(clave, candidato, limite)
+        if distancia is not None and (1 - distancia / largo > mejor or nombre is None):
+            mejor, nombre = 1 - distancia / largo, nombre_candidato
+    return nombre
+
+
+def medir(funcion: Callable[[Text], object], consultas: List[Text]) -> Dict[Text, float]:
+    latencias = []
+    reloj = time.perf_counter_ns
+    for texto in consultas:
+        inicio = reloj()
+        funcion(texto)
+        latencias.append(reloj() - inicio)
+    return comun.resumir_latencias(latencias)
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de la búsqueda aproximada de operadores")
+    parser.add_argument("--alias", default="1000,10000,50000", help="Tamaños de catálogo separados por comas")
+    parser.add_argument("--consultas", type=int, default=5000, help="Consultas medidas por caso")
+    parser.add_argument("--muestra-ingenua", type=int, default=300,
+                        help="Consultas comparadas contra el recorrido ingenuo por tamaño")
+    parser.add_argument("--umbral-confianza", type=float, default=UMBRAL_DIFUSO)
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--umbral", type=float, default=0.15)
+    parser.add_argument("--tolerancia-us", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.semilla)
+    resultados: Dict[Text, Dict[Text, float]] = {}
+    exactitud: Dict[Text, Dict[Text, float]] = {}
+    filas = []
+
+    for total in (int(n) for n in args.alias.split(",")):
+        alias = catalogo_sintetico(total, rng)
+        inicio = time.perf_counter()
+        indice = IndiceDifuso(alias, args.umbral_confianza)
+        construccion_ms = (time.perf_counter() - inicio) * 1e3
+
+        objetivos = [rng.choice(alias) for _ in range(args.consultas)]
+        casos = {
+            "exacto": [clave for clave, _ in objetivos],
+            "1_edicion": [con_errores(clave, 1, rng) for clave, _ in objetivos],
+            "2_ediciones": [con_errores(clave, 2, rng) for clave, _ in objetivos],
+            "texto_libre": [rng.choice(_TEXTO_LIBRE) for _ in range(args.consultas)],
+        }
+
+        for caso, consultas in casos.items():
+            resultado = medir(indice.buscar, consultas)
+            resultados[f"{total}/{caso}"] = resultado
+            filas.append([total, caso, resultado["ops_por_segundo"], resultado["p50_us"],
+                          resultado["p95_us"], resultado["p99_us"]])
+
+        # Exactitud: mismo operador que el recorrido ingenuo y operador correcto
+        muestra = list(range(min(args.muestra_ingenua, args.consultas)))
+        iguales = correctos = 0
+        latencias_ingenuas = []
+        for i in muestra:
+            texto = casos["1_edicion"][i]
+            inicio_ns = time.perf_counter_ns()
+            esperado = buscar_ingenuo(alias, texto, args.umbral_confianza)
+            latencias_ingenuas.append(time.perf_counter_ns() - inicio_ns)
+            coincidencia = indice.buscar(texto)
+            obtenido = coincidencia.nombre if coincidencia else None
+            iguales += obtenido == esperado
+            correctos += obtenido == objetivos[i][1]
+        ingenuo = comun.resumir_latencias(latencias_ingenuas)
+        resultados[f"{total}/ingenuo_1_edicion"] = ingenuo
+        filas.append([total, "ingenuo_1_edicion", ingenuo["ops_por_segundo"], ingenuo["p50_us"],
+                      ingenuo["p95_us"], ingenuo["p99_us"]])
+        exactitud[str(total)] = {
+            "igual_a_ingenuo": round(iguales / len(muestra), 4),
+            "operador_correcto_1_edicion": round(correctos / len(muestra), 4),
+            "construccion_ms": round(construccion_ms, 1),
+            "variantes": indice.variantes,
+        }
+
+    comun.imprimir_tabla(filas, ("alias", "caso", "ops/s", "p50 µs", "p95 µs", "p99 µs"))
+    print()
+    for total, datos in exactitud.items():
+        print(f"{total} alias: índice de {datos['variantes']} variantes construido en {datos['construccion_ms']} ms, "
+              f"igual al recorrido ingenuo {datos['igual_a_ingenuo']:.1%}, "
+              f"operador correcto con 1 edición {datos['operador_correcto_1_edicion']:.1%}")
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "consultas": args.consultas, "semilla": args.semilla,
+                      "umbral_confianza": args.umbral_confianza},
+        "resultados": resultados,
+        "exactitud": exactitud,
+    })
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.baseline:
+        base = comun.cargar_json(args.baseline)["resultados"]
+        regresiones = comun.comparar(resultados, base, args.umbral, args.tolerancia_us)
+        comun.imprimir_regresiones(regresiones, args.umbral)
+        if regresiones:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
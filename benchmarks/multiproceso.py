@@ -0,0 +1,248 @@
+"""
+Escalado del servidor de acciones con varios trabajadores (servidor_acciones.py).
+
+Para cada número de trabajadores levanta el servidor en un puerto libre,
+espera a `/ready` y lo satura durante `--duracion` segundos con llamadas a
+`/webhook` (inicios de sesión con mensajes de Node-RED para todo el catálogo
+y opciones del menú), generadas desde varios procesos cliente para que el
+cliente no sea el cuello de botella. Reporta peticiones por segundo,
+percentiles de latencia y la memoria del conjunto de procesos: RSS suma las
+páginas compartidas una vez por proceso, PSS las reparte, así que con el
+snapshot compartido por copy-on-write el PSS total crece mucho menos que
+trabajadores × RSS de uno.
+
+Uso:
+    python -m benchmarks.multiproceso
+    python -m benchmarks.multiproceso --trabajadores 1,2,4,8 --duracion 20
+
+En una máquina con menos núcleos que trabajadores el throughput deja de
+crecer; `cpus` queda en los metadatos del JSON de resultados.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+import aiohttp
+
+from benchmarks import comun
+from benchmarks.acciones import corpus_elegir_opcion, corpus_inicio_sesion
+
+RUTA_SALIDA = "benchmarks/resultados/multiproceso.json"
+
+# Versión de Rasa que se envía en las llamadas, como lo hace el servidor de Rasa
+_VERSION_RASA = "3.6.21"
+
+
+def llamadas_webhook(semilla: int) -> List[Dict[Text, Any]]:
+    """Cuerpos de `/webhook` tal como los envía Rasa, en orden aleatorio."""
+    rng = random.Random(semilla)
+    casos = [("action_session_start", texto, slots)
+             for lista in corpus_inicio_sesion(rng).values() for texto, slots in lista]
+    casos += [("action_elegir_opcion", texto, slots)
+              for lista in corpus_elegir_opcion(rng).values() for texto, slots in lista]
+    rng.shuffle(casos)
+    return [
+        {
+            "next_action": accion,
+            "sender_id": f"multiproceso-{i}",
+            "version": _VERSION_RASA,
+            "domain": {},
+            "tracker": {
+                "sender_id": f"multiproceso-{i}",
+                "slots": slots,
+                "latest_message": {"text": texto, "intent": {}, "entities": []},
+                "events": [],
+                "paused": False,
+                "followup_action": None,
+                "active_loop": {},
+                "latest_action_name": "action_listen",
+            },
+        }
+        for i, (accion, texto, slots) in enumerate(casos)
+    ]
+
+
+def puerto_libre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def memoria_procesos(pid_padre: int) -> Dict[Text, float]:
+    """RSS y PSS (MB) del padre y sus hijos según /proc/<pid>/smaps_rollup."""
+    pids = [pid_padre]
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as archivo:
+                if int(archivo.read().rsplit(")", 1)[1].split()[1]) == pid_padre:
+                    pids.append(int(entrada))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    totales = {"rss_mb": 0.0, "pss_mb": 0.0, "procesos": 0}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as archivo:
+                campos = {clave: valor for clave, _, valor in (linea.partition(":") for linea in archivo)
+                          if clave.isalpha()}
+        except OSError:
+            continue
+        totales["rss_mb"] += int(campos["Rss"].split()[0]) / 1024
+        totales["pss_mb"] += int(campos["Pss"].split()[0]) / 1024
+        totales["procesos"] += 1
+    return {clave: round(valor, 1) for clave, valor in totales.items()}
+
+
+def esperar_listo(url: Text, proceso: subprocess.Popen, plazo: float = 120.0) -> None:
+    """Espera a que `/ready` responda 200 varias veces seguidas (uno por trabajador)."""
+    import urllib.error
+    import urllib.request
+
+    limite = time.monotonic() + plazo
+    seguidas = 0
+    while seguidas < 10:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó con código {proceso.returncode}")
+        if time.monotonic() > limite:
+            raise RuntimeError(f"{url}/ready no respondió 200 en {plazo:.0f}s")
+        try:
+            with urllib.request.urlopen(f"{url}/ready", timeout=2) as respuesta:
+                seguidas = seguidas + 1 if respuesta.status == 200 else 0
+        except (urllib.error.URLError, OSError):
+            seguidas = 0
+            time.sleep(0.2)
+
+
+async def _saturar(url: Text, llamadas: List[Dict[Text, Any]], concurrencia: int,
+                   duracion: float) -> Tuple[List[int], int]:
+    latencias: List[int] = []
+    errores = 0
+    fin = time.perf_counter() + duracion
+    reloj = time.perf_counter_ns
+
+    async def cliente(sesion: aiohttp.ClientSession, desplazamiento: int) -> None:
+        nonlocal errores
+        i = desplazamiento
+        while time.perf_counter() < fin:
+            cuerpo = llamadas[i % len(llamadas)]
+            i += concurrencia
+            inicio = reloj()
+            try:
+                async with sesion.post(f"{url}/webhook", json=cuerpo) as respuesta:
+                    await respuesta.read()
+                    if respuesta.status != 200:
+                        errores += 1
+                        continue
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                errores += 1
+                continue
+            latencias.append(reloj() - inicio)
+
+    conector = aiohttp.TCPConnector(limit=concurrencia)
+    async with aiohttp.ClientSession(connector=conector, timeout=aiohttp.ClientTimeout(total=30)) as sesion:
+        await asyncio.gather(*(cliente(sesion, i) for i in range(concurrencia)))
+    return latencias, errores
+
+
+def proceso_cliente(url: Text, semilla: int, concurrencia: int, duracion: float) -> Tuple[List[int], int]:
+    """Punto de entrada de cada proceso cliente."""
+    return asyncio.run(_saturar(url, llamadas_webhook(semilla), concurrencia, duracion))
+
+
+def medir(trabajadores: int, clientes: int, concurrencia: int, duracion: float,
+          semilla: int) -> Dict[Text, Any]:
+    """Levanta el servidor con `trabajadores` procesos y lo satura."""
+    puerto = puerto_libre()
+    url = f"http://127.0.0.1:{puerto}"
+    entorno = {**os.environ, "BOTMOBILE_CONTENIDO_INTERVALO": "0", "BOTMOBILE_LOG_LEVEL": "WARNING"}
+    servidor = subprocess.Popen(
+        [sys.executable, "servidor_acciones.py", "--port", str(puerto),
+         "--workers", str(trabajadores), "--quiet"],
+        env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        esperar_listo(url, servidor)
+        memoria_reposo = memoria_procesos(servidor.pid)
+
+        with concurrent.futures.ProcessPoolExecutor(clientes) as ejecutor:
+            inicio = time.perf_counter()
+            partes = list(ejecutor.map(
+                proceso_cliente,
+                [url] * clientes,
+                [semilla + i for i in range(clientes)],
+                [concurrencia] * clientes,
+                [duracion] * clientes,
+            ))
+            duracion_real = time.perf_counter() - inicio
+        memoria_carga = memoria_procesos(servidor.pid)
+    finally:
+        servidor.send_signal(signal.SIGTERM)
+        try:
+            servidor.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            servidor.kill()
+
+    latencias = [latencia for parte, _ in partes for latencia in parte]
+    resultado = comun.resumir_latencias(latencias) if latencias else {"llamadas": 0}
+    # Throughput del servidor, no el inverso de la latencia
+    resultado["ops_por_segundo"] = round(len(latencias) / duracion_real, 1)
+    resultado["errores"] = sum(errores for _, errores in partes)
+    resultado["memoria_reposo"] = memoria_reposo
+    resultado["memoria_carga"] = memoria_carga
+    return resultado
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    por_defecto = ",".join(str(n) for n in sorted({1, 2, max(1, cpus // 2), cpus}))
+
+    parser = argparse.ArgumentParser(description="Escalado del servidor de acciones de 1 a N trabajadores")
+    parser.add_argument("--trabajadores", default=por_defecto, help="Lista separada por comas")
+    parser.add_argument("--clientes", type=int, default=max(2, cpus // 2), help="Procesos que generan carga")
+    parser.add_argument("--concurrencia", type=int, default=16, help="Peticiones simultáneas por cliente")
+    parser.add_argument("--duracion", type=float, default=15.0, help="Segundos de carga por configuración")
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    resultados: Dict[Text, Any] = {}
+    filas = []
+    base: Optional[float] = None
+    for trabajadores in (int(n) for n in args.trabajadores.split(",")):
+        print(f"Midiendo con {trabajadores} trabajador(es)...")
+        resultado = medir(trabajadores, args.clientes, args.concurrencia, args.duracion, args.semilla)
+        resultados[f"trabajadores_{trabajadores}"] = resultado
+        base = base or resultado["ops_por_segundo"]
+        memoria = resultado["memoria_carga"]
+        filas.append([
+            trabajadores, resultado["ops_por_segundo"],
+            f"{resultado['ops_por_segundo'] / base:.2f}x" if base else "-",
+            resultado.get("p50_us", 0), resultado.get("p95_us", 0), resultado["errores"],
+            memoria["rss_mb"], memoria["pss_mb"],
+        ])
+
+    comun.imprimir_tabla(filas, ("trabajadores", "pet/s", "escalado", "p50 µs", "p95 µs",
+                                 "errores", "RSS MB", "PSS MB"))
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "clientes": args.clientes, "concurrencia": args.concurrencia,
+                      "duracion_s": args.duracion},
+        "resultados": resultados,
+    })
+    print(f"Resultados guardados en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
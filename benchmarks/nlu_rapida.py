@@ -0,0 +1,190 @@
+"""
+Benchmark del atajo de NLU (extensiones/nlu_rapida.py) contra el pipeline
+completo de siempre.
+
+Entrena (o carga) dos modelos solo de NLU con los mismos datos: uno con el
+`config.yml` actual y otro con el pipeline de Rasa sin el atajo, derivado del
+mismo archivo. Con cada uno mide la latencia de `Agent.parse_message` por tipo
+de mensaje (dígito del menú, botón del menú, mensaje de Node-RED, nombre de
+operador, palabra común del catálogo, texto libre), cuenta en cuántos
+mensajes ambos modelos coinciden en el intent y
+muestra los aciertos por ruta del atajo. Las palabras comunes que también
+son operadores del catálogo ("valor", "rosa") tienen que ir al pipeline: si
+el atajo resuelve alguna, el benchmark termina con error.
+
+Uso:
+    python -m benchmarks.nlu_rapida
+    python -m benchmarks.nlu_rapida --modelo-base models/base.tar.gz --modelo-rapido models/rapido.tar.gz
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+import yaml
+
+from actions.menu import MENU
+from actions.operadores import REGISTRY
+from benchmarks import comun
+from benchmarks.carga import RUTA_DATOS, ejemplos_nlu, mensaje_inicio
+
+RUTA_SALIDA = "benchmarks/resultados/nlu_rapida.json"
+RUTA_CONFIG = "config.yml"
+
+_PREFIJO_RAPIDO = "extensiones.nlu_rapida."
+
+# Nombres del catálogo sin `nombre_directo`: el atajo no debe resolverlos
+PALABRAS_COMUNES = ("valor", "next", "king", "negocios", "cobranza", "marketing", "rosa")
+
+
+def config_sin_atajo(ruta_config: Text, destino: Text) -> Text:
+    """Escribe el config.yml equivalente con los componentes de Rasa originales."""
+    with open(ruta_config, encoding="utf-8") as archivo:
+        config = yaml.safe_load(archivo)
+    pipeline = []
+    for componente in config["pipeline"]:
+        nombre = componente["name"]
+        if nombre == _PREFIJO_RAPIDO + "NLURapida":
+            continue
+        if nombre.startswith(_PREFIJO_RAPIDO) and nombre.endswith("Rapido"):
+            nombre = nombre[len(_PREFIJO_RAPIDO):-len("Rapido")]
+        pipeline.append({**componente, "name": nombre})
+    config["pipeline"] = pipeline
+    with open(destino, "w", encoding="utf-8") as archivo:
+        yaml.safe_dump(config, archivo, allow_unicode=True, sort_keys=False)
+    return destino
+
+
+def entrenar(config: Text, salida: Text, nombre: Text) -> Text:
+    from rasa.model_training import train_nlu
+
+    inicio = time.perf_counter()
+    modelo = train_nlu(config, os.path.join(RUTA_DATOS, "nlu.yml"), salida, fixed_model_name=nombre)
+    if modelo is None:
+        raise RuntimeError(f"No se pudo entrenar el modelo con {config}")
+    print(f"Modelo {nombre} entrenado en {time.perf_counter() - inicio:.1f}s")
+    return modelo
+
+
+def corpus(rng: random.Random, por_tipo: int) -> List[Tuple[Text, Text]]:
+    """(tipo, texto) mezclados con la proporción de cada tipo."""
+    ejemplos = ejemplos_nlu(os.path.join(RUTA_DATOS, "nlu.yml"))
+    libres = [texto for intent, textos in ejemplos.items()
+              if intent not in ("elegir_opcion", "seleccionar_opcion", "informar_compania")
+              for texto in textos]
+    postbacks = [MENU.postback(estado, opcion) for estado in MENU.pantallas for opcion in MENU.opciones(estado)]
+    generadores = {
+        "digito": lambda: rng.choice("0123456789"),
+        "boton": lambda: rng.choice(postbacks),
+        "node_red": lambda: mensaje_inicio(rng),
+        "nombre_operador": lambda: rng.choice(REGISTRY.directos),
+        "palabra_comun": lambda: rng.choice(PALABRAS_COMUNES),
+        "texto_libre": lambda: rng.choice(libres),
+    }
+    mensajes = [(tipo, generar()) for tipo, generar in generadores.items() for _ in range(por_tipo)]
+    rng.shuffle(mensajes)
+    return mensajes
+
+
+async def medir(modelo: Text, mensajes: List[Tuple[Text, Text]],
+                calentamiento: int) -> Tuple[Dict[Text, Dict[Text, float]], List[Optional[Text]]]:
+    """Latencias por tipo de mensaje y el intent predicho para cada uno."""
+    from rasa.core.agent import Agent
+
+    agente = Agent.load(modelo)
+    for _, texto in mensajes[:calentamiento]:
+        await agente.parse_message(texto)
+
+    latencias: Dict[Text, List[int]] = {}
+    intents = []
+    reloj = time.perf_counter_ns
+    for tipo, texto in mensajes:
+        inicio = reloj()
+        resultado = await agente.parse_message(texto)
+        latencias.setdefault(tipo, []).append(reloj() - inicio)
+        intents.append((resultado.get("intent") or {}).get("name"))
+
+    return {tipo: comun.resumir_latencias(valores) for tipo, valores in sorted(latencias.items())}, intents
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del atajo de NLU contra el pipeline completo")
+    parser.add_argument("--modelo-base", help="Modelo ya entrenado sin el atajo")
+    parser.add_argument("--modelo-rapido", help="Modelo ya entrenado con config.yml")
+    parser.add_argument("--config", default=RUTA_CONFIG)
+    parser.add_argument("--mensajes", type=int, default=500, help="Mensajes medidos por tipo")
+    parser.add_argument("--calentamiento", type=int, default=50)
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--umbral", type=float, default=0.15)
+    parser.add_argument("--tolerancia-us", type=float, default=50.0)
+    args = parser.parse_args(argv)
+
+    from extensiones.nlu_rapida import resolver_rapido
+
+    # Negativos: sin modelo, solo el atajo
+    atajadas = {palabra: resolver_rapido(palabra)[0] for palabra in PALABRAS_COMUNES if resolver_rapido(palabra)}
+    if atajadas:
+        print(f"Palabras comunes resueltas por el atajo en lugar del pipeline: {atajadas}")
+        return 1
+
+    mensajes = corpus(random.Random(args.semilla), args.mensajes)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        modelo_base = args.modelo_base or entrenar(
+            config_sin_atajo(args.config, os.path.join(directorio, "config_base.yml")), directorio, "base"
+        )
+        modelo_rapido = args.modelo_rapido or entrenar(args.config, directorio, "rapido")
+
+        base, intents_base = asyncio.run(medir(modelo_base, mensajes, args.calentamiento))
+
+        from extensiones import nlu_rapida
+        nlu_rapida.ACIERTOS_NLU_RAPIDA.reiniciar()
+        rapido, intents_rapido = asyncio.run(medir(modelo_rapido, mensajes, args.calentamiento))
+        aciertos = nlu_rapida.estadisticas()
+
+    resultados: Dict[Text, Any] = {}
+    filas = []
+    for tipo in base:
+        resultados[f"base/{tipo}"] = base[tipo]
+        resultados[f"rapido/{tipo}"] = rapido[tipo]
+        aceleracion = base[tipo]["p50_us"] / rapido[tipo]["p50_us"] if rapido[tipo]["p50_us"] else 0.0
+        filas.append([tipo, base[tipo]["p50_us"], rapido[tipo]["p50_us"],
+                      base[tipo]["p95_us"], rapido[tipo]["p95_us"], f"{aceleracion:.1f}x"])
+
+    comun.imprimir_tabla(filas, ("tipo", "base p50 µs", "atajo p50 µs", "base p95 µs", "atajo p95 µs", "p50"))
+
+    diferencias: Dict[Text, int] = {}
+    for (tipo, _), intent_base, intent_rapido in zip(mensajes, intents_base, intents_rapido):
+        if intent_base != intent_rapido:
+            diferencias[tipo] = diferencias.get(tipo, 0) + 1
+    coincidencia = 1 - sum(diferencias.values()) / len(mensajes)
+    print(f"\nIntent igual en ambos modelos: {coincidencia:.1%}  diferencias por tipo: {diferencias or '-'}")
+    print(f"Aciertos del atajo por ruta: {aciertos}")
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "mensajes_por_tipo": args.mensajes, "semilla": args.semilla},
+        "resultados": resultados,
+        "aciertos": aciertos,
+        "coincidencia_intent": round(coincidencia, 4),
+        "diferencias": diferencias,
+    })
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.baseline:
+        anterior = comun.cargar_json(args.baseline)["resultados"]
+        regresiones = comun.comparar(resultados, anterior, args.umbral, args.tolerancia_us)
+        comun.imprimir_regresiones(regresiones, args.umbral)
+        if regresiones:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
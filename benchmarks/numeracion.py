@@ -0,0 +1,115 @@
+"""
+Benchmark del índice de numeración.
+
+Genera un plan de numeración sintético del tamaño del real (cientos de miles
+de rangos), lo escribe con `escribir_indice` y mide el tiempo de apertura por
+mmap y la latencia de `IndiceNumeracion.resolver` para números asignados y
+no asignados.
+
+Uso:
+    python -m benchmarks.numeracion
+    python -m benchmarks.numeracion --rangos 500000 --baseline benchmarks/resultados/numeracion_base.json
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Text
+
+from actions.numeracion import IndiceNumeracion, Rango, escribir_indice
+from benchmarks import comun
+
+RUTA_SALIDA = "benchmarks/resultados/numeracion.json"
+
+_OPERADORES = ("Telcel", "Movistar", "AT&T", "Unefon", "Altan Redes", "Virgin Mobile", "Megacable", "Izzi")
+
+
+def plan_sintetico(total: int, rng: random.Random) -> List[Rango]:
+    """Rangos disjuntos de 10 dígitos con huecos, como el plan real."""
+    rangos = []
+    inicio = 2_000_000_000
+    for _ in range(total):
+        inicio += rng.choice((0, 0, 0, 1000, 5000))
+        tamano = rng.choice((1000, 1000, 1000, 10000))
+        rangos.append((inicio, inicio + tamano - 1, rng.choice(_OPERADORES)))
+        inicio += tamano
+    return rangos
+
+
+def medir_consultas(indice: IndiceNumeracion, numeros: List[Text]) -> Dict[Text, float]:
+    latencias = []
+    reloj = time.perf_counter_ns
+    resolver = indice.resolver
+    for numero in numeros:
+        inicio = reloj()
+        resolver(numero)
+        latencias.append(reloj() - inicio)
+    return comun.resumir_latencias(latencias)
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del índice de numeración")
+    parser.add_argument("--rangos", type=int, default=300000, help="Rangos del plan sintético")
+    parser.add_argument("--consultas", type=int, default=200000, help="Consultas medidas por caso")
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--umbral", type=float, default=0.15)
+    parser.add_argument("--tolerancia-us", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.semilla)
+    rangos = plan_sintetico(args.rangos, rng)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "numeracion.idx")
+
+        inicio = time.perf_counter()
+        escritos = escribir_indice(rangos, ruta)
+        construccion_s = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        indice = IndiceNumeracion.desde_archivo(ruta)
+        apertura_ms = (time.perf_counter() - inicio) * 1e3
+
+        asignados = []
+        for _ in range(args.consultas):
+            primero, ultimo, _ = rangos[rng.randrange(len(rangos))]
+            asignados.append(f"+52 1 {rng.randint(primero, ultimo)}")
+        sin_asignar = [str(rng.randint(1_000_000_000, 1_999_999_999)) for _ in range(args.consultas)]
+
+        resultados = {
+            "resolver/asignado": medir_consultas(indice, asignados),
+            "resolver/sin_asignar": medir_consultas(indice, sin_asignar),
+        }
+        tamano_mb = os.path.getsize(ruta) / 1e6
+
+    comun.imprimir_tabla(
+        ([caso, r["ops_por_segundo"], r["p50_us"], r["p95_us"], r["p99_us"]] for caso, r in resultados.items()),
+        ("caso", "ops/s", "p50 µs", "p95 µs", "p99 µs"),
+    )
+    print(f"\n{escritos} rangos ({tamano_mb:.1f} MB) construidos en {construccion_s:.2f}s, "
+          f"abiertos con mmap en {apertura_ms:.2f} ms")
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "rangos": escritos, "consultas": args.consultas},
+        "indice": {"construccion_s": round(construccion_s, 3), "apertura_ms": round(apertura_ms, 3),
+                   "tamano_mb": round(tamano_mb, 2)},
+        "resultados": resultados,
+    })
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.baseline:
+        base = comun.cargar_json(args.baseline)["resultados"]
+        regresiones = comun.comparar(resultados, base, args.umbral, args.tolerancia_us)
+        comun.imprimir_regresiones(regresiones, args.umbral)
+        if regresiones:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+Comparación de configuraciones de pipeline y políticas.
+
+El comentario de config.yml dice que está optimizado para entrenar rápido y
+el Dockerfile corre `rasa train` en cada build, pero nada lo medía. Este
+benchmark toma un conjunto de candidatos -variantes de config.yml (épocas de
+DIET, featurizers, `ClasificadorNGramas` en lugar de DIET, `max_history` y
+épocas de TED) y, si se pasan, otros
+archivos de configuración- y para cada uno:
+
+1. Entrena el modelo completo (`rasa train` con `data/`) en un subproceso
+   con un directorio de cache de Rasa vacío, para que no reutilice nada de
+   otro candidato, y registra el tiempo de reloj, la memoria máxima (RSS del
+   subproceso, de `os.wait4`) y el tamaño del modelo.
+2. Carga el modelo en un proceso nuevo (arranque en frío: importar Rasa y
+   `Agent.load`) y registra el tiempo y la RSS máxima de ese proceso, que es
+   lo que ocupa un contenedor sirviendo ese modelo.
+3. Carga el modelo y mide la latencia de parseo de un mensaje a la vez
+   (`Agent.parse_message`) y por lotes (el grafo de NLU con `--lote`
+   mensajes por llamada, tiempo por mensaje).
+4. Hace validación cruzada de NLU (`--folds`) y reporta la F1 de intents y
+   la de entidades por extractor, promediadas entre folds.
+
+Los pasos 3 y 4 corren en procesos aparte (`spawn`) y este proceso nunca
+importa Rasa: un hijo recién creado parte de una copia del padre y Linux le
+hereda su pico de RSS, así que con el padre cargando modelos la RSS de los
+pasos 1 y 2 de un candidato incluiría la de los anteriores.
+
+Todo queda en una tabla y en un JSON para elegir la configuración con números.
+
+Uso:
+    python -m benchmarks.pipelines
+    python -m benchmarks.pipelines --candidatos actual,diet_10_epocas,ted_historia_3 --folds 5
+    python -m benchmarks.pipelines --candidatos actual,clasificador_ngramas
+    python -m benchmarks.pipelines --candidatos actual --extra otra_config.yml
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import copy
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Text
+
+import yaml
+
+from benchmarks import comun
+from benchmarks.nlu_rapida import RUTA_CONFIG, corpus
+
+RUTA_SALIDA = "benchmarks/resultados/pipelines.json"
+RUTA_DATOS = "data"
+RUTA_DOMINIO = "domain.yml"
+
+Config = Dict[Text, Any]
+
+
+def _componente(config: Config, clave: Text, sufijo: Text) -> Dict[Text, Any]:
+    """Primer componente de `pipeline` o `policies` cuyo nombre termina en `sufijo`."""
+    for componente in config[clave]:
+        if componente["name"].endswith(sufijo):
+            return componente
+    raise KeyError(f"No hay un componente '{sufijo}' en {clave}")
+
+
+def _ajustar(clave: Text, sufijo: Text, **cambios: Any) -> Callable[[Config], None]:
+    def aplicar(config: Config) -> None:
+        _componente(config, clave, sufijo).update(cambios)
+    return aplicar
+
+
+def _quitar(sufijo: Text) -> Callable[[Config], None]:
+    def aplicar(config: Config) -> None:
+        config["pipeline"].remove(_componente(config, "pipeline", sufijo))
+    return aplicar
+
+
+def _ngramas_caracteres(config: Config) -> None:
+    """Segundo CountVectorsFeaturizer con n-gramas de caracteres."""
+    pipeline = config["pipeline"]
+    palabras = _componente(config, "pipeline", "CountVectorsFeaturizerRapido")
+    pipeline.insert(pipeline.index(palabras) + 1, {
+        "name": palabras["name"], "analyzer": "char_wb", "min_ngram": 1, "max_ngram": 4,
+    })
+
+
+def _clasificador_ngramas(config: Config) -> None:
+    """DIET y sus featurizers reemplazados por ClasificadorNGramas; entidades solo por regex/lookup."""
+    pipeline = config["pipeline"]
+    for sufijo in ("RegexFeaturizerRapido", "LexicalSyntacticFeaturizerRapido",
+                   "CountVectorsFeaturizerRapido", "DIETClassifierRapido"):
+        while any(componente["name"].endswith(sufijo) for componente in pipeline):
+            pipeline.remove(_componente(config, "pipeline", sufijo))
+    # El tokenizador se queda: sin tokens la evaluación de Rasa no puede
+    # alinear las entidades predichas con las anotadas y da F1 0 al extractor
+    tokenizador = _componente(config, "pipeline", "WhitespaceTokenizerRapido")
+    pipeline.insert(pipeline.index(tokenizador) + 1,
+                    {"name": "extensiones.clasificador_ngramas.ClasificadorNGramas"})
+
+    # Sin DIET, las entidades de operador salen de la tabla de búsqueda, y el
+    # mapeo de sinónimos tiene que ir después del extractor
+    extractor = _componente(config, "pipeline", "RegexEntityExtractorRapido")
+    extractor["use_lookup_tables"] = True
+    pipeline.remove(extractor)
+    pipeline.insert(pipeline.index(_componente(config, "pipeline", "EntitySynonymMapperRapido")), extractor)
+
+
+# Variantes de config.yml; cada una modifica una copia del config
+CANDIDATOS: Dict[Text, Callable[[Config], None]] = {
+    "actual": lambda config: None,
+    "diet_10_epocas": _ajustar("pipeline", "DIETClassifierRapido", epochs=10),
+    "diet_40_epocas": _ajustar("pipeline", "DIETClassifierRapido", epochs=40),
+    "sin_lexico": _quitar("LexicalSyntacticFeaturizerRapido"),
+    "ngramas_caracteres": _ngramas_caracteres,
+    "clasificador_ngramas": _clasificador_ngramas,
+    "ted_historia_3": _ajustar("policies", "TEDPolicy", max_history=3),
+    "ted_historia_8": _ajustar("policies", "TEDPolicy", max_history=8),
+    "ted_100_epocas": _ajustar("policies", "TEDPolicy", epochs=100),
+}
+
+
+def escribir_candidato(base: Config, nombre: Text, destino: Text) -> Text:
+    config = copy.deepcopy(base)
+    CANDIDATOS[nombre](config)
+    with open(destino, "w", encoding="utf-8") as archivo:
+        yaml.safe_dump(config, archivo, allow_unicode=True, sort_keys=False)
+    return destino
+
+
+def entrenar(config: Text, datos: Text, directorio: Text, nombre: Text) -> Dict[Text, Any]:
+    """Entrena en un subproceso; tiempo, RSS máxima y tamaño del modelo."""
+    entorno = {
+        **os.environ,
+        "RASA_CACHE_DIRECTORY": os.path.join(directorio, f"cache_{nombre}"),
+        "TF_CPP_MIN_LOG_LEVEL": "2",
+    }
+    registro = os.path.join(directorio, f"entrenamiento_{nombre}.log")
+    comando = [sys.executable, "-m", "rasa", "train", "--config", config, "--domain", RUTA_DOMINIO,
+               "--data", datos, "--out", directorio, "--fixed-model-name", nombre]
+
+    with open(registro, "w", encoding="utf-8") as salida:
+        inicio = time.perf_counter()
+        proceso = subprocess.Popen(comando, env=entorno, stdout=salida, stderr=subprocess.STDOUT)
+        # wait4 da el uso de recursos de este hijo, no el acumulado de todos
+        _, estado, uso = os.wait4(proceso.pid, 0)
+        segundos = time.perf_counter() - inicio
+        proceso.returncode = os.waitstatus_to_exitcode(estado)
+
+    modelo = os.path.join(directorio, f"{nombre}.tar.gz")
+    if proceso.returncode != 0 or not os.path.exists(modelo):
+        with open(registro, encoding="utf-8") as archivo:
+            cola = archivo.read()[-2000:]
+        raise RuntimeError(f"Falló el entrenamiento de {nombre} (código {proceso.returncode}):\n{cola}")
+
+    return {
+        "modelo": modelo,
+        "entrenamiento_s": round(segundos, 2),
+        "rss_maxima_mb": round(uso.ru_maxrss / 1024, 1),
+        "modelo_mb": round(os.path.getsize(modelo) / 1e6, 2),
+    }
+
+
+_CARGAR_MODELO = """
+import sys, time
+inicio = time.perf_counter()
+from rasa.core.agent import Agent
+agente = Agent.load(sys.argv[1])
+print(time.perf_counter() - inicio)
+"""
+
+
+def medir_arranque(modelo: Text) -> Dict[Text, Any]:
+    """Arranque en frío: importar Rasa y cargar el modelo en un proceso nuevo, con su RSS máxima."""
+    entorno = {**os.environ, "TF_CPP_MIN_LOG_LEVEL": "2"}
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen([sys.executable, "-c", _CARGAR_MODELO, modelo], env=entorno,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    salida = proceso.stdout.read()
+    _, estado, uso = os.wait4(proceso.pid, 0)
+    segundos = time.perf_counter() - inicio
+    proceso.returncode = os.waitstatus_to_exitcode(estado)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"No se pudo cargar {modelo} (código {proceso.returncode})")
+    return {
+        "arranque_s": round(segundos, 2),
+        "carga_modelo_s": round(float(salida.strip().splitlines()[-1]), 2),
+        "rss_servicio_mb": round(uso.ru_maxrss / 1024, 1),
+    }
+
+
+async def medir_parseo(modelo: Text, textos: List[Text], lote: int, calentamiento: int) -> Dict[Text, Any]:
+    """Latencia de un mensaje a la vez y tiempo por mensaje en lotes."""
+    from rasa.core.agent import Agent
+    from rasa.core.channels.channel import UserMessage
+    from rasa.engine.constants import PLACEHOLDER_MESSAGE, PLACEHOLDER_TRACKER
+    from rasa.shared.core.trackers import DialogueStateTracker
+
+    agente = Agent.load(modelo)
+    for texto in textos[:calentamiento]:
+        await agente.parse_message(texto)
+
+    reloj = time.perf_counter_ns
+    individuales: List[int] = []
+    for texto in textos:
+        inicio = reloj()
+        await agente.parse_message(texto)
+        individuales.append(reloj() - inicio)
+
+    procesador = agente.processor
+    tracker = DialogueStateTracker("benchmark", [])
+    por_mensaje: List[int] = []
+    for desde in range(0, len(textos), lote):
+        mensajes = [UserMessage(texto) for texto in textos[desde:desde + lote]]
+        inicio = reloj()
+        procesador.graph_runner.run(
+            inputs={PLACEHOLDER_MESSAGE: mensajes, PLACEHOLDER_TRACKER: tracker},
+            targets=[procesador.model_metadata.nlu_target],
+        )
+        por_mensaje.extend([(reloj() - inicio) // len(mensajes)] * len(mensajes))
+
+    return {"individual": comun.resumir_latencias(individuales), "lote": comun.resumir_latencias(por_mensaje)}
+
+
+def medir_parseo_sincrono(modelo: Text, textos: List[Text], lote: int, calentamiento: int) -> Dict[Text, Any]:
+    """`medir_parseo` con su propio event loop, para correr en otro proceso."""
+    return asyncio.run(medir_parseo(modelo, textos, lote, calentamiento))
+
+
+def en_proceso_aparte(funcion: Callable[..., Any], *argumentos: Any) -> Any:
+    """Resultado de `funcion(*argumentos)` ejecutada en un proceso nuevo (`spawn`)."""
+    contexto = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=contexto) as ejecutor:
+        return ejecutor.submit(funcion, *argumentos).result()
+
+
+def validacion_cruzada(config: Text, datos_nlu: Text, folds: int) -> Dict[Text, Any]:
+    """F1 de intents y de entidades por extractor, promedio de los folds de prueba."""
+    from rasa.nlu.test import cross_validate
+    from rasa.shared.nlu.training_data.loading import load_data
+
+    inicio = time.perf_counter()
+    intents, entidades, _ = asyncio.run(cross_validate(
+        load_data(datos_nlu), folds, config, disable_plotting=True, report_as_dict=True,
+    ))
+    resultado: Dict[Text, Any] = {
+        "folds": folds,
+        "intent_f1": round(statistics.mean(intents.test["F1-score"]), 4),
+        "intent_accuracy": round(statistics.mean(intents.test["Accuracy"]), 4),
+        "entidades_f1": {extractor: round(statistics.mean(metricas["F1-score"]), 4)
+                         for extractor, metricas in sorted(entidades.test.items())},
+        "segundos": round(time.perf_counter() - inicio, 1),
+    }
+    return resultado
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compara configuraciones de pipeline y políticas")
+    parser.add_argument("--config", default=RUTA_CONFIG, help="Configuración base de las variantes")
+    parser.add_argument("--candidatos", default=",".join(CANDIDATOS),
+                        help=f"Variantes separadas por comas ({', '.join(CANDIDATOS)})")
+    parser.add_argument("--extra", nargs="*", default=[], help="Otros archivos de configuración a comparar")
+    parser.add_argument("--datos", default=RUTA_DATOS, help="Datos de entrenamiento (nlu, stories, rules)")
+    parser.add_argument("--folds", type=int, default=3, help="Folds de validación cruzada (0 la omite)")
+    parser.add_argument("--mensajes", type=int, default=200, help="Mensajes medidos por tipo")
+    parser.add_argument("--lote", type=int, default=32, help="Mensajes por llamada en el parseo por lotes")
+    parser.add_argument("--calentamiento", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    with open(args.config, encoding="utf-8") as archivo:
+        base = yaml.safe_load(archivo)
+    nombres = [nombre.strip() for nombre in args.candidatos.split(",") if nombre.strip()]
+    desconocidos = [nombre for nombre in nombres if nombre not in CANDIDATOS]
+    if desconocidos:
+        parser.error(f"Candidatos desconocidos: {', '.join(desconocidos)}")
+
+    textos = [texto for _, texto in corpus(random.Random(args.semilla), args.mensajes)]
+    datos_nlu = os.path.join(args.datos, "nlu.yml")
+    resultados: Dict[Text, Any] = {}
+    filas = []
+
+    with tempfile.TemporaryDirectory() as directorio:
+        configs = {nombre: escribir_candidato(base, nombre, os.path.join(directorio, f"{nombre}.yml"))
+                   for nombre in nombres}
+        configs.update({os.path.splitext(os.path.basename(ruta))[0]: ruta for ruta in args.extra})
+
+        for nombre, config in configs.items():
+            print(f"Candidato {nombre}: entrenando...")
+            resultado = entrenar(config, args.datos, directorio, nombre)
+            print(f"  {resultado['entrenamiento_s']}s; midiendo arranque y parseo...")
+            resultado.update(medir_arranque(resultado["modelo"]))
+            resultado.update(en_proceso_aparte(
+                medir_parseo_sincrono, resultado.pop("modelo"), textos, args.lote, args.calentamiento
+            ))
+            if args.folds > 1:
+                print(f"  validación cruzada con {args.folds} folds...")
+                resultado["validacion_cruzada"] = en_proceso_aparte(validacion_cruzada, config, datos_nlu,
+                                                                    args.folds)
+            resultados[nombre] = resultado
+
+            cruzada = resultado.get("validacion_cruzada", {})
+            entidades = cruzada.get("entidades_f1", {})
+            filas.append([
+                nombre, resultado["entrenamiento_s"], resultado["rss_maxima_mb"], resultado["modelo_mb"],
+                resultado["arranque_s"], resultado["rss_servicio_mb"],
+                resultado["individual"]["p50_us"], resultado["individual"]["p95_us"],
+                resultado["lote"]["media_us"], cruzada.get("intent_f1", "-"),
+                max(entidades.values()) if entidades else "-",
+            ])
+
+    comun.imprimir_tabla(filas, ("candidato", "entrenar s", "RSS MB", "modelo MB", "arranque s", "RSS servir MB",
+                                 "p50 µs", "p95 µs",
+                                 "lote µs/msg", "F1 intent", "F1 entidades"))
+
+    # Piso de la RSS heredada por los subprocesos medidos
+    rss_principal_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(f"RSS máxima de este proceso: {rss_principal_mb} MB")
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "config_base": args.config, "datos": args.datos,
+                      "folds": args.folds, "mensajes_por_tipo": args.mensajes, "lote": args.lote,
+                      "semilla": args.semilla, "rss_proceso_principal_mb": rss_principal_mb},
+        "resultados": resultados,
+    })
+    print(f"Resultados guardados en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
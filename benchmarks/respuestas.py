@@ -0,0 +1,129 @@
+"""
+Bytes por turno y latencia de las acciones con menús en texto y con botones.
+
+Recorre las mismas conversaciones en los dos formatos de actions/respuestas.py:
+inicio de sesión para cada operador del catálogo, cada transición del menú
+(en texto, el dígito escrito; con botones, el payload del botón con sus
+entidades, como lo deja `NLURapida`), fallback y despedida. Para cada
+(formato, acción) reporta los bytes que el turno manda al canal
+(`bytes_mensajes`, lo mismo que registra `botmobile_respuesta_bytes`; con
+botones incluye los payloads, que el usuario no ve) y la latencia de `run`
+con los mocks de `verificacion_final.py`.
+
+La tasa de fallback depende de lo que escriben los usuarios reales y no se
+simula aquí: sale de `botmobile_respuesta_bytes_count` por formato en
+producción (ver actions/respuestas.py).
+
+Uso:
+    python -m benchmarks.respuestas
+    python -m benchmarks.respuestas --repeticiones 200
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from actions.actions import ActionDefaultFallback, ActionElegirOpcion, ActionFinalizarConversacion, ActionSessionStart
+from actions.menu import MENU
+from actions.operadores import REGISTRY
+from actions.postback import ENTIDAD_OPCION, ENTIDAD_ORIGEN
+from actions.respuestas import BOTONES, TEXTO, bytes_mensajes
+from benchmarks import comun
+from verificacion_final import MockDispatcher, MockTracker
+
+RUTA_SALIDA = "benchmarks/resultados/respuestas.json"
+
+# Canal con el que se simula cada formato
+CANALES = {TEXTO: "rest", BOTONES: "telegram"}
+
+# (acción, texto, slots, entidades)
+Turno = Tuple[Any, Text, Dict[Text, Text], List[Dict[Text, Text]]]
+
+
+def turnos(formato: Text) -> List[Turno]:
+    """Una pasada por todas las pantallas y todos los saludos en el formato dado."""
+    resultado: List[Turno] = []
+    for compania in REGISTRY.nombres:
+        resultado.append((ActionSessionStart(), compania, {}, []))
+    for estado in MENU.pantallas:
+        for opcion in MENU.opciones(estado):
+            slots = {"estado_menu": estado, "compania_operador": "Telcel"}
+            if formato == BOTONES:
+                entidades = [{"entity": ENTIDAD_OPCION, "value": opcion},
+                             {"entity": ENTIDAD_ORIGEN, "value": estado}]
+                resultado.append((ActionElegirOpcion(), MENU.postback(estado, opcion), slots, entidades))
+            else:
+                resultado.append((ActionElegirOpcion(), opcion, slots, []))
+    resultado.append((ActionDefaultFallback(), "no entendí nada", {}, []))
+    resultado.append((ActionFinalizarConversacion(), "adiós", {}, []))
+    return resultado
+
+
+async def medir(formato: Text, repeticiones: int) -> Dict[Text, Dict[Text, Any]]:
+    """Bytes y latencias por acción recorriendo los turnos `repeticiones` veces."""
+    canal = CANALES[formato]
+    casos = turnos(formato)
+    bytes_por_accion: Dict[Text, List[int]] = {}
+    latencias: Dict[Text, List[int]] = {}
+    reloj = time.perf_counter_ns
+
+    # La pasada de calentamiento da los bytes: son los mismos en cada repetición
+    for accion, texto, slots, entidades in casos:
+        dispatcher = MockDispatcher()
+        await accion.run(dispatcher, MockTracker(texto, slots, canal, entidades), {})
+        bytes_por_accion.setdefault(accion.name(), []).append(bytes_mensajes(dispatcher.messages))
+
+    for _ in range(repeticiones):
+        for accion, texto, slots, entidades in casos:
+            dispatcher = MockDispatcher()
+            tracker = MockTracker(texto, slots, canal, entidades)
+            inicio = reloj()
+            await accion.run(dispatcher, tracker, {})
+            latencias.setdefault(accion.name(), []).append(reloj() - inicio)
+
+    resultado = {}
+    for nombre, tamanos in sorted(bytes_por_accion.items()):
+        tamanos.sort()
+        resultado[nombre] = {
+            "turnos": len(tamanos),
+            "bytes_media": round(sum(tamanos) / len(tamanos), 1),
+            "bytes_p95": comun.percentil(tamanos, 95),
+            "bytes_max": tamanos[-1],
+            **comun.resumir_latencias(latencias[nombre]),
+        }
+    return resultado
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bytes por turno y latencia con menús en texto y con botones")
+    parser.add_argument("--repeticiones", type=int, default=100, help="Pasadas por todos los turnos")
+    parser.add_argument("--salida", default=RUTA_SALIDA, help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    resultados = {formato: asyncio.run(medir(formato, args.repeticiones)) for formato in (TEXTO, BOTONES)}
+
+    filas = []
+    for formato, acciones in resultados.items():
+        for nombre, r in acciones.items():
+            filas.append([formato, nombre, r["turnos"], r["bytes_media"], r["bytes_p95"], r["bytes_max"],
+                          r["p50_us"], r["p95_us"]])
+    comun.imprimir_tabla(filas, ("formato", "acción", "turnos", "bytes media", "bytes p95", "bytes máx",
+                                 "p50 µs", "p95 µs"))
+
+    for formato, acciones in resultados.items():
+        turnos_totales = sum(r["turnos"] for r in acciones.values())
+        total = sum(r["bytes_media"] * r["turnos"] for r in acciones.values())
+        print(f"{formato}: {total / turnos_totales:.0f} bytes por turno en promedio")
+
+    comun.guardar_json(args.salida, {
+        "metadatos": {**comun.metadatos(), "repeticiones": args.repeticiones, "canales": CANALES},
+        "resultados": resultados,
+    })
+    print(f"Resultados guardados en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
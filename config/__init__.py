@@ -1,3 +1,6 @@
+from .arranque import segundos_desde_inicio
 from .image_config import ImageConfig
+from .logging_config import configurar_logging
+from .media import MANIFIESTO_MEDIA, ManifiestoMedia
 
-__all__ = ['ImageConfig']
+__all__ = ['ImageConfig', 'configurar_logging', 'MANIFIESTO_MEDIA', 'ManifiestoMedia', 'segundos_desde_inicio']
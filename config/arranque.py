@@ -0,0 +1,31 @@
+# Tiempo de arranque de los servidores
+# Los dos servidores (Rasa y acciones) miden cuánto tardan desde que arranca
+# el proceso hasta que terminan el calentamiento y responden 200 en /ready
+
+import os
+import time
+
+# Respaldo si /proc no está disponible: momento en que se importó el módulo
+_INICIO_IMPORTACION = time.time()
+
+
+def _inicio_proceso() -> float:
+    """Hora (epoch) de inicio del proceso según /proc en Linux."""
+    try:
+        with open("/proc/self/stat") as archivo:
+            # El campo 2 (comm) puede tener espacios; starttime es el 22
+            campos = archivo.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as archivo:
+            uptime = float(archivo.read().split()[0])
+        inicio_desde_boot = int(campos[19]) / os.sysconf("SC_CLK_TCK")
+        return time.time() - uptime + inicio_desde_boot
+    except (OSError, ValueError, IndexError):
+        return _INICIO_IMPORTACION
+
+
+INICIO_PROCESO = _inicio_proceso()
+
+
+def segundos_desde_inicio() -> float:
+    """Segundos transcurridos desde que arrancó el proceso."""
+    return time.time() - INICIO_PROCESO
@@ -1,30 +1,59 @@
 # URLs de imágenes para Botmobile
 # Configuración centralizada de todas las imágenes usadas en el bot
+#
+# Si BOTMOBILE_MEDIA_URL apunta a la URL pública del servidor de acciones, las
+# imágenes se sirven desde ahí con el hash del contenido en el nombre (ver
+# config/media.py). Si no, se usan las URLs de GitHub de siempre.
 
-class ImageConfig:
-    """Configuración centralizada de URLs de imágenes"""
-    
+import os
+
+from .media import MANIFIESTO_MEDIA
+
+_URL_GITHUB = "https://raw.githubusercontent.com/hollyw00d337/BotMobile/main/assets/images/"
+
+# Nombre de la constante -> archivo en assets/images
+ARCHIVOS_IMAGENES = {
     # Imágenes de paquetes
-    PAQUETES_PROMOCION = "https://raw.githubusercontent.com/hollyw00d337/BotMobile/main/assets/images/paquetes-promocion.jpeg"
-    
+    "PAQUETES_PROMOCION": "paquetes-promocion.jpeg",
+
     # Imágenes de portabilidad
-    PORTABILIDAD_3_PASOS = "https://raw.githubusercontent.com/hollyw00d337/BotMobile/main/assets/images/portabilidad-3-pasos.jpeg"
-    
+    "PORTABILIDAD_3_PASOS": "portabilidad-3-pasos.jpeg",
+
     # Imágenes de instrucciones
-    COMO_OBTENER_NIP = "https://raw.githubusercontent.com/hollyw00d337/BotMobile/main/assets/images/como-obtener-nip.jpeg"
-    COMO_OBTENER_IMEI = "https://raw.githubusercontent.com/hollyw00d337/BotMobile/main/assets/images/como-obtener-imei.jpeg"
-    
+    "COMO_OBTENER_NIP": "como-obtener-nip.jpeg",
+    "COMO_OBTENER_IMEI": "como-obtener-imei.jpeg",
+
     # Imágenes de bienvenida
-    BIENVENIDA_BOTMOBILE = "https://raw.githubusercontent.com/hollyw00d337/BotMobile/main/assets/images/bienvenida-spotty.jpeg"
-    
+    "BIENVENIDA_BOTMOBILE": "bienvenida-spotty.jpeg",
+}
+
+
+def _url_imagen(archivo: str, url_media: str) -> str:
+    ruta = MANIFIESTO_MEDIA.ruta(archivo) if url_media else None
+    if ruta is None:
+        return _URL_GITHUB + archivo
+    return url_media + ruta
+
+
+class ImageConfig:
+    """Configuración centralizada de URLs de imágenes"""
+
+    URL_MEDIA = os.environ.get("BOTMOBILE_MEDIA_URL", "").rstrip("/")
+
+    PAQUETES_PROMOCION = _url_imagen(ARCHIVOS_IMAGENES["PAQUETES_PROMOCION"], URL_MEDIA)
+    PORTABILIDAD_3_PASOS = _url_imagen(ARCHIVOS_IMAGENES["PORTABILIDAD_3_PASOS"], URL_MEDIA)
+    COMO_OBTENER_NIP = _url_imagen(ARCHIVOS_IMAGENES["COMO_OBTENER_NIP"], URL_MEDIA)
+    COMO_OBTENER_IMEI = _url_imagen(ARCHIVOS_IMAGENES["COMO_OBTENER_IMEI"], URL_MEDIA)
+    BIENVENIDA_BOTMOBILE = _url_imagen(ARCHIVOS_IMAGENES["BIENVENIDA_BOTMOBILE"], URL_MEDIA)
+
     @classmethod
     def get_image_url(cls, image_name: str) -> str:
         return getattr(cls, image_name, "")
-    
+
     @classmethod
     def get_all_images(cls) -> dict:
-     
+
         return {
             name: value for name, value in cls.__dict__.items()
-            if isinstance(value, str) and value.startswith('http')
+            if isinstance(value, str) and value.startswith('http') and name != "URL_MEDIA"
         }
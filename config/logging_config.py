@@ -0,0 +1,141 @@
+# Configuración de logging para el servidor de acciones
+# Niveles por módulo, formato JSON opcional y handler con cola no bloqueante
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Any, Dict, Optional
+
+# Atributos estándar de LogRecord; el resto llega por `extra` y se serializa
+_ATRIBUTOS_ESTANDAR = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON compacta."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos: Dict[str, Any] = {
+            "ts": round(record.created, 6),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_ESTANDAR and not clave.startswith("_"):
+                datos[clave] = valor
+        if record.exc_info:
+            datos["exc"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+class QueueHandlerNoBloqueante(logging.handlers.QueueHandler):
+    """
+    QueueHandler con cola acotada que descarta registros en lugar de bloquear.
+
+    El formateo (JSON incluido) ocurre en el hilo del QueueListener; en el hilo
+    de la petición solo se resuelve el mensaje y se encola.
+    """
+
+    def __init__(self, capacidad: int = 10000) -> None:
+        super().__init__(queue.Queue(maxsize=capacidad))
+        self.descartados = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[QueueHandlerNoBloqueante] = None
+_configurado = False
+
+
+def _niveles_por_modulo(valor: str) -> Dict[str, str]:
+    """Parsea "actions.deteccion=DEBUG,actions.plantillas=INFO"."""
+    niveles = {}
+    for par in valor.split(","):
+        if "=" in par:
+            modulo, nivel = par.split("=", 1)
+            niveles[modulo.strip()] = nivel.strip().upper()
+    return niveles
+
+
+def configurar_logging(paquete: str = "actions") -> None:
+    """
+    Configura el logging del paquete de acciones a partir del entorno.
+
+    Variables de entorno:
+        BOTMOBILE_LOG_LEVEL: nivel base del paquete (por defecto INFO)
+        BOTMOBILE_LOG_LEVELS: niveles por módulo, ej. "actions.deteccion=DEBUG"
+        BOTMOBILE_LOG_JSON: "1" para escribir líneas JSON a través de una cola
+            no bloqueante en lugar de propagar al logging de rasa_sdk
+        BOTMOBILE_LOG_QUEUE_SIZE: capacidad de la cola (por defecto 10000)
+
+    Es idempotente: solo la primera llamada tiene efecto.
+    """
+    global _listener, _handler, _configurado
+
+    with _lock:
+        if _configurado:
+            return
+        _configurado = True
+
+        logger_paquete = logging.getLogger(paquete)
+        logger_paquete.setLevel(os.environ.get("BOTMOBILE_LOG_LEVEL", "INFO").upper())
+
+        for modulo, nivel in _niveles_por_modulo(os.environ.get("BOTMOBILE_LOG_LEVELS", "")).items():
+            logging.getLogger(modulo).setLevel(nivel)
+
+        if os.environ.get("BOTMOBILE_LOG_JSON") == "1":
+            salida = logging.StreamHandler()
+            salida.setFormatter(JsonFormatter())
+
+            handler = QueueHandlerNoBloqueante(int(os.environ.get("BOTMOBILE_LOG_QUEUE_SIZE", "10000")))
+            _listener = logging.handlers.QueueListener(handler.queue, salida, respect_handler_level=True)
+            _listener.start()
+            _handler = handler
+            atexit.register(detener_logging)
+
+            logger_paquete.addHandler(handler)
+            logger_paquete.propagate = False
+
+
+def detener_logging() -> None:
+    """Vacía la cola y detiene el hilo escritor si se usó el modo JSON."""
+    global _listener
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _reanudar_en_hijo() -> None:
+    """
+    Tras un fork (servidor_acciones.py) el hilo escritor no existe en el
+    hijo: se crea otro con una cola nueva, porque la del padre pudo quedar
+    bloqueada a medias.
+    """
+    global _lock, _listener
+
+    _lock = threading.Lock()
+    if _listener is not None and _handler is not None:
+        _handler.queue = queue.Queue(maxsize=_handler.queue.maxsize)
+        _listener = logging.handlers.QueueListener(_handler.queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+
+os.register_at_fork(after_in_child=_reanudar_en_hijo)
@@ -0,0 +1,80 @@
+# Manifiesto de imágenes servidas por el servidor de acciones
+# Cada archivo de assets/images se publica con el hash de su contenido en el
+# nombre, así que su URL nunca cambia de contenido y se puede cachear para siempre
+
+import hashlib
+import json
+import mimetypes
+import os
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import quote
+
+DIRECTORIO_IMAGENES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'images')
+
+# Prefijo de las rutas de media en el servidor de acciones
+RUTA_MEDIA = '/media'
+
+
+class ArchivoMedia(NamedTuple):
+    """Un archivo publicado: contenido en memoria y sus cabeceras."""
+
+    original: str
+    publicado: str
+    contenido: bytes
+    etag: str
+    tipo: str
+
+
+class ManifiestoMedia:
+    """Nombre original -> nombre con hash, y nombre con hash -> archivo."""
+
+    def __init__(self, archivos: Dict[str, ArchivoMedia]) -> None:
+        self._por_publicado = archivos
+        self._por_original = {archivo.original: archivo for archivo in archivos.values()}
+
+    @classmethod
+    def construir(cls, directorio: str = DIRECTORIO_IMAGENES) -> 'ManifiestoMedia':
+        """Lee y hashea todas las imágenes del directorio."""
+        archivos = {}
+        if os.path.isdir(directorio):
+            for nombre in sorted(os.listdir(directorio)):
+                ruta = os.path.join(directorio, nombre)
+                if not os.path.isfile(ruta) or nombre.startswith('.'):
+                    continue
+                with open(ruta, 'rb') as archivo:
+                    contenido = archivo.read()
+                huella = hashlib.sha256(contenido).hexdigest()[:16]
+                base, extension = os.path.splitext(nombre)
+                publicado = f"{base}.{huella}{extension}"
+                archivos[publicado] = ArchivoMedia(
+                    original=nombre,
+                    publicado=publicado,
+                    contenido=contenido,
+                    etag=f'"{huella}"',
+                    tipo=mimetypes.guess_type(nombre)[0] or 'application/octet-stream',
+                )
+        return cls(archivos)
+
+    def archivo(self, publicado: str) -> Optional[ArchivoMedia]:
+        """Archivo servido bajo un nombre con hash, o None si no existe."""
+        return self._por_publicado.get(publicado)
+
+    def ruta(self, original: str) -> Optional[str]:
+        """Ruta con hash (/media/nombre.hash.ext) de un archivo de assets/images."""
+        archivo = self._por_original.get(original)
+        if archivo is None:
+            return None
+        return f"{RUTA_MEDIA}/{quote(archivo.publicado)}"
+
+    def como_dict(self) -> Dict[str, str]:
+        return {archivo.original: archivo.publicado for archivo in self._por_publicado.values()}
+
+    def __len__(self) -> int:
+        return len(self._por_publicado)
+
+
+MANIFIESTO_MEDIA = ManifiestoMedia.construir()
+
+
+if __name__ == '__main__':
+    print(json.dumps(MANIFIESTO_MEDIA.como_dict(), ensure_ascii=False, indent=2))
@@ -2,17 +2,80 @@
 """
 Script para crear un endpoint de debug que muestre exactamente
 qué mensajes está recibiendo el bot desde Node-RED
+
+Modos:
+    python debug_webhook.py              # Flask, imprime cada mensaje en consola
+    python debug_webhook.py --captura    # servidor asíncrono que guarda JSONL rotado
+
+El modo captura está pensado para recibir una parte del tráfico real de
+Node-RED: responde de inmediato, encola el registro en una cola acotada y un
+escritor en segundo plano lo agrega a archivos JSONL que rotan por tamaño y
+por tiempo. Si la cola se llena el registro se descarta y se cuenta, nunca se
+hace esperar a Node-RED.
 """
 
-from flask import Flask, request, jsonify
+import argparse
+import asyncio
 import json
+import os
+import random
+import time
 from datetime import datetime
 
-app = Flask(__name__)
+OPERADORES_DIRECTOS = ['Telcel', 'Movistar', 'AT&T', 'Unefon', 'Virgin Mobile', 'Altan Redes', 'Spot Uno']
+
+
+def extraer_mensaje(json_data):
+    """Texto del mensaje en el cuerpo JSON de Node-RED, si existe"""
+    if not isinstance(json_data, dict):
+        return None
+    message_text = json_data.get('message', json_data.get('text', None))
+    if isinstance(message_text, dict):
+        message_text = message_text.get('text', None)
+    return message_text if isinstance(message_text, str) else None
+
+
+def formato_mensaje(message_text):
+    """
+    Formato Node-RED del mensaje según la verificación de siempre.
+
+    Returns:
+        "compania_detectada", "operator", "nombre_directo", "incorrecto"
+        (el bot enviará el saludo genérico) o None si no hay texto
+    """
+    if not message_text:
+        return None
+    texto_upper = message_text.upper()
+    if "COMPANIA_DETECTADA" in texto_upper:
+        return "compania_detectada"
+    if "OPERATOR" in texto_upper:
+        return "operator"
+    if message_text.strip() in OPERADORES_DIRECTOS:
+        return "nombre_directo"
+    return "incorrecto"
+
+
+def crear_app_debug():
+    """App Flask del modo debug interactivo"""
+    from flask import Flask, request, jsonify
+
+    app = Flask(__name__)
+
+    @app.route('/debug/webhook', methods=['POST'])
+    def debug_webhook():
+        """Endpoint de debug para capturar mensajes de Node-RED"""
+        return _debug_webhook(request, jsonify)
+
+    @app.route('/status', methods=['GET'])
+    def status():
+        """Endpoint de status"""
+        return jsonify({"status": "Debug webhook activo"})
 
-@app.route('/debug/webhook', methods=['POST'])
-def debug_webhook():
-    """Endpoint de debug para capturar mensajes de Node-RED"""
+    return app
+
+
+def _debug_webhook(request, jsonify):
+    """Imprime en consola todo lo que llega de Node-RED"""
     
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
@@ -50,23 +113,13 @@ def debug_webhook():
         print(raw_data)
     
     # Extraer mensaje si existe
-    message_text = None
-    if json_data:
-        message_text = json_data.get('message', json_data.get('text', None))
-        if isinstance(message_text, dict):
-            message_text = message_text.get('text', None)
+    message_text = extraer_mensaje(json_data)
     
     if message_text:
         print(f"🎯 MENSAJE DETECTADO: '{message_text}'")
         
         # Verificar si el formato es correcto
-        formats_ok = [
-            "COMPANIA_DETECTADA" in message_text.upper(),
-            "OPERATOR" in message_text.upper(),
-            message_text.strip() in ['Telcel', 'Movistar', 'AT&T', 'Unefon', 'Virgin Mobile', 'Altan Redes', 'Spot Uno']
-        ]
-        
-        if any(formats_ok):
+        if formato_mensaje(message_text) != "incorrecto":
             print(f"✅ FORMATO CORRECTO - Bot debería detectar compañía")
         else:
             print(f"❌ FORMATO INCORRECTO - Bot enviará mensaje genérico")
@@ -84,17 +137,187 @@ def debug_webhook():
         "text": f"Debug: Recibí mensaje '{message_text}' a las {timestamp}"
     }])
 
-@app.route('/status', methods=['GET'])
-def status():
-    """Endpoint de status"""
-    return jsonify({"status": "Debug webhook activo"})
 
-if __name__ == '__main__':
+class EscritorRotativo:
+    """Agrega líneas a archivos JSONL que rotan por tamaño y por antigüedad"""
+
+    def __init__(self, directorio, prefijo="captura", max_bytes=64 * 1024 * 1024, max_segundos=3600):
+        self.directorio = directorio
+        self.prefijo = prefijo
+        self.max_bytes = max_bytes
+        self.max_segundos = max_segundos
+        self.rotaciones = 0
+        self._archivo = None
+        self._abierto_en = 0.0
+        os.makedirs(directorio, exist_ok=True)
+
+    def _abrir(self):
+        sello = datetime.now().strftime("%Y%m%d-%H%M%S")
+        ruta = os.path.join(self.directorio, f"{self.prefijo}-{sello}-{os.getpid()}-{self.rotaciones}.jsonl")
+        self._archivo = open(ruta, "a", encoding="utf-8")
+        self._abierto_en = time.monotonic()
+
+    def escribir(self, lineas):
+        """Escribe un lote de líneas ya serializadas (se llama fuera del event loop)"""
+        if self._archivo is not None and (
+            self._archivo.tell() >= self.max_bytes
+            or time.monotonic() - self._abierto_en >= self.max_segundos
+        ):
+            self._archivo.close()
+            self._archivo = None
+            self.rotaciones += 1
+        if self._archivo is None:
+            self._abrir()
+        self._archivo.write("".join(lineas))
+        self._archivo.flush()
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+
+class Captura:
+    """Cola acotada con muestreo y un escritor en segundo plano"""
+
+    def __init__(self, escritor, capacidad=10000, muestreo=1.0, lote=500):
+        self.escritor = escritor
+        self.muestreo = muestreo
+        self.lote = lote
+        self.cola = asyncio.Queue(maxsize=capacidad)
+        self.contadores = {
+            "recibidos": 0,
+            "fuera_de_muestra": 0,
+            "descartados_cola_llena": 0,
+            "escritos": 0,
+            "errores_escritura": 0,
+        }
+        self._tarea = None
+
+    def registrar(self, registro):
+        """Encola un registro sin esperar nunca"""
+        self.contadores["recibidos"] += 1
+        if self.muestreo < 1.0 and random.random() >= self.muestreo:
+            self.contadores["fuera_de_muestra"] += 1
+            return
+        try:
+            self.cola.put_nowait(registro)
+        except asyncio.QueueFull:
+            self.contadores["descartados_cola_llena"] += 1
+
+    async def _escribir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lineas = [await self.cola.get()]
+            while len(lineas) < self.lote and not self.cola.empty():
+                lineas.append(self.cola.get_nowait())
+            lineas = [json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in lineas]
+            try:
+                await loop.run_in_executor(None, self.escritor.escribir, lineas)
+                self.contadores["escritos"] += len(lineas)
+            except OSError as error:
+                self.contadores["errores_escritura"] += len(lineas)
+                print(f"❌ Error escribiendo captura: {error}")
+            finally:
+                for _ in lineas:
+                    self.cola.task_done()
+
+    def iniciar(self):
+        self._tarea = asyncio.get_running_loop().create_task(self._escribir())
+
+    async def detener(self):
+        """Vacía la cola pendiente y cierra el archivo actual"""
+        await self.cola.join()
+        if self._tarea is not None:
+            self._tarea.cancel()
+        self.escritor.cerrar()
+
+    def estado(self):
+        return {**self.contadores, "en_cola": self.cola.qsize(), "rotaciones": self.escritor.rotaciones}
+
+
+def crear_app_captura(captura):
+    """App aiohttp del modo captura"""
+    from aiohttp import web
+
+    async def capturar(request):
+        cuerpo = await request.read()
+        texto_cuerpo = cuerpo.decode("utf-8", errors="replace")
+        try:
+            json_data = json.loads(texto_cuerpo) if texto_cuerpo else None
+        except ValueError:
+            json_data = None
+
+        message_text = extraer_mensaje(json_data)
+        captura.registrar({
+            "ts": round(time.time(), 6),
+            "metodo": request.method,
+            "ruta": request.path_qs,
+            "headers": dict(request.headers),
+            "json": json_data,
+            "raw": None if json_data is not None else texto_cuerpo,
+            "mensaje": message_text,
+            "formato": formato_mensaje(message_text),
+        })
+
+        # Responder como lo haría Rasa
+        return web.json_response([{"text": f"Debug: Recibí mensaje '{message_text}'"}])
+
+    async def status(_):
+        return web.json_response({"status": "Captura activa", **captura.estado()})
+
+    async def al_iniciar(_):
+        captura.iniciar()
+
+    async def al_cerrar(_):
+        await captura.detener()
+        print(f"📊 Captura terminada: {captura.estado()}")
+
+    app = web.Application(client_max_size=1024 * 1024)
+    app.router.add_post('/debug/webhook', capturar)
+    app.router.add_get('/status', status)
+    app.on_startup.append(al_iniciar)
+    app.on_cleanup.append(al_cerrar)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook de debug para mensajes de Node-RED")
+    parser.add_argument('--puerto', type=int, default=5006)
+    parser.add_argument('--captura', action='store_true', help="Modo captura asíncrono a JSONL")
+    parser.add_argument('--directorio', default='capturas', help="Directorio de los archivos JSONL")
+    parser.add_argument('--muestreo', type=float, default=1.0, help="Fracción de mensajes a guardar (0-1)")
+    parser.add_argument('--cola', type=int, default=10000, help="Capacidad de la cola en memoria")
+    parser.add_argument('--max-mb', type=float, default=64, help="Tamaño máximo por archivo")
+    parser.add_argument('--rotacion-segundos', type=int, default=3600, help="Antigüedad máxima por archivo")
+    args = parser.parse_args()
+
+    if args.captura:
+        from aiohttp import web
+
+        escritor = EscritorRotativo(args.directorio, max_bytes=int(args.max_mb * 1024 * 1024),
+                                    max_segundos=args.rotacion_segundos)
+        captura = Captura(escritor, capacidad=args.cola, muestreo=args.muestreo)
+
+        print("🚀 INICIANDO CAPTURA DE WEBHOOK")
+        print("="*50)
+        print(f"URL: http://localhost:{args.puerto}/debug/webhook")
+        print(f"Status: http://localhost:{args.puerto}/status")
+        print(f"Archivos: {os.path.abspath(args.directorio)} (muestreo {args.muestreo:.0%})")
+        print("="*50)
+
+        web.run_app(crear_app_captura(captura), host='0.0.0.0', port=args.puerto, access_log=None)
+        return
+
     print("🚀 INICIANDO DEBUG WEBHOOK")
     print("="*50)
-    print("URL: http://localhost:5006/debug/webhook")
-    print("Status: http://localhost:5006/status") 
+    print(f"URL: http://localhost:{args.puerto}/debug/webhook")
+    print(f"Status: http://localhost:{args.puerto}/status") 
     print("Configura Node-RED para enviar mensajes aquí")
     print("="*50)
     
-    app.run(host='0.0.0.0', port=5006, debug=True)
+    crear_app_debug().run(host='0.0.0.0', port=args.puerto, debug=True)
+
+
+if __name__ == '__main__':
+    main()
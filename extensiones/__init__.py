@@ -0,0 +1,8 @@
+"""
+Extensiones del servidor de Rasa (no del servidor de acciones).
+
+Clases que Rasa carga por su ruta de módulo desde `endpoints*.yml` o
+`config.yml`, por ejemplo `type: extensiones.tracker_store.BoundedTrackerStore`.
+`rasa run` agrega el directorio de trabajo a sys.path, así que el paquete se
+importa igual en local y en el contenedor (/app).
+"""
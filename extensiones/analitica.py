@@ -0,0 +1,272 @@
+"""
+Almacén de eventos de analítica y embudos por operador.
+
+`extensiones.event_broker.SQLiteEventBroker` escribe aquí, en lotes, los
+eventos de Rasa que sirven para medir conversiones: los `SlotSet` de los
+slots del embudo (`compania_operador`, `estado_menu`, `numero_telefono`,
+`conversation_ending`) y cada ejecución de `action_session_start`, que marca
+el inicio de una sesión. La tabla es de solo inserción; un índice por
+(sender_id, id) permite recorrerla conversación por conversación.
+
+El embudo se calcula en una sola pasada sobre ese orden, con una sola sesión
+abierta a la vez, así que la memoria no crece con el número de eventos ni de
+conversaciones:
+
+    sesión -> portabilidad -> contacto
+
+Una sesión cuenta en `portabilidad` si `estado_menu` pasó por alguna pantalla
+de portabilidad (config/menu.yml) y en `contacto` si después llegó a
+`contacto`. La sesión se atribuye a la compañía fijada en ella o, si no se
+fijó, a la última conocida de la conversación (los slots se conservan entre
+sesiones). Para las sesiones que no llegaron a contacto se cuenta el último
+estado del menú: ahí es donde se fue el usuario.
+
+Uso:
+    python -m extensiones.analitica /app/analitica/eventos.db
+    python -m extensiones.analitica eventos.db --desde 2026-01-01 --json
+"""
+
+import argparse
+import collections
+import datetime
+import json
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Text, Tuple
+
+# Tipos de fila
+TIPO_SESION = "sesion"
+TIPO_SLOT = "slot"
+
+# (sender_id, momento, tipo, slot, valor)
+Fila = Tuple[Text, float, Text, Optional[Text], Optional[Text]]
+
+ETAPAS = ("sesiones", "portabilidad", "contacto")
+
+# Pantallas del flujo de portabilidad en config/menu.yml
+ESTADOS_PORTABILIDAD = frozenset({"portabilidad", "como_obtener_nip", "nip_listo", "como_obtener_imei"})
+ESTADO_CONTACTO = "contacto"
+
+SIN_OPERADOR = "(sin operador)"
+SIN_ESTADO = "(sin estado)"
+
+
+class AlmacenEventos:
+    """Tabla de eventos de solo inserción, accedida desde un solo hilo a la vez."""
+
+    def __init__(self, ruta: Text) -> None:
+        self.ruta = ruta
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS eventos ("
+                "id INTEGER PRIMARY KEY, sender_id TEXT NOT NULL, momento REAL NOT NULL, "
+                "tipo TEXT NOT NULL, slot TEXT, valor TEXT)"
+            )
+            self._conexion.execute(
+                "CREATE INDEX IF NOT EXISTS eventos_conversacion ON eventos (sender_id, id)"
+            )
+
+    def escribir(self, filas: List[Fila]) -> None:
+        with self._lock:
+            self._conexion.execute("BEGIN")
+            try:
+                self._conexion.executemany(
+                    "INSERT INTO eventos (sender_id, momento, tipo, slot, valor) VALUES (?, ?, ?, ?, ?)",
+                    filas,
+                )
+                self._conexion.execute("COMMIT")
+            except sqlite3.Error:
+                self._conexion.execute("ROLLBACK")
+                raise
+
+    def recorrer(self, desde: Optional[float] = None, hasta: Optional[float] = None,
+                 tamano_lote: int = 10000) -> Iterator[Tuple[Text, Text, Optional[Text], Optional[Text]]]:
+        """(sender_id, tipo, slot, valor) ordenados por conversación y llegada."""
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append("momento >= ?")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append("momento < ?")
+            parametros.append(hasta)
+        donde = f" WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        # Conexión propia: el recorrido puede durar y no debe bloquear escrituras
+        conexion = sqlite3.connect(self.ruta)
+        try:
+            cursor = conexion.execute(
+                f"SELECT sender_id, tipo, slot, valor FROM eventos{donde} ORDER BY sender_id, id",
+                parametros,
+            )
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                yield from filas
+        finally:
+            conexion.close()
+
+    def contar(self) -> int:
+        with self._lock:
+            return self._conexion.execute("SELECT count(*) FROM eventos").fetchone()[0]
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._conexion.close()
+
+
+class _Sesion:
+    """Avance de una sesión en el embudo."""
+
+    __slots__ = ('operador', 'etapa', 'ultimo_estado', 'finalizada')
+
+    def __init__(self, operador: Optional[Text]) -> None:
+        self.operador = operador
+        self.etapa = 0
+        self.ultimo_estado: Optional[Text] = None
+        self.finalizada = False
+
+    def pasar_por(self, estado: Optional[Text]) -> None:
+        self.ultimo_estado = estado
+        if self.etapa == 0 and estado in ESTADOS_PORTABILIDAD:
+            self.etapa = 1
+        elif self.etapa == 1 and estado == ESTADO_CONTACTO:
+            self.etapa = 2
+
+
+class Embudos:
+    """Conteos por operador, acumulados sesión por sesión."""
+
+    def __init__(self) -> None:
+        self.por_operador: Dict[Text, List[int]] = collections.defaultdict(lambda: [0] * len(ETAPAS))
+        self.finalizadas: "collections.Counter[Text]" = collections.Counter()
+        self.abandonos: "collections.Counter[Text]" = collections.Counter()
+        self.eventos = 0
+        self.conversaciones = 0
+
+    def agregar(self, sesion: _Sesion) -> None:
+        operador = sesion.operador or SIN_OPERADOR
+        conteos = self.por_operador[operador]
+        for etapa in range(sesion.etapa + 1):
+            conteos[etapa] += 1
+        if sesion.finalizada:
+            self.finalizadas[operador] += 1
+        if sesion.etapa < len(ETAPAS) - 1:
+            self.abandonos[sesion.ultimo_estado or SIN_ESTADO] += 1
+
+    def como_dict(self) -> Dict[Text, Any]:
+        operadores = {}
+        for operador, conteos in sorted(self.por_operador.items(), key=lambda par: (-par[1][0], par[0])):
+            datos: Dict[Text, Any] = dict(zip(ETAPAS, conteos))
+            for anterior, etapa in zip(ETAPAS, ETAPAS[1:]):
+                datos[f"tasa_{etapa}"] = round(datos[etapa] / datos[anterior], 4) if datos[anterior] else 0.0
+            datos["finalizadas"] = self.finalizadas[operador]
+            operadores[operador] = datos
+        return {
+            "eventos": self.eventos,
+            "conversaciones": self.conversaciones,
+            "operadores": operadores,
+            "abandono_por_estado": dict(self.abandonos.most_common()),
+        }
+
+
+def calcular_embudos(filas: Iterable[Tuple[Text, Text, Optional[Text], Optional[Text]]]) -> Embudos:
+    """
+    Embudos por operador en una pasada.
+
+    Args:
+        filas: (sender_id, tipo, slot, valor) agrupadas por sender_id y en
+            orden de llegada dentro de cada conversación
+
+    Returns:
+        Embudos con los conteos
+    """
+    embudos = Embudos()
+    actual: Optional[Text] = None
+    compania: Optional[Text] = None
+    sesion: Optional[_Sesion] = None
+
+    for sender_id, tipo, slot, valor in filas:
+        embudos.eventos += 1
+        if sender_id != actual:
+            if sesion is not None:
+                embudos.agregar(sesion)
+            actual, compania, sesion = sender_id, None, None
+            embudos.conversaciones += 1
+
+        if tipo == TIPO_SESION:
+            if sesion is not None:
+                embudos.agregar(sesion)
+            sesion = _Sesion(compania)
+            continue
+        if sesion is None:
+            # Eventos anteriores al primer inicio registrado (p. ej. por --desde)
+            sesion = _Sesion(compania)
+
+        if slot == "estado_menu":
+            sesion.pasar_por(valor)
+        elif slot == "compania_operador":
+            if valor:
+                compania = sesion.operador = valor
+        elif slot == "conversation_ending":
+            sesion.finalizada = valor == "true"
+
+    if sesion is not None:
+        embudos.agregar(sesion)
+    return embudos
+
+
+def _fecha(texto: Text) -> float:
+    """YYYY-MM-DD (hora local) a timestamp."""
+    return time.mktime(datetime.date.fromisoformat(texto).timetuple())
+
+
+def _imprimir(resultado: Dict[Text, Any]) -> None:
+    encabezados = ("operador", "sesiones", "portabilidad", "%", "contacto", "%", "finalizadas")
+    filas = [
+        (operador, datos["sesiones"], datos["portabilidad"], f"{datos['tasa_portabilidad']:.1%}",
+         datos["contacto"], f"{datos['tasa_contacto']:.1%}", datos["finalizadas"])
+        for operador, datos in resultado["operadores"].items()
+    ]
+    anchos = [max(len(str(valor)) for valor in columna) for columna in zip(encabezados, *filas)]
+    for fila in (encabezados, tuple("-" * ancho for ancho in anchos), *filas):
+        print("  ".join(str(valor).ljust(ancho) for valor, ancho in zip(fila, anchos)))
+
+    print(f"\n{resultado['eventos']} eventos, {resultado['conversaciones']} conversaciones")
+    print("Último estado de las sesiones que no llegaron a contacto:")
+    for estado, total in resultado["abandono_por_estado"].items():
+        print(f"  {estado}: {total}")
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Embudo por operador: sesión -> portabilidad -> contacto")
+    parser.add_argument("ruta", help="Archivo SQLite del event broker (url en endpoints)")
+    parser.add_argument("--desde", type=_fecha, help="Fecha inicial YYYY-MM-DD (incluida)")
+    parser.add_argument("--hasta", type=_fecha, help="Fecha final YYYY-MM-DD (excluida)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    almacen = AlmacenEventos(args.ruta)
+    try:
+        resultado = calcular_embudos(almacen.recorrer(args.desde, args.hasta)).como_dict()
+    finally:
+        almacen.cerrar()
+    resultado["segundos"] = round(time.perf_counter() - inicio, 3)
+
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    else:
+        _imprimir(resultado)
+        print(f"\nCalculado en {resultado['segundos']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
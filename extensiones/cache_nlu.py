@@ -0,0 +1,365 @@
+"""
+Cache de resultados de NLU para textos repetidos.
+
+Fuera de los dígitos y de los mensajes de Node-RED (que ya resuelve
+`NLURapida`), el tráfico libre también se repite mucho: "hola", "menu",
+"quiero portabilidad", "gracias". Cada repetición pasaba otra vez por el
+tokenizador, los featurizers y DIET. `CacheNLU` va después de `NLURapida` y,
+si el texto ya se parseó con el mismo modelo, copia intención, ranking y
+entidades guardados y marca el mensaje como resuelto, así que los
+componentes `...Rapido` lo dejan pasar. `GuardarCacheNLU`, al final del
+pipeline, guarda lo que produjo el pipeline para los mensajes que no estaban.
+
+La clave es (id del modelo, texto normalizado): sin espacios en los extremos
+y, con `ignorar_mayusculas`, en minúsculas (`casefold`) si eso no cambia la
+longitud, para que las posiciones de las entidades sigan valiendo; al recuperar se desplazan por el
+espacio inicial y el valor de las entidades que eran el texto literal se toma
+del mensaje nuevo. Los textos que empiezan con "/" (intents escritos a mano)
+no se guardan. Ignorar mayúsculas sube mucho la tasa de aciertos ("Hola",
+"HOLA"), pero DIET ve rasgos de mayúsculas (LexicalSyntacticFeaturizer) y
+podría dar una confianza algo distinta para la variante no parseada.
+
+Dentro de `sin_registro()` (el calentamiento de `extensiones.listo`) la cache
+no se consulta ni se llena, y por lo tanto no suma en las estadísticas: los
+ejemplos de entrenamiento no ocupan entradas que el tráfico real no pidió.
+
+La cache es LRU con caducidad (`ttl`) y acotada en entradas y en bytes (el
+resultado se guarda serializado y cuenta lo que ocupa esa serialización). Al cargar un
+modelo nuevo Rasa crea los componentes con otro `model_id` y la cache del
+anterior se descarta entera.
+
+Aciertos, fallos, desalojos, caducadas y el tiempo de pipeline ahorrado son
+contadores de `extensiones.metricas` (servidos en `/ready/metrics` por
+`CanalListo`; la tasa de aciertos sale de `botmobile_cache_nlu_consultas_total`)
+y además se registran en el log cada `intervalo_estadisticas` segundos (con
+`extra`, para el log JSON).
+
+Es opcional: se activa agregando los dos componentes a config.yml (ver el
+comentario ahí) y reentrenando.
+
+    pipeline:
+    - name: extensiones.nlu_rapida.NLURapida
+    - name: extensiones.cache_nlu.CacheNLU
+      max_entradas: 20000
+    - name: extensiones.nlu_rapida.WhitespaceTokenizerRapido
+      ...
+    - name: extensiones.nlu_rapida.RegexEntityExtractorRapido
+    - name: extensiones.cache_nlu.GuardarCacheNLU
+"""
+
+from __future__ import annotations
+
+import collections
+import logging
+import pickle
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.shared.nlu.constants import (
+    ENTITIES,
+    ENTITY_ATTRIBUTE_END,
+    ENTITY_ATTRIBUTE_START,
+    ENTITY_ATTRIBUTE_VALUE,
+    TEXT,
+)
+from rasa.shared.nlu.training_data.message import Message
+
+from actions.metricas import registrando
+from extensiones.metricas import METRICAS_RASA
+from extensiones.nlu_rapida import RESUELTO
+
+logger = logging.getLogger(__name__)
+
+# Propiedad de los mensajes que no estaban en cache: (clave, texto recortado,
+# espacios al inicio, perf_counter al empezar el pipeline)
+PENDIENTE_CACHE = "botmobile_cache_pendiente"
+
+CONSULTAS_CACHE_NLU = METRICAS_RASA.contador(
+    "botmobile_cache_nlu_consultas_total", "Consultas a la cache de NLU por resultado (acierto, fallo)",
+    ("resultado",),
+)
+EVENTOS_CACHE_NLU = METRICAS_RASA.contador(
+    "botmobile_cache_nlu_eventos_total",
+    "Entradas de la cache de NLU guardadas, desalojadas, caducadas y caches invalidadas por modelo nuevo",
+    ("evento",),
+)
+AHORRADO_CACHE_NLU = METRICAS_RASA.contador(
+    "botmobile_cache_nlu_ahorrado_segundos_total", "Tiempo de pipeline ahorrado por los aciertos de la cache de NLU"
+)
+METRICAS_RASA.medidor(
+    "botmobile_cache_nlu_entradas", "Resultados guardados en la cache de NLU",
+    funcion=lambda: len(_CACHE) if _CACHE is not None else 0,
+)
+METRICAS_RASA.medidor(
+    "botmobile_cache_nlu_bytes", "Bytes que ocupan los resultados guardados en la cache de NLU",
+    funcion=lambda: _CACHE.bytes if _CACHE is not None else 0,
+)
+
+_EVENTOS = ("guardadas", "desalojadas", "caducadas", "invalidaciones")
+
+
+def normalizar(texto: Optional[Text], max_caracteres: int,
+               ignorar_mayusculas: bool = True) -> Optional[Tuple[Text, Text, int]]:
+    """
+    Clave de cache de un texto.
+
+    Returns:
+        (clave, texto recortado, espacios al inicio) o None si el texto no se
+        cachea
+    """
+    if not texto:
+        return None
+    recortado = texto.strip()
+    if not recortado or recortado.startswith("/") or len(recortado) > max_caracteres:
+        return None
+    clave = recortado.casefold() if ignorar_mayusculas else recortado
+    if len(clave) != len(recortado):
+        clave = recortado
+    return clave, recortado, len(texto) - len(texto.lstrip())
+
+
+class _Entrada:
+    """Resultado guardado de un texto."""
+
+    __slots__ = ('datos', 'superficie', 'inicio', 'costo', 'vence', 'tamano')
+
+    def __init__(self, datos: bytes, superficie: Text, inicio: int, costo: float, vence: float) -> None:
+        self.datos = datos
+        self.superficie = superficie
+        self.inicio = inicio
+        self.costo = costo
+        self.vence = vence
+        self.tamano = len(datos) + len(superficie)
+
+
+class CacheParseo:
+    """LRU con TTL y límite de entradas y de bytes para un modelo."""
+
+    def __init__(self, modelo: Text, max_entradas: int, max_bytes: int, ttl: float) -> None:
+        self.modelo = modelo
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self._entradas: "collections.OrderedDict[Text, _Entrada]" = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def obtener(self, clave: Text) -> Optional[_Entrada]:
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            return None
+        if entrada.vence <= time.monotonic():
+            self._quitar(clave)
+            EVENTOS_CACHE_NLU.inc("caducadas")
+            return None
+        self._entradas.move_to_end(clave)
+        return entrada
+
+    def guardar(self, clave: Text, entrada: _Entrada) -> None:
+        if entrada.tamano > self.max_bytes:
+            return
+        if clave in self._entradas:
+            self._quitar(clave)
+        self._entradas[clave] = entrada
+        self.bytes += entrada.tamano
+        while len(self._entradas) > self.max_entradas or self.bytes > self.max_bytes:
+            self._quitar(next(iter(self._entradas)))
+            EVENTOS_CACHE_NLU.inc("desalojadas")
+
+    def _quitar(self, clave: Text) -> None:
+        self.bytes -= self._entradas.pop(clave).tamano
+
+
+# Cache del último modelo cargado
+_CACHE: Optional[CacheParseo] = None
+
+
+def crear_cache(modelo: Text, config: Dict[Text, Any]) -> None:
+    """Cache para un modelo recién cargado; descarta la del anterior."""
+    global _CACHE
+    if _CACHE is not None and _CACHE.modelo == modelo:
+        return
+    if _CACHE is not None:
+        EVENTOS_CACHE_NLU.inc("invalidaciones")
+        logger.info("Modelo nuevo (%s): se descartan %d resultados de NLU en cache", modelo, len(_CACHE))
+    _CACHE = CacheParseo(modelo, int(config["max_entradas"]), int(config["max_bytes"]), float(config["ttl"]))
+
+
+def cache_del_modelo(modelo: Text) -> Optional[CacheParseo]:
+    """
+    Cache del modelo o None si ya se cargó otro (el grafo anterior termina
+    sus últimos mensajes sin cache).
+    """
+    return _CACHE if _CACHE is not None and _CACHE.modelo == modelo else None
+
+
+def estadisticas() -> Dict[Text, Any]:
+    """Contadores, tasa de aciertos y ocupación de la cache."""
+    aciertos = int(CONSULTAS_CACHE_NLU.valor("acierto"))
+    fallos = int(CONSULTAS_CACHE_NLU.valor("fallo"))
+    totales: Dict[Text, Any] = {"aciertos": aciertos, "fallos": fallos}
+    totales.update((evento, int(EVENTOS_CACHE_NLU.valor(evento))) for evento in _EVENTOS)
+    totales["tasa_aciertos"] = round(aciertos / (aciertos + fallos), 4) if aciertos + fallos else 0.0
+    totales["ahorrado_s"] = round(float(AHORRADO_CACHE_NLU.valor()), 3)
+    totales["entradas"] = len(_CACHE) if _CACHE is not None else 0
+    totales["bytes"] = _CACHE.bytes if _CACHE is not None else 0
+    return totales
+
+
+def reiniciar_estadisticas() -> None:
+    """Pone a cero los contadores (no vacía la cache)."""
+    for contador in (CONSULTAS_CACHE_NLU, EVENTOS_CACHE_NLU, AHORRADO_CACHE_NLU):
+        contador.reiniciar()
+
+
+def _modelo(execution_context: ExecutionContext) -> Text:
+    return execution_context.model_id or "sin_modelo"
+
+
+@DefaultV1Recipe.register(
+    [
+        DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER,
+        DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR,
+    ],
+    is_trainable=False,
+)
+class CacheNLU(GraphComponent):
+    """Recupera el resultado de textos ya parseados con el mismo modelo."""
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            "max_entradas": 10000,
+            "max_bytes": 16 * 1024 * 1024,
+            "ttl": 3600,
+            "max_caracteres": 200,
+            "ignorar_mayusculas": True,
+            "intervalo_estadisticas": 300,
+        }
+
+    def __init__(self, config: Dict[Text, Any], modelo: Text) -> None:
+        self._modelo = modelo
+        self._max_caracteres = int(config["max_caracteres"])
+        self._ignorar_mayusculas = bool(config["ignorar_mayusculas"])
+        self._intervalo_estadisticas = float(config["intervalo_estadisticas"])
+        self._ultimas_estadisticas = time.monotonic()
+        crear_cache(modelo, config)
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> CacheNLU:
+        return cls(config, _modelo(execution_context))
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        """Copia el resultado guardado o marca el inicio del pipeline."""
+        cache = cache_del_modelo(self._modelo)
+        # Sin marca de pendiente, `GuardarCacheNLU` tampoco guarda nada
+        if cache is None or not registrando():
+            return messages
+        for message in messages:
+            if message.get(RESUELTO):
+                continue
+            texto = message.get(TEXT)
+            normalizado = normalizar(texto, self._max_caracteres, self._ignorar_mayusculas)
+            if normalizado is None:
+                continue
+            inicio = time.perf_counter()
+            clave, recortado, desplazamiento = normalizado
+            entrada = cache.obtener(clave)
+            if entrada is None:
+                CONSULTAS_CACHE_NLU.inc("fallo")
+                message.set(PENDIENTE_CACHE, (clave, recortado, desplazamiento, inicio))
+                continue
+
+            for propiedad, valor in pickle.loads(entrada.datos).items():
+                if propiedad == ENTITIES:
+                    valor = [self._reubicar(entidad, entrada, recortado, desplazamiento) for entidad in valor]
+                message.set(propiedad, valor, add_to_output=True)
+            message.set(RESUELTO, True)
+            CONSULTAS_CACHE_NLU.inc("acierto")
+            ahorrado = entrada.costo - (time.perf_counter() - inicio)
+            AHORRADO_CACHE_NLU.inc(cantidad=max(0.0, ahorrado))
+
+        self._registrar_estadisticas()
+        return messages
+
+    @staticmethod
+    def _reubicar(entidad: Dict[Text, Any], entrada: _Entrada, recortado: Text,
+                  desplazamiento: int) -> Dict[Text, Any]:
+        """Posiciones y valor de la entidad en el texto nuevo."""
+        if ENTITY_ATTRIBUTE_START not in entidad or ENTITY_ATTRIBUTE_END not in entidad:
+            return entidad
+        inicio = entidad[ENTITY_ATTRIBUTE_START] - entrada.inicio
+        fin = entidad[ENTITY_ATTRIBUTE_END] - entrada.inicio
+        entidad = {
+            **entidad,
+            ENTITY_ATTRIBUTE_START: inicio + desplazamiento,
+            ENTITY_ATTRIBUTE_END: fin + desplazamiento,
+        }
+        # Los sinónimos ya mapeados no son texto literal y se conservan
+        if entidad.get(ENTITY_ATTRIBUTE_VALUE) == entrada.superficie[inicio:fin]:
+            entidad[ENTITY_ATTRIBUTE_VALUE] = recortado[inicio:fin]
+        return entidad
+
+    def _registrar_estadisticas(self) -> None:
+        ahora = time.monotonic()
+        if ahora - self._ultimas_estadisticas >= self._intervalo_estadisticas:
+            self._ultimas_estadisticas = ahora
+            totales = estadisticas()
+            logger.info("Cache de NLU: %s", totales, extra={"cache_nlu": totales})
+
+
+@DefaultV1Recipe.register(DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR, is_trainable=False)
+class GuardarCacheNLU(GraphComponent):
+    """Guarda en la cache el resultado del pipeline de los fallos de `CacheNLU`."""
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {}
+
+    def __init__(self, modelo: Text) -> None:
+        self._modelo = modelo
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> GuardarCacheNLU:
+        return cls(_modelo(execution_context))
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        cache = cache_del_modelo(self._modelo)
+        if cache is None:
+            return messages
+        for message in messages:
+            pendiente = message.get(PENDIENTE_CACHE)
+            if pendiente is None or message.get(RESUELTO):
+                continue
+            clave, recortado, desplazamiento, inicio = pendiente
+            salida = {
+                propiedad: message.get(propiedad)
+                for propiedad in message.output_properties
+                if propiedad != TEXT and message.get(propiedad) is not None
+            }
+            try:
+                datos = pickle.dumps(salida, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                continue
+            costo = time.perf_counter() - inicio
+            cache.guardar(clave, _Entrada(datos, recortado, desplazamiento, costo, time.monotonic() + cache.ttl))
+            EVENTOS_CACHE_NLU.inc("guardadas")
+        return messages
@@ -0,0 +1,207 @@
+"""
+Clasificador de intents ligero con n-gramas hasheados (sin TensorFlow).
+
+Son siete intents y un par de cientos de ejemplos; DIET es mucho modelo para
+eso: cada contenedor construye y carga su grafo de TensorFlow al arrancar y
+cada mensaje pasa por él. TensorFlow se sigue importando (Rasa lo importa
+siempre y TEDPolicy lo usa), pero sin DIET no hay modelo de NLU que cargar
+ni que ejecutar en TensorFlow. `ClasificadorNGramas` convierte el
+texto en n-gramas de palabras y de caracteres (`char_wb`) hasheados en un
+vector disperso de tamaño fijo -no hay vocabulario que guardar- y entrena una
+regresión logística multinomial de scikit-learn. Del modelo solo se guardan
+la matriz de pesos y los sesgos (NumPy), así que la inferencia es un producto
+disperso por denso y un softmax para todos los mensajes del lote a la vez.
+
+No necesita featurizers. Las entidades quedan a cargo de
+`RegexEntityExtractor` (regex de `numero_opcion` y la tabla de búsqueda de
+`compania_operador`, por eso `use_lookup_tables: true`) y de
+`EntitySynonymMapper`. El clasificador no usa tokens, pero el tokenizador se
+deja en el pipeline: la evaluación de entidades de Rasa (`rasa test nlu`, la
+validación cruzada) las alinea por token y sin él reporta F1 0 aunque la
+extracción funcione. Los mensajes que ya resolvió `NLURapida` (o la cache de
+NLU) se dejan pasar sin clasificar.
+
+    pipeline:
+    - name: extensiones.nlu_rapida.NLURapida
+    - name: extensiones.nlu_rapida.WhitespaceTokenizerRapido
+    - name: extensiones.clasificador_ngramas.ClasificadorNGramas
+    - name: extensiones.nlu_rapida.RegexEntityExtractorRapido
+      use_lookup_tables: true
+      use_regexes: true
+      use_word_boundaries: true
+    - name: extensiones.nlu_rapida.EntitySynonymMapperRapido
+
+Latencia, memoria y F1 frente a DIET: `python -m benchmarks.pipelines`
+(candidato `clasificador_ngramas`).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Text
+
+import numpy as np
+import scipy.sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import normalize
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.classifiers.classifier import IntentClassifier
+from rasa.shared.nlu.constants import (
+    INTENT,
+    INTENT_NAME_KEY,
+    INTENT_RANKING_KEY,
+    PREDICTED_CONFIDENCE_KEY,
+    TEXT,
+)
+from rasa.shared.nlu.training_data.message import Message
+from rasa.shared.nlu.training_data.training_data import TrainingData
+
+from extensiones.nlu_rapida import RESUELTO
+
+logger = logging.getLogger(__name__)
+
+_ARCHIVO_PESOS = "pesos.npz"
+_ARCHIVO_ETIQUETAS = "etiquetas.json"
+
+
+@DefaultV1Recipe.register(DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER, is_trainable=True)
+class ClasificadorNGramas(GraphComponent, IntentClassifier):
+    """Regresión logística sobre n-gramas hasheados de palabras y caracteres."""
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            "ngramas_palabras": [1, 2],
+            "ngramas_caracteres": [2, 4],
+            # 2^bits columnas por cada tipo de n-grama
+            "bits": 16,
+            # Inverso de la regularización L2 de la regresión logística
+            "C": 10.0,
+            "max_iteraciones": 1000,
+            "ranking_length": 10,
+        }
+
+    def __init__(
+        self,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        etiquetas: Optional[List[Text]] = None,
+        pesos: Optional[np.ndarray] = None,
+        sesgos: Optional[np.ndarray] = None,
+    ) -> None:
+        self._config = config
+        self._model_storage = model_storage
+        self._resource = resource
+        self._etiquetas = etiquetas or []
+        # (clases, columnas) y (clases,)
+        self._pesos = pesos
+        self._sesgos = sesgos
+
+        columnas = 2 ** int(config["bits"])
+        comunes = {"n_features": columnas, "alternate_sign": False, "norm": None,
+                   "lowercase": True, "strip_accents": "unicode", "dtype": np.float32}
+        self._vectorizadores = (
+            HashingVectorizer(analyzer="word", ngram_range=tuple(config["ngramas_palabras"]),
+                              token_pattern=r"(?u)\b\w+\b", **comunes),
+            HashingVectorizer(analyzer="char_wb", ngram_range=tuple(config["ngramas_caracteres"]), **comunes),
+        )
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> ClasificadorNGramas:
+        return cls(config, model_storage, resource)
+
+    def _vectorizar(self, textos: List[Text]) -> scipy.sparse.csr_matrix:
+        """Filas L2-normalizadas con los n-gramas de palabras y de caracteres."""
+        matriz = scipy.sparse.hstack([vectorizador.transform(textos) for vectorizador in self._vectorizadores],
+                                     format="csr")
+        return normalize(matriz, copy=False)
+
+    def train(self, training_data: TrainingData) -> Resource:
+        ejemplos = [ejemplo for ejemplo in training_data.intent_examples if ejemplo.get(TEXT)]
+        etiquetas = sorted({ejemplo.get(INTENT) for ejemplo in ejemplos})
+        if len(etiquetas) < 2:
+            logger.warning("ClasificadorNGramas necesita al menos dos intents con ejemplos; no se entrena")
+            return self._resource
+
+        indices = {etiqueta: i for i, etiqueta in enumerate(etiquetas)}
+        x = self._vectorizar([ejemplo.get(TEXT) for ejemplo in ejemplos])
+        y = np.array([indices[ejemplo.get(INTENT)] for ejemplo in ejemplos])
+        modelo = LogisticRegression(C=float(self._config["C"]), max_iter=int(self._config["max_iteraciones"]))
+        modelo.fit(x, y)
+
+        self._etiquetas = etiquetas
+        if len(etiquetas) == 2:
+            # Binaria: sklearn guarda una sola fila; se expresa como dos clases
+            self._pesos = np.vstack([-modelo.coef_[0] / 2, modelo.coef_[0] / 2]).astype(np.float32)
+            self._sesgos = np.array([-modelo.intercept_[0] / 2, modelo.intercept_[0] / 2], dtype=np.float32)
+        else:
+            self._pesos = modelo.coef_.astype(np.float32)
+            self._sesgos = modelo.intercept_.astype(np.float32)
+        logger.info("ClasificadorNGramas: %d ejemplos, %d intents, %d columnas con peso",
+                    len(ejemplos), len(etiquetas), int(np.count_nonzero(np.any(self._pesos, axis=0))))
+        self.persist()
+        return self._resource
+
+    def predecir(self, textos: List[Text]) -> np.ndarray:
+        """Probabilidad de cada intent (filas) para cada texto, en un solo producto."""
+        puntajes = np.asarray(self._vectorizar(textos) @ self._pesos.T) + self._sesgos
+        puntajes -= puntajes.max(axis=1, keepdims=True)
+        np.exp(puntajes, out=puntajes)
+        puntajes /= puntajes.sum(axis=1, keepdims=True)
+        return puntajes
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        pendientes = [message for message in messages if not message.get(RESUELTO) and message.get(TEXT)]
+        if not pendientes or self._pesos is None:
+            return messages
+
+        probabilidades = self.predecir([message.get(TEXT) for message in pendientes])
+        largo = int(self._config["ranking_length"]) or len(self._etiquetas)
+        for message, fila in zip(pendientes, probabilidades):
+            orden = np.argsort(-fila)[:largo]
+            ranking = [
+                {INTENT_NAME_KEY: self._etiquetas[i], PREDICTED_CONFIDENCE_KEY: float(fila[i])} for i in orden
+            ]
+            message.set(INTENT, ranking[0], add_to_output=True)
+            message.set(INTENT_RANKING_KEY, ranking, add_to_output=True)
+        return messages
+
+    def persist(self) -> None:
+        if self._pesos is None:
+            return
+        with self._model_storage.write_to(self._resource) as directorio:
+            np.savez_compressed(directorio / _ARCHIVO_PESOS, pesos=self._pesos, sesgos=self._sesgos)
+            (directorio / _ARCHIVO_ETIQUETAS).write_text(json.dumps(self._etiquetas, ensure_ascii=False),
+                                                         encoding="utf-8")
+
+    @classmethod
+    def load(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+        **kwargs: Any,
+    ) -> ClasificadorNGramas:
+        try:
+            with model_storage.read_from(resource) as directorio:
+                with np.load(directorio / _ARCHIVO_PESOS) as archivo:
+                    pesos, sesgos = archivo["pesos"], archivo["sesgos"]
+                etiquetas = json.loads((directorio / _ARCHIVO_ETIQUETAS).read_text(encoding="utf-8"))
+        except (ValueError, FileNotFoundError):
+            logger.warning("ClasificadorNGramas sin modelo entrenado en '%s'; no clasificará", resource.name)
+            return cls(config, model_storage, resource)
+        return cls(config, model_storage, resource, etiquetas, pesos, sesgos)
@@ -0,0 +1,195 @@
+"""
+Event broker local de analítica.
+
+Rasa publica cada evento nuevo de un tracker al guardarlo. Este broker se
+queda solo con los que alimentan el embudo por operador -los `SlotSet` de
+`slots` y las ejecuciones de `action_session_start`, que marcan el inicio de
+sesión- y los guarda en memoria. Se escriben en lotes a un archivo SQLite
+de solo inserción (extensiones/analitica.py) desde un hilo aparte, así que
+`publish` no hace E/S ni bloquea el event loop.
+
+Si SQLite no da abasto los eventos se acumulan hasta `max_pending`; a partir
+de ahí se descartan los nuevos y se cuentan en las estadísticas, en lugar de
+hacer crecer la memoria del servidor de Rasa. Los slots de `anonymize` se
+guardan como hash: el embudo solo necesita saber si se dieron.
+
+Configuración en endpoints.yml:
+
+    event_broker:
+      type: extensiones.event_broker.SQLiteEventBroker
+      url: /app/analitica/eventos.db
+      batch_size: 500
+      flush_interval: 2.0
+
+Embudo por operador: `python -m extensiones.analitica /app/analitica/eventos.db`
+"""
+
+import asyncio
+import atexit
+import collections
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from asyncio import AbstractEventLoop
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Text
+
+from rasa.core.brokers.broker import EventBroker
+from rasa.utils.endpoints import EndpointConfig
+
+from extensiones.analitica import TIPO_SESION, TIPO_SLOT, AlmacenEventos, Fila
+
+logger = logging.getLogger(__name__)
+
+SLOTS_EMBUDO = ("compania_operador", "estado_menu", "numero_telefono", "conversation_ending")
+ACCION_INICIO_SESION = "action_session_start"
+
+
+class SQLiteEventBroker(EventBroker):
+    """Filtra los eventos del embudo y los escribe en lotes a SQLite."""
+
+    def __init__(
+        self,
+        path: Text,
+        slots: Iterable[Text] = SLOTS_EMBUDO,
+        anonymize: Iterable[Text] = ("numero_telefono",),
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        max_pending: int = 100000,
+        stats_interval: float = 60.0,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Args:
+            path: Ruta del archivo SQLite (la `url` del endpoint)
+            slots: Slots cuyos `SlotSet` se guardan
+            anonymize: Slots que se guardan como hash en lugar del valor
+            batch_size: Eventos pendientes que disparan una escritura
+            flush_interval: Segundos máximos que un evento espera a escribirse
+            max_pending: Eventos en memoria como máximo; los que no caben se
+                descartan
+            stats_interval: Segundos entre registros de estadísticas en el log
+        """
+        self._slots = frozenset(slots)
+        self._anonimos = frozenset(anonymize)
+        self._tamano_lote = int(batch_size)
+        self._intervalo_escritura = float(flush_interval)
+        self._max_pendientes = int(max_pending)
+        self._intervalo_estadisticas = float(stats_interval)
+        self._ultimas_estadisticas = time.monotonic()
+
+        self._pendientes: List[Fila] = []
+        self._escritura_programada = False
+        self._tarea_lote: Optional[asyncio.Task] = None
+        self._contadores = collections.Counter()
+
+        self._almacen = AlmacenEventos(path)
+        self._hilo_sqlite = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analitica-sqlite")
+        atexit.register(self._vaciar_al_salir)
+        logger.info("Eventos de analítica en '%s' (slots: %s)", path, ", ".join(sorted(self._slots)))
+
+    @classmethod
+    async def from_endpoint_config(
+        cls,
+        broker_config: Optional[EndpointConfig],
+        event_loop: Optional[AbstractEventLoop] = None,
+    ) -> Optional["SQLiteEventBroker"]:
+        if broker_config is None:
+            return None
+        return cls(broker_config.url, **broker_config.kwargs)
+
+    def _fila(self, evento: Dict[Text, Any]) -> Optional[Fila]:
+        """Fila de la tabla o None si el evento no interesa al embudo."""
+        tipo = evento.get("event")
+        if tipo == "slot":
+            slot = evento.get("name")
+            if slot not in self._slots:
+                return None
+            valor = evento.get("value")
+            if valor is not None and not isinstance(valor, str):
+                valor = json.dumps(valor, ensure_ascii=False)
+            if valor is not None and slot in self._anonimos:
+                valor = hashlib.sha256(valor.encode("utf-8")).hexdigest()[:16]
+            return evento.get("sender_id", ""), evento.get("timestamp") or time.time(), TIPO_SLOT, slot, valor
+        if tipo == "action" and evento.get("name") == ACCION_INICIO_SESION:
+            return evento.get("sender_id", ""), evento.get("timestamp") or time.time(), TIPO_SESION, None, None
+        return None
+
+    # **ESCRITURA DIFERIDA**
+
+    def _programar_escritura(self) -> None:
+        loop = asyncio.get_running_loop()
+        if len(self._pendientes) >= self._tamano_lote:
+            if self._tarea_lote is None or self._tarea_lote.done():
+                self._tarea_lote = loop.create_task(self._vaciar())
+        elif not self._escritura_programada:
+            self._escritura_programada = True
+            loop.call_later(self._intervalo_escritura, lambda: loop.create_task(self._vaciar()))
+
+    async def _vaciar(self) -> None:
+        """Escribe en un lote todos los eventos pendientes."""
+        self._escritura_programada = False
+        if not self._pendientes:
+            return
+        lote, self._pendientes = self._pendientes, []
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._hilo_sqlite, self._almacen.escribir, lote)
+            self._contadores["escritos"] += len(lote)
+            self._contadores["lotes"] += 1
+        except sqlite3.Error as error:
+            # Se reintentan en el próximo lote, antes que los llegados mientras tanto
+            espacio = max(0, self._max_pendientes - len(self._pendientes))
+            self._contadores["descartados"] += max(0, len(lote) - espacio)
+            self._pendientes[:0] = lote[:espacio]
+            self._contadores["errores_escritura"] += 1
+            logger.error("No se pudieron escribir %d eventos de analítica en SQLite: %s", len(lote), error)
+        self._registrar_estadisticas()
+
+    def _vaciar_al_salir(self) -> None:
+        if self._pendientes:
+            lote, self._pendientes = self._pendientes, []
+            try:
+                self._almacen.escribir(lote)
+            except sqlite3.Error as error:
+                logger.error("Eventos de analítica perdidos al salir (%d): %s", len(lote), error)
+
+    def _registrar_estadisticas(self) -> None:
+        ahora = time.monotonic()
+        if ahora - self._ultimas_estadisticas >= self._intervalo_estadisticas:
+            self._ultimas_estadisticas = ahora
+            estadisticas = self.estadisticas()
+            logger.info("Analítica: %s", estadisticas, extra={"analitica": estadisticas})
+
+    # **INTERFAZ DE EventBroker**
+
+    def publish(self, event: Dict[Text, Any]) -> None:
+        """Encola el evento si es del embudo; nunca escribe en el event loop."""
+        self._contadores["recibidos"] += 1
+        fila = self._fila(event)
+        if fila is None:
+            return
+        if len(self._pendientes) >= self._max_pendientes:
+            self._contadores["descartados"] += 1
+            return
+        self._pendientes.append(fila)
+        self._programar_escritura()
+
+    async def close(self) -> None:
+        """Escribe lo pendiente y cierra el archivo."""
+        if self._tarea_lote is not None and not self._tarea_lote.done():
+            await self._tarea_lote
+        await self._vaciar()
+        self._hilo_sqlite.shutdown(wait=True)
+        self._almacen.cerrar()
+        atexit.unregister(self._vaciar_al_salir)
+
+    def estadisticas(self) -> Dict[Text, Any]:
+        """Eventos recibidos, encolados, escritos y descartados."""
+        return {
+            "pendientes": len(self._pendientes),
+            **{clave: self._contadores[clave] for clave in (
+                "recibidos", "escritos", "lotes", "descartados", "errores_escritura",
+            )},
+        }
@@ -0,0 +1,177 @@
+"""
+Calentamiento del servidor de Rasa y endpoint `/ready`.
+
+Al arrancar, el primer mensaje paga el trazado del grafo de DIET, imports
+perezosos y la compilación de expresiones regulares. Este conector, en cuanto
+el agente está cargado, pasa por `Agent.parse_message` un conjunto de
+mensajes sintéticos tomados de `data/nlu.yml` y solo entonces responde 200 en
+`/ready`; antes responde 503. Sin modelo cargado (no se encontró al arrancar,
+o todavía no lo baja del servidor de modelos) responde 503 con
+`"status": "sin_modelo"` y el calentamiento espera a que el agente esté listo.
+El tiempo desde el inicio del proceso hasta quedar listo se registra en el log
+y en la respuesta de `/ready`. Los mensajes sintéticos se parsean dentro de
+`sin_registro()`, así que no cuentan en las métricas de `NLURapida` ni pasan
+por la cache de NLU.
+
+`/ready/metrics` sirve en formato Prometheus las métricas que los componentes
+del pipeline registran en `extensiones.metricas` (por ejemplo la cache de NLU),
+igual que `/metrics` en el servidor de acciones.
+
+Rasa no tiene un hook para añadir rutas al servidor; un conector de entrada
+es la forma soportada de registrar un blueprint, y con `url_prefix` "/ready"
+la ruta queda en la raíz. En credentials.yml:
+
+    extensiones.listo.CanalListo:
+      mensajes: 200
+      espera_modelo: 1.0
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Text
+
+from sanic import Blueprint, Sanic, response
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+from rasa.core.channels.channel import InputChannel, UserMessage
+
+from actions.metricas import sin_registro
+from config.arranque import segundos_desde_inicio
+from extensiones.metricas import METRICAS_RASA
+
+logger = logging.getLogger(__name__)
+
+RUTA_DATOS_NLU = os.path.join("data", "nlu.yml")
+
+CONTENT_TYPE_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+# Mensajes que Node-RED manda sin estar en los ejemplos de entrenamiento
+_MENSAJES_FIJOS = (
+    "1", "2", "3", "0",
+    "OPERATOR TELCEL NUMERO 5512345678",
+    "COMPANIA_DETECTADA MOVISTAR NUMERO 5512345678",
+    "INICIO_BOT",
+)
+
+
+def mensajes_calentamiento(ruta: Text = RUTA_DATOS_NLU, maximo: int = 200) -> List[Text]:
+    """Textos de los ejemplos de NLU (sin anotaciones) más las formas de Node-RED."""
+    from rasa.shared.nlu.training_data.loading import load_data
+
+    mensajes = list(_MENSAJES_FIJOS)
+    try:
+        datos = load_data(ruta)
+    except Exception as error:  # sin datos se calienta solo con los mensajes fijos
+        logger.warning("No se pudieron leer los ejemplos de %s: %s", ruta, error)
+        return mensajes
+
+    vistos = set(mensajes)
+    for ejemplo in datos.intent_examples:
+        texto = ejemplo.get("text")
+        if texto and texto not in vistos:
+            vistos.add(texto)
+            mensajes.append(texto)
+        if len(mensajes) >= maximo:
+            break
+    return mensajes
+
+
+def _agente_listo(app: Sanic) -> Optional[Any]:
+    """El agente del servidor si tiene un modelo cargado; si no, None."""
+    agente = getattr(app.ctx, "agent", None)
+    return agente if agente is not None and agente.is_ready() else None
+
+
+class CanalListo(InputChannel):
+    """Conector sin mensajería: calienta el agente y expone `/ready` y `/ready/metrics`."""
+
+    @classmethod
+    def name(cls) -> Text:
+        return "listo"
+
+    @classmethod
+    def from_credentials(cls, credentials: Optional[Dict[Text, Any]]) -> InputChannel:
+        credentials = credentials or {}
+        return cls(
+            mensajes=int(credentials.get("mensajes", 200)),
+            datos=credentials.get("datos", RUTA_DATOS_NLU),
+            espera_modelo=float(credentials.get("espera_modelo", 1.0)),
+        )
+
+    def __init__(self, mensajes: int = 200, datos: Text = RUTA_DATOS_NLU, espera_modelo: float = 1.0) -> None:
+        self.mensajes = mensajes
+        self.datos = datos
+        # Segundos entre revisiones mientras no hay modelo cargado
+        self.espera_modelo = espera_modelo
+        self.listo = False
+        self.estadisticas: Dict[Text, Any] = {}
+
+    def url_prefix(self) -> Text:
+        return "/ready"
+
+    async def esperar_modelo(self, app: Sanic) -> Any:
+        """Agente de `app.ctx` en cuanto tiene un modelo cargado."""
+        avisado = False
+        while True:
+            agente = _agente_listo(app)
+            if agente is not None:
+                return agente
+            if not avisado:
+                logger.warning("Sin modelo cargado; /ready responde 503 hasta que se cargue uno")
+                avisado = True
+            await asyncio.sleep(self.espera_modelo)
+
+    async def calentar(self, app: Sanic) -> None:
+        """Espera el modelo, parsea los mensajes sintéticos y marca el servidor como listo."""
+        agente = await self.esperar_modelo(app)
+        inicio = time.perf_counter()
+        parseados = errores = 0
+
+        # La marca es de esta tarea: los mensajes reales que lleguen mientras
+        # tanto se registran y usan la cache normalmente
+        with sin_registro():
+            for texto in mensajes_calentamiento(self.datos, self.mensajes):
+                try:
+                    await agente.parse_message(texto)
+                    parseados += 1
+                except Exception as error:
+                    errores += 1
+                    logger.warning("Calentamiento: falló el parseo de %r: %s", texto, error)
+                # El grafo corre en el event loop; se cede entre mensajes para
+                # que /ready y /status sigan respondiendo
+                await asyncio.sleep(0)
+
+        self.estadisticas = {
+            "mensajes": parseados,
+            "errores": errores,
+            "calentamiento_s": round(time.perf_counter() - inicio, 3),
+            "tiempo_hasta_listo_s": round(segundos_desde_inicio(), 3),
+        }
+        self.listo = True
+        logger.info("Servidor de Rasa listo: %s", self.estadisticas, extra={"arranque": self.estadisticas})
+
+    def blueprint(self, on_new_message: Callable[[UserMessage], Awaitable[Any]]) -> Blueprint:
+        listo = Blueprint("listo", __name__)
+
+        @listo.listener("after_server_start")
+        async def iniciar_calentamiento(app: Sanic, _loop) -> None:
+            app.add_task(self.calentar(app))
+
+        @listo.route("", methods=["GET"])
+        async def ready(request: Request) -> HTTPResponse:
+            """200 con modelo cargado y calentamiento terminado; 503 mientras tanto."""
+            if _agente_listo(request.app) is None:
+                return response.json({"status": "sin_modelo"}, status=503)
+            if not self.listo:
+                return response.json({"status": "calentando"}, status=503)
+            return response.json({"status": "ready", **self.estadisticas})
+
+        @listo.route("/metrics", methods=["GET"])
+        async def metricas(_: Request) -> HTTPResponse:
+            """Métricas del proceso de Rasa en formato de texto Prometheus."""
+            return response.text(METRICAS_RASA.exponer(), content_type=CONTENT_TYPE_PROMETHEUS)
+
+        return listo
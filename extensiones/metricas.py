@@ -0,0 +1,12 @@
+"""
+Métricas del proceso de Rasa en formato de texto Prometheus.
+
+Registro propio (mismas clases que `actions.metricas`) para que el `/metrics`
+de cada proceso muestre solo lo suyo. Los componentes del pipeline registran
+aquí sus contadores y `extensiones.listo.CanalListo` los sirve en
+`/ready/metrics`.
+"""
+
+from actions.metricas import RegistroMetricas
+
+METRICAS_RASA = RegistroMetricas()
@@ -0,0 +1,271 @@
+"""
+Atajo determinista al frente del pipeline de NLU.
+
+Casi todo el tráfico entrante es un dígito del menú ("1", "2", "0"), el
+payload de un botón del menú (actions/postback.py) o un texto generado por
+Node-RED (`OPERATOR TELCEL NUMERO ...`,
+`COMPANIA_DETECTADA ...`, `INICIO_BOT ...`, el nombre de uno de los
+operadores principales solo).
+`NLURapida` reconoce exactamente esas formas, fija intención y entidades con
+confianza 1.0 y marca el mensaje como resuelto. El resto de componentes del
+pipeline son subclases de los de Rasa que dejan pasar sin tocar los mensajes
+marcados, así que tokenizador, featurizers y DIET solo trabajan con texto
+libre. Un `INICIO_BOT` sin compañía ni número sigue por el pipeline, como
+cualquier texto que el atajo no reconozca. El entrenamiento no cambia: el atajo no es entrenable y las subclases
+solo filtran en `process`.
+
+    pipeline:
+    - name: extensiones.nlu_rapida.NLURapida
+    - name: extensiones.nlu_rapida.WhitespaceTokenizerRapido
+    - name: extensiones.nlu_rapida.DIETClassifierRapido
+      ...
+
+Cada mensaje cuenta en `ACIERTOS_NLU_RAPIDA` por la ruta que tomó (dígito,
+botón, formato de Node-RED o pipeline completo); el contador se sirve en
+`/ready/metrics` y los totales se registran en el log cada
+`intervalo_estadisticas` segundos. Lo que se parsea dentro de `sin_registro()`
+(el calentamiento de `extensiones.listo`) no cuenta.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.classifiers.diet_classifier import DIETClassifier
+from rasa.nlu.constants import ENTITY_ATTRIBUTE_CONFIDENCE_TYPE
+from rasa.nlu.extractors.entity_synonyms import EntitySynonymMapper
+from rasa.nlu.extractors.extractor import EntityExtractorMixin
+from rasa.nlu.extractors.regex_entity_extractor import RegexEntityExtractor
+from rasa.nlu.featurizers.sparse_featurizer.count_vectors_featurizer import CountVectorsFeaturizer
+from rasa.nlu.featurizers.sparse_featurizer.lexical_syntactic_featurizer import LexicalSyntacticFeaturizer
+from rasa.nlu.featurizers.sparse_featurizer.regex_featurizer import RegexFeaturizer
+from rasa.nlu.tokenizers.whitespace_tokenizer import WhitespaceTokenizer
+from rasa.shared.nlu.constants import (
+    ENTITIES,
+    ENTITY_ATTRIBUTE_END,
+    ENTITY_ATTRIBUTE_START,
+    ENTITY_ATTRIBUTE_TYPE,
+    ENTITY_ATTRIBUTE_VALUE,
+    INTENT,
+    INTENT_NAME_KEY,
+    INTENT_RANKING_KEY,
+    PREDICTED_CONFIDENCE_KEY,
+    TEXT,
+)
+from rasa.shared.nlu.training_data.message import Message
+
+from actions.deteccion import detectar_mensaje_node_red
+from actions.operadores import REGISTRY
+from actions.postback import ENTIDAD_OPCION, ENTIDAD_ORIGEN, INTENCION_POSTBACK, leer_postback
+from extensiones.metricas import METRICAS_RASA
+
+logger = logging.getLogger(__name__)
+
+# Propiedad del mensaje (fuera de la salida) que marca un mensaje ya resuelto
+RESUELTO = "botmobile_resuelto"
+
+INTENCION_MENU = "elegir_opcion"
+ENTIDAD_MENU = "numero_opcion"
+INTENCION_COMPANIA = "informar_compania"
+ENTIDAD_COMPANIA = "compania_operador"
+
+_PATRON_DIGITO = re.compile(r"\s*([0-9])\s*")
+
+# Prefijos con los que Node-RED arma sus mensajes; sin ellos solo se acepta
+# el nombre de un operador con `nombre_directo` como texto completo
+_PATRON_PREFIJO_NODE_RED = re.compile(r"\s*(?:COMPANIA_DETECTADA|OPERATOR|INICIO_BOT|START_SESSION)\b")
+
+# Dónde está el nombre de la compañía dentro del mensaje, para la entidad
+_PATRON_SPAN_COMPANIA = re.compile(r"(?:COMPANIA_DETECTADA|OPERATOR)\s+(SPOT\s+UNO|[A-Z&]+)")
+
+ACIERTOS_NLU_RAPIDA = METRICAS_RASA.contador(
+    "botmobile_nlu_rapida_mensajes_total",
+    "Mensajes por ruta de NLURapida (dígito, botón, formato de Node-RED o pipeline completo)",
+    ("ruta",),
+)
+
+
+def estadisticas() -> Dict[Text, int]:
+    """Copia ordenada de los aciertos por ruta."""
+    return {ruta: int(valor) for (ruta,), valor in sorted(ACIERTOS_NLU_RAPIDA.series().items())}
+
+
+def _entidad(entidad: Text, valor: Text, inicio: int, fin: int) -> Dict[Text, Any]:
+    return {
+        ENTITY_ATTRIBUTE_TYPE: entidad,
+        ENTITY_ATTRIBUTE_START: inicio,
+        ENTITY_ATTRIBUTE_END: fin,
+        ENTITY_ATTRIBUTE_VALUE: valor,
+        ENTITY_ATTRIBUTE_CONFIDENCE_TYPE: 1.0,
+    }
+
+
+def _span_compania(texto: Text, compania: Text) -> Tuple[int, int]:
+    """Posición del nombre de la compañía; todo el texto si no se ubica."""
+    texto_upper = texto.upper()
+    match = _PATRON_SPAN_COMPANIA.search(texto_upper)
+    if match:
+        return match.span(1)
+    posicion = texto_upper.find(compania.upper())
+    if posicion >= 0:
+        return posicion, posicion + len(compania)
+    return 0, len(texto)
+
+
+def resolver_rapido(texto: Optional[Text]) -> Optional[Tuple[Text, Text, List[Dict[Text, Any]]]]:
+    """
+    Reconoce las formas exactas que no necesitan el modelo.
+
+    Args:
+        texto: Texto del mensaje del usuario
+
+    Returns:
+        (ruta, intención, entidades) o None si el texto debe pasar por el
+        pipeline completo
+    """
+    if not texto:
+        return None
+
+    match = _PATRON_DIGITO.fullmatch(texto)
+    if match:
+        return "digito", INTENCION_MENU, [_entidad(ENTIDAD_MENU, match.group(1), *match.span(1))]
+
+    postback = leer_postback(texto)
+    if postback:
+        return "boton", INTENCION_POSTBACK, [
+            _entidad(ENTIDAD_OPCION, postback.group("opcion"), *postback.span("opcion")),
+            _entidad(ENTIDAD_ORIGEN, postback.group("estado"), *postback.span("estado")),
+        ]
+
+    if _PATRON_PREFIJO_NODE_RED.match(texto.upper()):
+        deteccion = detectar_mensaje_node_red(texto)
+        if not deteccion.compania:
+            return None
+        inicio, fin = _span_compania(texto, deteccion.compania)
+        return (f"node_red_{deteccion.formato}", INTENCION_COMPANIA,
+                [_entidad(ENTIDAD_COMPANIA, deteccion.compania, inicio, fin)])
+
+    # Solo los operadores marcados con `nombre_directo` en config/operadores.yml:
+    # el catálogo tiene nombres que también son palabras comunes ("valor", "rosa")
+    compania = REGISTRY.resolver_directo(texto)
+    if compania is None:
+        return None
+    inicio = len(texto) - len(texto.lstrip())
+    return "nombre_operador", INTENCION_COMPANIA, [
+        _entidad(ENTIDAD_COMPANIA, compania, inicio, len(texto.rstrip()))
+    ]
+
+
+@DefaultV1Recipe.register(
+    [
+        DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER,
+        DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR,
+    ],
+    is_trainable=False,
+)
+class NLURapida(GraphComponent, EntityExtractorMixin):
+    """Resuelve dígitos y botones del menú y mensajes de Node-RED sin el modelo."""
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {"intervalo_estadisticas": 300}
+
+    def __init__(self, config: Dict[Text, Any]) -> None:
+        self._intervalo_estadisticas = float(config["intervalo_estadisticas"])
+        self._ultimas_estadisticas = time.monotonic()
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> NLURapida:
+        return cls(config)
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        """Fija intención y entidad en los mensajes que reconoce y los marca."""
+        for message in messages:
+            resultado = resolver_rapido(message.get(TEXT))
+            if resultado is None:
+                ACIERTOS_NLU_RAPIDA.inc("pipeline")
+                continue
+
+            ruta, intencion, entidades = resultado
+            ACIERTOS_NLU_RAPIDA.inc(ruta)
+            prediccion = {INTENT_NAME_KEY: intencion, PREDICTED_CONFIDENCE_KEY: 1.0}
+            message.set(INTENT, prediccion, add_to_output=True)
+            message.set(INTENT_RANKING_KEY, [prediccion], add_to_output=True)
+            message.set(ENTITIES, self.add_extractor_name(entidades), add_to_output=True)
+            message.set(RESUELTO, True)
+
+        self._registrar_estadisticas()
+        return messages
+
+    def _registrar_estadisticas(self) -> None:
+        ahora = time.monotonic()
+        if ahora - self._ultimas_estadisticas >= self._intervalo_estadisticas:
+            self._ultimas_estadisticas = ahora
+            totales = estadisticas()
+            logger.info("NLU rápida: %s", totales, extra={"nlu_rapida": totales})
+
+
+class _OmitirResueltos:
+    """Hace que `process` ignore los mensajes que ya resolvió `NLURapida`."""
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        pendientes = [message for message in messages if not message.get(RESUELTO)]
+        if pendientes:
+            super().process(pendientes)
+        return messages
+
+
+# Mismos tipos de componente que la clase de Rasa de la que heredan
+
+@DefaultV1Recipe.register(DefaultV1Recipe.ComponentType.MESSAGE_TOKENIZER, is_trainable=False)
+class WhitespaceTokenizerRapido(_OmitirResueltos, WhitespaceTokenizer):
+    pass
+
+
+@DefaultV1Recipe.register(DefaultV1Recipe.ComponentType.MESSAGE_FEATURIZER, is_trainable=True)
+class RegexFeaturizerRapido(_OmitirResueltos, RegexFeaturizer):
+    pass
+
+
+@DefaultV1Recipe.register(DefaultV1Recipe.ComponentType.MESSAGE_FEATURIZER, is_trainable=True)
+class LexicalSyntacticFeaturizerRapido(_OmitirResueltos, LexicalSyntacticFeaturizer):
+    pass
+
+
+@DefaultV1Recipe.register(DefaultV1Recipe.ComponentType.MESSAGE_FEATURIZER, is_trainable=True)
+class CountVectorsFeaturizerRapido(_OmitirResueltos, CountVectorsFeaturizer):
+    pass
+
+
+@DefaultV1Recipe.register(
+    [
+        DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER,
+        DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR,
+    ],
+    is_trainable=True,
+)
+class DIETClassifierRapido(_OmitirResueltos, DIETClassifier):
+    pass
+
+
+@DefaultV1Recipe.register(DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR, is_trainable=True)
+class EntitySynonymMapperRapido(_OmitirResueltos, EntitySynonymMapper):
+    pass
+
+
+@DefaultV1Recipe.register(DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR, is_trainable=True)
+class RegexEntityExtractorRapido(_OmitirResueltos, RegexEntityExtractor):
+    pass
@@ -0,0 +1,308 @@
+"""
+Tracker store en memoria con tamaño acotado.
+
+El InMemoryTrackerStore por defecto guarda para siempre el tracker de cada
+sender_id que haya escrito alguna vez. Este store mantiene solo los más
+recientes: un LRU con capacidad máxima y un TTL igual a
+`session_expiration_time` del dominio, pasado el cual la sesión ya habría
+expirado de todos modos.
+
+Opcionalmente cada tracker guardado se escribe también, en lotes y fuera del
+event loop, a un archivo SQLite local. Un tracker desalojado de memoria o
+perdido por un reinicio se restaura desde ahí en el siguiente mensaje, así
+que `carry_over_slots_to_new_session` sigue funcionando.
+
+Configuración en endpoints.yml:
+
+    tracker_store:
+      type: extensiones.tracker_store.BoundedTrackerStore
+      url: /app/trackers/trackers.db   # opcional: sin url no hay SQLite
+      max_trackers: 20000
+      batch_size: 200
+      flush_interval: 1.0
+"""
+
+import asyncio
+import atexit
+import collections
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Text, Tuple
+
+import rasa.shared.core.trackers
+from rasa.core.brokers.broker import EventBroker
+from rasa.core.tracker_store import SerializedTrackerAsText, TrackerStore
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.trackers import DialogueStateTracker
+
+logger = logging.getLogger(__name__)
+
+
+class _EspejoSQLite:
+    """Tabla sender_id -> tracker serializado, accedida desde un solo hilo."""
+
+    def __init__(self, ruta: Text) -> None:
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS trackers ("
+                "sender_id TEXT PRIMARY KEY, tracker TEXT NOT NULL, actualizado REAL NOT NULL)"
+            )
+
+    def escribir(self, filas: List[Tuple[Text, Text, float]]) -> None:
+        with self._lock:
+            self._conexion.execute("BEGIN")
+            try:
+                self._conexion.executemany(
+                    "INSERT OR REPLACE INTO trackers (sender_id, tracker, actualizado) VALUES (?, ?, ?)",
+                    filas,
+                )
+                self._conexion.execute("COMMIT")
+            except sqlite3.Error:
+                self._conexion.execute("ROLLBACK")
+                raise
+
+    def leer(self, sender_id: Text) -> Optional[Text]:
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT tracker FROM trackers WHERE sender_id = ?", (sender_id,)
+            ).fetchone()
+        return fila[0] if fila else None
+
+    def claves(self) -> List[Text]:
+        with self._lock:
+            return [fila[0] for fila in self._conexion.execute("SELECT sender_id FROM trackers")]
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._conexion.close()
+
+
+class BoundedTrackerStore(TrackerStore, SerializedTrackerAsText):
+    """LRU + TTL en memoria con escritura diferida opcional a SQLite."""
+
+    def __init__(
+        self,
+        domain: Domain,
+        host: Optional[Text] = None,
+        event_broker: Optional[EventBroker] = None,
+        max_trackers: int = 10000,
+        ttl_minutes: Optional[float] = None,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        stats_interval: float = 60.0,
+        **kwargs: Dict[Text, Any],
+    ) -> None:
+        """
+        Args:
+            domain: Dominio del asistente
+            host: Ruta del archivo SQLite (la `url` del endpoint); sin ella no
+                hay persistencia
+            event_broker: Broker al que se envían los eventos nuevos
+            max_trackers: Trackers residentes en memoria como máximo
+            ttl_minutes: Minutos sin actividad antes de desalojar un tracker;
+                por defecto `session_expiration_time` del dominio
+            batch_size: Trackers pendientes que disparan una escritura a SQLite
+            flush_interval: Segundos máximos que un tracker espera a escribirse
+            stats_interval: Segundos entre registros de estadísticas en el log
+        """
+        self._trackers: "collections.OrderedDict[Text, Tuple[Text, float]]" = collections.OrderedDict()
+        self._bytes = 0
+        self._max_trackers = int(max_trackers)
+        self._ttl_minutos = ttl_minutes
+        self._tamano_lote = int(batch_size)
+        self._intervalo_escritura = float(flush_interval)
+        self._intervalo_estadisticas = float(stats_interval)
+        self._ultimas_estadisticas = time.monotonic()
+
+        self._pendientes: Dict[Text, Text] = {}
+        self._escritura_programada = False
+        self._tarea_lote: Optional[asyncio.Task] = None
+        self._contadores = collections.Counter()
+
+        self._sqlite: Optional[_EspejoSQLite] = None
+        self._hilo_sqlite: Optional[ThreadPoolExecutor] = None
+        if host:
+            self._sqlite = _EspejoSQLite(host)
+            self._hilo_sqlite = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tracker-sqlite")
+            atexit.register(self._vaciar_al_salir)
+
+        super().__init__(domain, event_broker, **kwargs)
+
+    @property
+    def ttl_segundos(self) -> float:
+        """TTL efectivo; 0 desactiva la expiración por tiempo."""
+        if self._ttl_minutos is not None:
+            return float(self._ttl_minutos) * 60
+        return float(self.domain.session_config.session_expiration_time) * 60
+
+    # **MEMORIA**
+
+    def _guardar_en_memoria(self, sender_id: Text, serializado: Text) -> None:
+        anterior = self._trackers.pop(sender_id, None)
+        if anterior is not None:
+            self._bytes -= len(anterior[0])
+        self._trackers[sender_id] = (serializado, time.monotonic())
+        self._bytes += len(serializado)
+        self._desalojar()
+
+    def _desalojar(self) -> None:
+        """Saca primero los expirados y luego los menos usados que sobren."""
+        ttl = self.ttl_segundos
+        limite = time.monotonic() - ttl if ttl > 0 else None
+        while self._trackers:
+            sender_id, (serializado, acceso) = next(iter(self._trackers.items()))
+            if limite is not None and acceso < limite:
+                self._contadores["expirados_ttl"] += 1
+            elif len(self._trackers) > self._max_trackers:
+                self._contadores["desalojos_lru"] += 1
+            else:
+                break
+            del self._trackers[sender_id]
+            self._bytes -= len(serializado)
+
+    def _leer_de_memoria(self, sender_id: Text) -> Optional[Text]:
+        entrada = self._trackers.get(sender_id)
+        if entrada is None:
+            return None
+        ttl = self.ttl_segundos
+        if ttl > 0 and time.monotonic() - entrada[1] > ttl:
+            del self._trackers[sender_id]
+            self._bytes -= len(entrada[0])
+            self._contadores["expirados_ttl"] += 1
+            return None
+        self._trackers[sender_id] = (entrada[0], time.monotonic())
+        self._trackers.move_to_end(sender_id)
+        return entrada[0]
+
+    # **ESCRITURA DIFERIDA**
+
+    def _programar_escritura(self) -> None:
+        if self._sqlite is None:
+            return
+        loop = asyncio.get_running_loop()
+        if len(self._pendientes) >= self._tamano_lote:
+            if self._tarea_lote is None or self._tarea_lote.done():
+                self._tarea_lote = loop.create_task(self._vaciar())
+        elif not self._escritura_programada:
+            self._escritura_programada = True
+            loop.call_later(self._intervalo_escritura, lambda: loop.create_task(self._vaciar()))
+
+    async def _vaciar(self) -> None:
+        """Escribe en un lote todos los trackers pendientes."""
+        self._escritura_programada = False
+        if not self._pendientes or self._sqlite is None:
+            return
+        ahora = time.time()
+        lote, self._pendientes = self._pendientes, {}
+        filas = [(sender_id, serializado, ahora) for sender_id, serializado in lote.items()]
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._hilo_sqlite, self._sqlite.escribir, filas)
+            self._contadores["escritos"] += len(filas)
+            self._contadores["lotes"] += 1
+        except sqlite3.Error as error:
+            # Se reintentan en el próximo lote salvo que ya haya versiones más nuevas
+            for sender_id, serializado in lote.items():
+                self._pendientes.setdefault(sender_id, serializado)
+            self._contadores["errores_escritura"] += 1
+            logger.error("No se pudieron escribir %d trackers en SQLite: %s", len(filas), error)
+        self._registrar_estadisticas()
+
+    def _vaciar_al_salir(self) -> None:
+        if self._pendientes and self._sqlite is not None:
+            filas = [(s, t, time.time()) for s, t in self._pendientes.items()]
+            self._pendientes = {}
+            try:
+                self._sqlite.escribir(filas)
+            except sqlite3.Error as error:
+                logger.error("Trackers perdidos al salir (%d): %s", len(filas), error)
+
+    def _registrar_estadisticas(self) -> None:
+        ahora = time.monotonic()
+        if ahora - self._ultimas_estadisticas >= self._intervalo_estadisticas:
+            self._ultimas_estadisticas = ahora
+            estadisticas = self.estadisticas()
+            logger.info("Tracker store: %s", estadisticas, extra={"tracker_store": estadisticas})
+
+    async def _leer_serializado(self, sender_id: Text) -> Optional[Text]:
+        serializado = self._leer_de_memoria(sender_id)
+        if serializado is not None:
+            self._contadores["aciertos"] += 1
+            return serializado
+
+        serializado = self._pendientes.get(sender_id)
+        if serializado is None and self._sqlite is not None:
+            serializado = await asyncio.get_running_loop().run_in_executor(
+                self._hilo_sqlite, self._sqlite.leer, sender_id
+            )
+        if serializado is None:
+            self._contadores["fallos"] += 1
+            return None
+
+        self._contadores["restaurados"] += 1
+        self._guardar_en_memoria(sender_id, serializado)
+        return serializado
+
+    # **INTERFAZ DE TrackerStore**
+
+    async def save(self, tracker: DialogueStateTracker) -> None:
+        """Guarda el tracker en memoria y lo encola para SQLite."""
+        await self.stream_events(tracker)
+        serializado = self.serialise_tracker(tracker)
+        self._guardar_en_memoria(tracker.sender_id, serializado)
+        if self._sqlite is not None:
+            self._pendientes[tracker.sender_id] = serializado
+            self._programar_escritura()
+        # Con SQLite también se registran al vaciar cada lote; sin él, solo aquí
+        self._registrar_estadisticas()
+
+    async def retrieve(self, sender_id: Text) -> Optional[DialogueStateTracker]:
+        """Tracker de la última sesión de la conversación."""
+        return await self._retrieve(sender_id, fetch_all_sessions=False)
+
+    async def retrieve_full_tracker(self, sender_id: Text) -> Optional[DialogueStateTracker]:
+        """Tracker con todas las sesiones de la conversación."""
+        return await self._retrieve(sender_id, fetch_all_sessions=True)
+
+    async def _retrieve(self, sender_id: Text, fetch_all_sessions: bool) -> Optional[DialogueStateTracker]:
+        serializado = await self._leer_serializado(sender_id)
+        if serializado is None:
+            return None
+
+        tracker = self.deserialise_tracker(sender_id, serializado)
+        if not tracker or fetch_all_sessions:
+            return tracker
+
+        sesiones = rasa.shared.core.trackers.get_trackers_for_conversation_sessions(tracker)
+        if len(sesiones) <= 1:
+            return tracker
+        return sesiones[-1]
+
+    async def keys(self) -> Iterable[Text]:
+        """sender_ids en memoria y, si hay SQLite, también los persistidos."""
+        claves = set(self._trackers) | set(self._pendientes)
+        if self._sqlite is not None:
+            claves.update(await asyncio.get_running_loop().run_in_executor(
+                self._hilo_sqlite, self._sqlite.claves
+            ))
+        return claves
+
+    def estadisticas(self) -> Dict[Text, Any]:
+        """Trackers residentes, memoria usada, desalojos y escrituras."""
+        return {
+            "residentes": len(self._trackers),
+            "capacidad": self._max_trackers,
+            "bytes_residentes": self._bytes,
+            "ttl_segundos": self.ttl_segundos,
+            "pendientes": len(self._pendientes),
+            **{clave: self._contadores[clave] for clave in (
+                "aciertos", "fallos", "restaurados", "desalojos_lru", "expirados_ttl",
+                "escritos", "lotes", "errores_escritura",
+            )},
+        }
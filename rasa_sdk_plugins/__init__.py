@@ -0,0 +1,23 @@
+"""
+Plugins del servidor de acciones.
+
+rasa_sdk importa este paquete al arrancar `rasa run actions` y llama a
+`init_hooks`; cada módulo registrado implementa `attach_sanic_app_extensions`
+para añadir rutas, listeners o middleware a la app de Sanic.
+"""
+
+import pluggy
+
+hookimpl = pluggy.HookimplMarker("rasa_sdk")
+
+
+def init_hooks(manager: pluggy.PluginManager) -> None:
+    """Registra los plugins de BotMobile en el plugin manager de rasa_sdk."""
+    from rasa_sdk_plugins import admision, calentamiento, cliente_http, contenido, media, metricas
+
+    manager.register(metricas)
+    manager.register(admision)
+    manager.register(cliente_http)
+    manager.register(media)
+    manager.register(calentamiento)
+    manager.register(contenido)
@@ -0,0 +1,227 @@
+"""
+Control de admisión de `/webhook` para las ráfagas de Node-RED.
+
+Cuando Node-RED lanza una campaña llegan miles de `action_session_start` a
+la vez. Sin límite, todas esperan dentro de Sanic hasta que vence el timeout
+de acciones de Rasa y fallan todas las conversaciones, no solo las que
+sobran. Aquí cada trabajador atiende como mucho `concurrencia` llamadas a la
+vez; las siguientes esperan en una cola FIFO acotada y, si no consiguen turno
+antes de `espera` segundos, se rechazan. Con la cola llena se rechaza en el
+acto. Ambos rechazos llevan `Retry-After` para que el emisor reintente:
+
+- 429 si la cola está llena (llegan más de las que caben)
+- 503 si se agotó la espera en la cola (el servidor no alcanza a atenderlas)
+
+La espera se cuenta desde que llegó la petición, no desde el middleware: las
+acciones casi no ceden el event loop, así que en una ráfaga las peticiones
+hacen fila antes de llegar aquí (en el loop, con `activas` en 1) y ese
+tiempo también consume el plazo. Una petición que ya esperó `espera`
+segundos se rechaza sin ejecutar la acción, lo que cuesta mucho menos.
+
+`/health`, `/ready` y `/metrics` no pasan por aquí.
+
+Configuración (por trabajador):
+    BOTMOBILE_ADMISION_CONCURRENCIA  llamadas simultáneas (0 desactiva; 32)
+    BOTMOBILE_ADMISION_COLA          llamadas en espera como máximo (128)
+    BOTMOBILE_ADMISION_ESPERA        segundos máximos en la cola (2.0)
+    BOTMOBILE_ADMISION_RETRY_AFTER   segundos sugeridos para reintentar (1)
+"""
+
+import asyncio
+import collections
+import logging
+import os
+import time
+from typing import Deque, Optional, Text
+
+from sanic import Sanic, response
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+from actions.metricas import METRICAS
+from rasa_sdk_plugins import hookimpl
+
+logger = logging.getLogger(__name__)
+
+RUTA_ADMITIDA = "/webhook"
+
+CONCURRENCIA = int(os.environ.get("BOTMOBILE_ADMISION_CONCURRENCIA", "32"))
+COLA = int(os.environ.get("BOTMOBILE_ADMISION_COLA", "128"))
+ESPERA = float(os.environ.get("BOTMOBILE_ADMISION_ESPERA", "2.0"))
+RETRY_AFTER = int(os.environ.get("BOTMOBILE_ADMISION_RETRY_AFTER", "1"))
+
+# Motivo de rechazo -> código HTTP
+COLA_LLENA = "cola_llena"
+ESPERA_AGOTADA = "espera_agotada"
+ESTADOS_RECHAZO = {COLA_LLENA: 429, ESPERA_AGOTADA: 503}
+
+ESPERA_ADMISION = METRICAS.histograma(
+    "botmobile_admision_espera_segundos",
+    "Tiempo desde la llegada hasta la ejecución de las llamadas admitidas",
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+RECHAZOS_ADMISION = METRICAS.contador(
+    "botmobile_admision_rechazos_total", "Llamadas a /webhook rechazadas por motivo", ("motivo",)
+)
+
+
+class ControlAdmision:
+    """Semáforo con cola FIFO acotada y plazo de espera."""
+
+    def __init__(self, concurrencia: int, cola: int, espera: float) -> None:
+        """
+        Args:
+            concurrencia: Llamadas atendidas a la vez
+            cola: Llamadas esperando turno como máximo
+            espera: Segundos que una llamada puede esperar turno
+        """
+        self.concurrencia = concurrencia
+        self.max_cola = cola
+        self.espera = espera
+        self.activas = 0
+        self._cola: Deque[asyncio.Future] = collections.deque()
+
+    @property
+    def en_cola(self) -> int:
+        return len(self._cola)
+
+    async def entrar(self, espera: Optional[float] = None) -> Optional[Text]:
+        """
+        Espera turno.
+
+        Args:
+            espera: Segundos que puede esperar en la cola (por defecto
+                `self.espera`)
+
+        Returns:
+            None si se admitió (hay que llamar a `salir` al terminar) o el
+            motivo del rechazo
+        """
+        if self.activas < self.concurrencia and not self._cola:
+            self.activas += 1
+            return None
+        if len(self._cola) >= self.max_cola:
+            return COLA_LLENA
+        espera = self.espera if espera is None else espera
+        if espera <= 0:
+            return ESPERA_AGOTADA
+
+        loop = asyncio.get_running_loop()
+        turno = loop.create_future()
+        self._cola.append(turno)
+        plazo = loop.call_later(espera, lambda: turno.done() or turno.set_result(False))
+        try:
+            admitida = await turno
+        except asyncio.CancelledError:
+            # El cliente se fue mientras esperaba; si ya tenía el turno, se cede
+            if turno.done() and not turno.cancelled() and turno.result():
+                self.salir()
+            elif turno in self._cola:
+                self._cola.remove(turno)
+            raise
+        finally:
+            plazo.cancel()
+
+        if not admitida:
+            # Si una salida llegó en la misma vuelta del loop que el plazo, ya
+            # sacó de la cola este turno vencido
+            if turno in self._cola:
+                self._cola.remove(turno)
+            return ESPERA_AGOTADA
+        return None
+
+    def salir(self) -> None:
+        """Libera el turno y se lo pasa a la primera llamada en cola."""
+        while self._cola:
+            turno = self._cola.popleft()
+            if not turno.done():
+                # El turno pasa directo: `activas` no cambia
+                turno.set_result(True)
+                return
+        self.activas -= 1
+
+
+def _llegada(request: Request) -> Optional[float]:
+    """
+    Momento (time.monotonic) en que llegaron los últimos bytes de la petición.
+
+    Sanic lo guarda en el protocolo de la conexión para sus timeouts.
+    """
+    transporte = request.transport
+    protocolo = transporte.get_protocol() if transporte is not None else None
+    return getattr(protocolo, "_time", None)
+
+
+class _Turno:
+    """Turno de una petición; se libera una sola vez, responda o no."""
+
+    __slots__ = ('control', 'tarea', 'liberado')
+
+    def __init__(self, control: ControlAdmision, tarea: Optional[asyncio.Task]) -> None:
+        self.control = control
+        self.tarea = tarea
+        self.liberado = False
+        if tarea is not None:
+            tarea.add_done_callback(self._al_terminar_tarea)
+
+    def _al_terminar_tarea(self, _tarea: asyncio.Task) -> None:
+        self.liberar()
+
+    def liberar(self) -> None:
+        if self.liberado:
+            return
+        self.liberado = True
+        if self.tarea is not None:
+            self.tarea.remove_done_callback(self._al_terminar_tarea)
+        self.control.salir()
+
+
+ADMISION = ControlAdmision(CONCURRENCIA, COLA, ESPERA)
+
+METRICAS.medidor(
+    "botmobile_admision_activas", "Llamadas a /webhook en ejecución",
+    funcion=lambda: ADMISION.activas,
+)
+METRICAS.medidor(
+    "botmobile_admision_cola", "Llamadas a /webhook esperando turno",
+    funcion=lambda: ADMISION.en_cola,
+)
+
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    if CONCURRENCIA <= 0:
+        return
+
+    @app.middleware("request")
+    async def admitir(request: Request) -> Optional[HTTPResponse]:
+        # Sanic vuelve a correr el middleware de petición si el handler falla
+        if request.method != "POST" or request.path != RUTA_ADMITIDA or hasattr(request.ctx, "admision"):
+            return None
+        request.ctx.admision = None
+
+        ahora = time.monotonic()
+        llegada = min(_llegada(request) or ahora, ahora)
+        restante = ESPERA - (ahora - llegada)
+        motivo = await ADMISION.entrar(restante) if restante > 0 else ESPERA_AGOTADA
+        if motivo is not None:
+            RECHAZOS_ADMISION.inc(motivo)
+            return response.json(
+                {"error": "Servidor de acciones saturado, reintentar más tarde", "motivo": motivo},
+                status=ESTADOS_RECHAZO[motivo],
+                headers={"Retry-After": str(RETRY_AFTER)},
+            )
+        ESPERA_ADMISION.observar(time.monotonic() - llegada)
+        # La tarea de la conexión termina si el cliente se desconecta a media
+        # acción; en ese caso no hay middleware de respuesta que libere
+        request.ctx.admision = _Turno(ADMISION, asyncio.current_task())
+        return None
+
+    @app.middleware("response")
+    async def liberar(request: Request, _response: HTTPResponse) -> None:
+        turno = getattr(request.ctx, "admision", None)
+        if turno is not None:
+            turno.liberar()
+
+    logger.info("Admisión de %s: %d simultáneas, cola de %d, espera máxima %.2fs",
+                RUTA_ADMITIDA, CONCURRENCIA, COLA, ESPERA)
@@ -0,0 +1,128 @@
+"""
+Calentamiento del servidor de acciones y ruta `/ready`.
+
+Después de arrancar, cada acción registrada se ejecuta contra trackers
+sintéticos (cada opción de cada estado del menú, mensajes de Node-RED y texto
+libre) para que la primera petición real no pague imports perezosos, la
+compilación de expresiones regulares ni el primer renderizado de plantillas.
+Las ejecuciones corren dentro de `sin_registro()`, así que el calentamiento
+no aparece en `/metrics`; las peticiones reales que lleguen mientras tanto sí
+se registran (el puerto ya acepta conexiones).
+
+`/ready` responde 503 hasta que termina y luego 200; `/health` de rasa_sdk
+sigue indicando solo que el proceso está vivo.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Text, Type
+
+from rasa_sdk import Action, Tracker
+from rasa_sdk.executor import CollectingDispatcher
+from sanic import Sanic, response
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+from actions.menu import MENU
+from actions.metricas import METRICAS, sin_registro
+from config.arranque import segundos_desde_inicio
+from rasa_sdk_plugins import hookimpl
+
+logger = logging.getLogger(__name__)
+
+TIEMPO_HASTA_LISTO = METRICAS.medidor(
+    "botmobile_tiempo_hasta_listo_segundos",
+    "Segundos desde el inicio del proceso hasta terminar el calentamiento",
+)
+DURACION_CALENTAMIENTO = METRICAS.medidor(
+    "botmobile_calentamiento_segundos", "Duración del calentamiento de las acciones"
+)
+
+_MENSAJES_SUELTOS = (
+    "OPERATOR TELCEL NUMERO 5512345678",
+    "COMPANIA_DETECTADA AT&T NUMERO 5551234567",
+    "Movistar",
+    "INICIO_BOT",
+    "hola",
+)
+
+ESTADO: Dict[Text, Any] = {"listo": False}
+
+
+def acciones_registradas() -> List[Type[Action]]:
+    """Subclases concretas de Action que no son de rasa_sdk."""
+    pendientes, encontradas = list(Action.__subclasses__()), []
+    while pendientes:
+        clase = pendientes.pop()
+        pendientes.extend(clase.__subclasses__())
+        if not clase.__module__.startswith("rasa_sdk"):
+            encontradas.append(clase)
+    return encontradas
+
+
+def trackers_sinteticos() -> Iterable[Tracker]:
+    """Un tracker por opción de cada estado del menú más mensajes sueltos."""
+    casos = [
+        (opcion, {"estado_menu": estado, "compania_operador": "Telcel"})
+        for estado in MENU.pantallas
+        for opcion in MENU.opciones(estado)
+    ]
+    casos.extend((texto, {}) for texto in _MENSAJES_SUELTOS)
+
+    for texto, slots in casos:
+        yield Tracker.from_dict({
+            "sender_id": "calentamiento",
+            "slots": slots,
+            "latest_message": {"text": texto, "intent": {}, "entities": []},
+        })
+
+
+async def calentar() -> Dict[Text, Any]:
+    """Ejecuta cada acción contra cada tracker sintético."""
+    inicio = time.perf_counter()
+    ejecuciones = errores = 0
+    trackers = list(trackers_sinteticos())
+
+    with sin_registro():
+        for clase in acciones_registradas():
+            try:
+                accion = clase()
+            except TypeError:
+                continue
+            for tracker in trackers:
+                try:
+                    await accion.run(CollectingDispatcher(), tracker, {})
+                    ejecuciones += 1
+                except Exception as error:
+                    errores += 1
+                    logger.warning("Calentamiento: %s falló con %r: %s",
+                                   clase.__name__, tracker.latest_message.get("text"), error)
+
+    return {
+        "ejecuciones": ejecuciones,
+        "errores": errores,
+        "calentamiento_s": round(time.perf_counter() - inicio, 3),
+    }
+
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    async def calentar_y_marcar_listo() -> None:
+        estadisticas = await calentar()
+        estadisticas["tiempo_hasta_listo_s"] = round(segundos_desde_inicio(), 3)
+        DURACION_CALENTAMIENTO.set(estadisticas["calentamiento_s"])
+        TIEMPO_HASTA_LISTO.set(estadisticas["tiempo_hasta_listo_s"])
+        ESTADO.update(estadisticas, listo=True)
+        logger.info("Servidor de acciones listo: %s", estadisticas, extra={"arranque": estadisticas})
+
+    @app.listener("after_server_start")
+    async def iniciar_calentamiento(_app: Sanic, _loop) -> None:
+        # Como tarea, para que /health y /ready respondan mientras dura
+        _app.add_task(calentar_y_marcar_listo())
+
+    @app.get("/ready")
+    async def ready(_: Request) -> HTTPResponse:
+        """200 cuando el calentamiento terminó; 503 mientras tanto."""
+        if not ESTADO["listo"]:
+            return response.json({"status": "calentando"}, status=503)
+        return response.json({"status": "ready", **{k: v for k, v in ESTADO.items() if k != "listo"}})
@@ -0,0 +1,13 @@
+"""Cierre ordenado del cliente HTTP compartido de las acciones."""
+
+from sanic import Sanic
+
+from actions.http_cliente import CLIENTE_HTTP
+from rasa_sdk_plugins import hookimpl
+
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    @app.listener("after_server_stop")
+    async def cerrar_cliente_http(_app: Sanic, _loop) -> None:
+        await CLIENTE_HTTP.cerrar()
@@ -0,0 +1,55 @@
+"""
+Recarga en caliente de `contenido/campanas.yml`.
+
+Una tarea en segundo plano revisa el mtime del archivo; cuando cambia, la
+versión nueva se lee y pre-renderiza en un hilo del executor y se activa con
+un cambio de referencia (ver `PlantillasRecargables`). Si el archivo no es
+válido se registra el error y se sigue sirviendo la versión anterior.
+
+El intervalo se configura con BOTMOBILE_CONTENIDO_INTERVALO (segundos, 0
+desactiva la vigilancia).
+"""
+
+import os
+
+from sanic import Sanic
+
+from actions.metricas import METRICAS
+from actions.plantillas import PLANTILLAS
+from rasa_sdk_plugins import hookimpl
+
+INTERVALO_CONTENIDO = float(os.environ.get("BOTMOBILE_CONTENIDO_INTERVALO", "5"))
+
+RECARGAS_CONTENIDO = METRICAS.contador(
+    "botmobile_contenido_recargas_total",
+    "Recargas del archivo de contenido por resultado",
+    ("resultado",),
+)
+
+
+def _version_numerica() -> float:
+    try:
+        return float(PLANTILLAS.version)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+METRICAS.medidor(
+    "botmobile_contenido_version",
+    "Versión activa del archivo de contenido (campo version)",
+    funcion=_version_numerica,
+)
+
+
+def _contar_recarga(activada: bool) -> None:
+    RECARGAS_CONTENIDO.inc("ok" if activada else "error")
+
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    if INTERVALO_CONTENIDO <= 0:
+        return
+
+    @app.listener("after_server_start")
+    async def vigilar_contenido(_app: Sanic, _loop) -> None:
+        _app.add_task(PLANTILLAS.vigilar(INTERVALO_CONTENIDO, _contar_recarga))
@@ -0,0 +1,90 @@
+"""
+Ruta `/media/<archivo>` con las imágenes de `assets/images`.
+
+Los nombres llevan el hash del contenido (ver `config/media.py`), así que las
+respuestas se marcan como inmutables por un año con un ETag fuerte. Se
+atienden peticiones condicionales (If-None-Match) y de rango de un solo
+intervalo, que es lo que piden los canales al descargar imágenes grandes.
+"""
+
+from typing import Optional, Tuple
+from urllib.parse import unquote
+
+from sanic import Sanic, response
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+from config.media import MANIFIESTO_MEDIA, RUTA_MEDIA
+from rasa_sdk_plugins import hookimpl
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _rango(cabecera: str, tamano: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta un Range de un solo intervalo de bytes.
+
+    Returns:
+        (inicio, fin) incluidos, o None si no es satisfacible
+
+    Raises:
+        ValueError: Si la cabecera no es un rango simple de bytes; en ese caso
+            se responde el archivo completo
+    """
+    unidad, _, intervalo = cabecera.partition("=")
+    if unidad.strip() != "bytes" or "," in intervalo:
+        raise ValueError(cabecera)
+    inicio, _, fin = intervalo.strip().partition("-")
+    if not inicio:
+        sufijo = int(fin)
+        if sufijo == 0:
+            return None
+        return max(0, tamano - sufijo), tamano - 1
+    inicio = int(inicio)
+    fin = int(fin) if fin else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        return None
+    return inicio, min(fin, tamano - 1)
+
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    @app.route(f"{RUTA_MEDIA}/<publicado>", methods=["GET", "HEAD"])
+    async def media(request: Request, publicado: str) -> HTTPResponse:
+        """Imagen con hash en el nombre, cacheable de forma permanente."""
+        archivo = MANIFIESTO_MEDIA.archivo(unquote(publicado))
+        if archivo is None:
+            return response.empty(status=404)
+
+        tamano = len(archivo.contenido)
+        cabeceras = {
+            "ETag": archivo.etag,
+            "Cache-Control": CACHE_CONTROL,
+            "Accept-Ranges": "bytes",
+        }
+
+        coincidencias = request.headers.get("If-None-Match", "")
+        if archivo.etag in coincidencias or coincidencias.strip() == "*":
+            return response.empty(status=304, headers=cabeceras)
+
+        estado, cuerpo = 200, archivo.contenido
+        cabecera_rango = request.headers.get("Range")
+        if_range = request.headers.get("If-Range")
+        if cabecera_rango and (if_range is None or if_range == archivo.etag):
+            try:
+                rango = _rango(cabecera_rango, tamano)
+            except ValueError:
+                rango = (0, tamano - 1)
+            if rango is None:
+                cabeceras["Content-Range"] = f"bytes */{tamano}"
+                return response.empty(status=416, headers=cabeceras)
+            inicio, fin = rango
+            if (inicio, fin) != (0, tamano - 1):
+                estado, cuerpo = 206, archivo.contenido[inicio:fin + 1]
+                cabeceras["Content-Range"] = f"bytes {inicio}-{fin}/{tamano}"
+
+        if request.method == "HEAD":
+            cabeceras["Content-Length"] = str(len(cuerpo))
+            return HTTPResponse(status=estado, headers=cabeceras, content_type=archivo.tipo)
+
+        return response.raw(cuerpo, status=estado, headers=cabeceras, content_type=archivo.tipo)
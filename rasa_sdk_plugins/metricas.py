@@ -0,0 +1,18 @@
+"""Ruta `/metrics` con las métricas del paquete de acciones."""
+
+from sanic import Sanic, response
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+from actions.metricas import METRICAS
+from rasa_sdk_plugins import hookimpl
+
+CONTENT_TYPE_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    @app.get("/metrics")
+    async def metricas(_: Request) -> HTTPResponse:
+        """Métricas del proceso en formato de texto Prometheus."""
+        return response.text(METRICAS.exponer(), content_type=CONTENT_TYPE_PROMETHEUS)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Servidor de acciones con varios procesos (pre-fork).
+
+`rasa run actions` atiende todo en un proceso, así que una ráfaga de inicios
+de sesión (detección de Node-RED, catálogo de operadores, plantillas) usa un
+solo núcleo. Este lanzador construye la app de rasa_sdk una vez en el proceso
+padre -importando el paquete de acciones, con lo que quedan listos el
+catálogo de operadores, los detectores compilados, el menú y las plantillas
+pre-renderizadas-, congela esos objetos para el recolector de basura
+(`gc.freeze`) y hace fork de N trabajadores que comparten el socket de
+escucha. Los hijos heredan el snapshot por copy-on-write: mientras nadie lo
+modifique, las páginas siguen siendo las del padre y agregar trabajadores no
+multiplica la memoria.
+
+El padre solo supervisa: si un trabajador termina sin que se haya pedido
+detener el servidor, se registra y se lanza otro en su lugar (con espera
+creciente si se cae justo después de arrancar). SIGTERM/SIGINT se reenvían a
+los hijos, que cierran de forma ordenada.
+
+Cada trabajador tiene sus propias métricas, su calentamiento y su vigilancia
+del archivo de contenido; `/metrics` y `/ready` responden con los datos del
+trabajador que atendió la petición.
+
+Uso (acepta los mismos argumentos que `rasa run actions`):
+    python servidor_acciones.py --port 5055 --workers 4
+    BOTMOBILE_ACTION_WORKERS=4 python servidor_acciones.py
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any, Dict, List, Optional, Text
+
+logger = logging.getLogger("servidor_acciones")
+
+# Un trabajador que muere antes de este tiempo se considera fallo de arranque
+_VIDA_MINIMA_S = 5.0
+_ESPERA_MAXIMA_S = 30.0
+
+
+def trabajadores_por_defecto() -> int:
+    """BOTMOBILE_ACTION_WORKERS o, si no está definida, los núcleos disponibles."""
+    valor = os.environ.get("BOTMOBILE_ACTION_WORKERS")
+    if valor:
+        return max(1, int(valor))
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def crear_socket(host: Text, puerto: int) -> socket.socket:
+    """Socket de escucha que comparten todos los trabajadores."""
+    familia = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(familia, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, puerto))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """Hace fork de los trabajadores y los reemplaza cuando terminan."""
+
+    def __init__(self, app, sock: socket.socket, trabajadores: int,
+                 opciones_run: Optional[Dict[Text, Any]] = None) -> None:
+        self.app = app
+        self.sock = sock
+        self.trabajadores = trabajadores
+        self.opciones_run = dict(opciones_run or {})
+        self.reinicios = 0
+        self._hijos: Dict[int, int] = {}  # pid -> índice del trabajador
+        self._inicio: Dict[int, float] = {}  # índice -> hora del último arranque
+        self._fallos: Dict[int, int] = {}  # índice -> caídas seguidas al arrancar
+        self._deteniendo = False
+
+    def _lanzar(self, indice: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                os.environ["BOTMOBILE_WORKER"] = str(indice)
+                self.app.run(sock=self.sock, workers=1, **self.opciones_run)
+            except BaseException:
+                logger.exception("El trabajador %d terminó con error", indice)
+                codigo = 1
+            finally:
+                logging.shutdown()
+                os._exit(codigo)
+
+        self._hijos[pid] = indice
+        self._inicio[indice] = time.monotonic()
+        logger.info("Trabajador %d iniciado (pid %d)", indice, pid)
+
+    def _detener(self, senal: int, _frame) -> None:
+        self._deteniendo = True
+        for pid in list(self._hijos):
+            try:
+                os.kill(pid, senal)
+            except ProcessLookupError:
+                pass
+
+    def _espera_reinicio(self, indice: int) -> float:
+        if time.monotonic() - self._inicio[indice] >= _VIDA_MINIMA_S:
+            self._fallos[indice] = 0
+            return 0.0
+        self._fallos[indice] = self._fallos.get(indice, 0) + 1
+        return min(_ESPERA_MAXIMA_S, 0.5 * 2 ** self._fallos[indice])
+
+    def ejecutar(self) -> int:
+        """Lanza los trabajadores y los supervisa hasta recibir SIGTERM/SIGINT."""
+        signal.signal(signal.SIGTERM, self._detener)
+        signal.signal(signal.SIGINT, self._detener)
+
+        for indice in range(self.trabajadores):
+            self._lanzar(indice)
+
+        while self._hijos:
+            try:
+                pid, estado = os.wait()
+            except ChildProcessError:
+                break
+            indice = self._hijos.pop(pid, None)
+            if indice is None:
+                continue
+            if self._deteniendo:
+                logger.info("Trabajador %d detenido", indice)
+                continue
+
+            if os.WIFSIGNALED(estado):
+                causa = f"señal {os.WTERMSIG(estado)}"
+            else:
+                causa = f"código {os.WEXITSTATUS(estado)}"
+            espera = self._espera_reinicio(indice)
+            logger.error("El trabajador %d (pid %d) terminó con %s; se reinicia en %.1fs",
+                         indice, pid, causa, espera)
+            if espera:
+                time.sleep(espera)
+            if not self._deteniendo:
+                self.reinicios += 1
+                self._lanzar(indice)
+
+        self.sock.close()
+        return 0
+
+
+def construir_app(paquete_acciones: Text, cors: Any = "*", auto_reload: bool = False):
+    """
+    App de rasa_sdk con los plugins, igual que `rasa_sdk.endpoint.run`, y los
+    objetos creados al importar movidos a la generación permanente del GC.
+    """
+    from rasa_sdk.endpoint import create_app
+    from rasa_sdk.plugin import plugin_manager
+
+    app = create_app(paquete_acciones, cors_origins=cors, auto_reload=auto_reload)
+    plugin_manager().hook.attach_sanic_app_extensions(app=app)
+
+    # Sin freeze, la primera recolección completa en cada hijo escribe en los
+    # encabezados de todos los objetos y rompe el copy-on-write
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    from rasa_sdk import utils
+    from rasa_sdk.constants import APPLICATION_ROOT_LOGGER_NAME
+    from rasa_sdk.endpoint import create_argument_parser, create_ssl_context
+
+    parser = create_argument_parser()
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos trabajadores (por defecto BOTMOBILE_ACTION_WORKERS o núcleos)")
+    args = parser.parse_args(argv)
+
+    utils.configure_colored_logging(args.loglevel)
+    utils.configure_file_logging(
+        logging.getLogger(APPLICATION_ROOT_LOGGER_NAME), args.log_file, args.loglevel, args.logging_config_file
+    )
+    utils.update_sanic_log_level()
+
+    trabajadores = max(1, args.workers or trabajadores_por_defecto())
+    inicio = time.perf_counter()
+    # `rasa run actions` usa "actions" por defecto; el parser de rasa_sdk no
+    app = construir_app(args.actions or "actions", args.cors, args.auto_reload)
+    logger.info("Snapshot de acciones construido en %.2fs; %d objetos congelados",
+                time.perf_counter() - inicio, gc.get_freeze_count())
+
+    host = os.environ.get("SANIC_HOST", "0.0.0.0")
+    sock = crear_socket(host, args.port)
+    ssl = create_ssl_context(args.ssl_certificate, args.ssl_keyfile, args.ssl_password)
+    logger.info("Servidor de acciones en %s:%d con %d trabajadores", host, args.port, trabajadores)
+
+    return Supervisor(app, sock, trabajadores, {"ssl": ssl}).ejecutar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
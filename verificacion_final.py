@@ -4,31 +4,292 @@
 Verificación final completa del bot antes de producción
 """
 
+import asyncio
 import sys
 import os
+import time
 sys.path.append('.')
 
+from rasa_sdk.executor import CollectingDispatcher
+
 from actions.actions import ActionSessionStart, ActionElegirOpcion
+from actions.deteccion import RUTA_NLU, detectar_mensaje_node_red
+from actions.http_cliente import ClienteHTTP
+from actions.plantillas import PLANTILLAS, PlantillasRecargables
+from actions.metricas import LLAMADAS_ACCION
+from actions.postback import ENTIDAD_OPCION, ENTIDAD_ORIGEN, crear_postback, leer_postback
+from actions.respuestas import BYTES_RESPUESTA
+from rasa_sdk_plugins.calentamiento import calentar
 
-class MockDispatcher:
-    def __init__(self):
-        self.messages = []
-        self.images = []
-    
-    def utter_message(self, text=None, image=None):
-        if text:
-            self.messages.append(text)
-        if image:
-            self.images.append(image)
+class MockDispatcher(CollectingDispatcher):
+    """Dispatcher de rasa_sdk con acceso directo a los textos, imágenes y botones enviados"""
+
+    @property
+    def textos(self):
+        return [m["text"] for m in self.messages if m.get("text")]
+
+    @property
+    def images(self):
+        return [m["image"] for m in self.messages if m.get("image")]
+
+    @property
+    def botones(self):
+        return [b for m in self.messages for b in m.get("buttons") or ()]
 
 class MockTracker:
-    def __init__(self, latest_message_text, slots=None):
+    def __init__(self, latest_message_text, slots=None, canal=None, entities=None):
         self.latest_message = {"text": latest_message_text} if latest_message_text else {}
+        if entities:
+            self.latest_message["entities"] = entities
         self.slots = slots or {}
+        self.canal = canal
     
     def get_slot(self, slot_name):
         return self.slots.get(slot_name)
 
+    def get_latest_input_channel(self):
+        return self.canal
+
+def ejecutar(action, dispatcher, tracker):
+    """Ejecuta el run asíncrono de una acción fuera del servidor"""
+    return asyncio.run(action.run(dispatcher, tracker, {}))
+
+
+async def consultas_lentas_concurrentes(n=20, retardo=0.2):
+    """
+    Lanza n consultas a un servidor local que tarda `retardo` segundos en
+    responder y devuelve el tiempo total. Si el cliente compartido bloqueara
+    o serializara las llamadas, el total sería n * retardo.
+    """
+    from aiohttp import web
+
+    async def consulta_lenta(request):
+        await asyncio.sleep(retardo)
+        return web.json_response({"numero": request.query.get("numero")})
+
+    app = web.Application()
+    app.router.add_get("/crm", consulta_lenta)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    sitio = web.TCPSite(runner, "127.0.0.1", 0)
+    await sitio.start()
+    puerto = runner.addresses[0][1]
+
+    cliente = ClienteHTTP(limite_por_host=n)
+    try:
+        inicio = time.perf_counter()
+        respuestas = await asyncio.gather(*(
+            cliente.get_json(f"http://127.0.0.1:{puerto}/crm", params={"numero": str(i)}, plazo=2 * retardo)
+            for i in range(n)
+        ))
+        total = time.perf_counter() - inicio
+    finally:
+        await cliente.cerrar()
+        await runner.cleanup()
+
+    assert [r["numero"] for r in respuestas] == [str(i) for i in range(n)]
+    return total
+
+
+def verificar_recarga_contenido():
+    """
+    Copia el contenido, cambia un precio y comprueba el cambio atómico y que
+    los contadores de caché (texto y botones) no vuelvan a cero al recargar.
+    """
+    import tempfile
+    
+    with open(PLANTILLAS.ruta, encoding="utf-8") as archivo:
+        original = archivo.read()
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "campanas.yml")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write(original)
+        plantillas = PlantillasRecargables(ruta, ["Telcel"])
+        plantillas.validadores.extend(PLANTILLAS.validadores)
+        antes = plantillas.saludo_operador("Telcel")
+        # Un fallo y un acierto en la caché de texto, un fallo en la de botones
+        plantillas.portabilidad("Compañía Nueva")
+        plantillas.portabilidad("Compañía Nueva")
+        plantillas.personalizada_botones("portabilidad", "Compañía Nueva")
+        cache_antes = plantillas.estadisticas()
+        
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write(original.replace("$220", "$199").replace("version: 1", "version: 2"))
+        os.utime(ruta, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        activada = plantillas.cambio() and plantillas.recargar()
+        despues = plantillas.saludo_operador("Telcel")
+        plantillas.portabilidad("Compañía Nueva")
+        cache_despues = plantillas.estadisticas()
+        
+        # Un archivo roto no reemplaza la versión activa
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write("version: 3\ntextos: {}\n")
+        rechazada = not plantillas.recargar()
+    
+    return (activada and "$220" in antes and "$199" in despues
+            and rechazada and plantillas.version == 2
+            and plantillas.saludo_operador("Telcel") == despues
+            and (cache_antes["aciertos"], cache_antes["fallos"]) == (1, 2)
+            # Los validadores también renderizan sobre la instantánea nueva
+            and cache_despues["aciertos"] >= 1 and cache_despues["fallos"] >= 3)
+
+def falsos_operadores_nlu():
+    """Ejemplos de data/nlu.yml de otros intents en los que se detecta una compañía."""
+    import re
+    import yaml
+    
+    with open(RUTA_NLU, encoding="utf-8") as archivo:
+        datos = yaml.safe_load(archivo)
+    falsos = []
+    for bloque in datos["nlu"]:
+        if bloque.get("intent") in (None, "informar_compania"):
+            continue
+        for linea in bloque["examples"].splitlines():
+            ejemplo = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", linea.strip().lstrip("-").strip())
+            deteccion = detectar_mensaje_node_red(ejemplo)
+            if ejemplo and deteccion.compania:
+                falsos.append((bloque["intent"], ejemplo, deteccion.compania, deteccion.formato))
+    return falsos
+
+def verificar_tracker_store():
+    """
+    Desalojos del LRU y restauración desde SQLite de BoundedTrackerStore.
+
+    Returns:
+        (ok, estadísticas sin SQLite, estadísticas con SQLite), o None si
+        Rasa no está instalado
+    """
+    import logging
+    import tempfile
+    
+    try:
+        from rasa.shared.core.domain import Domain
+        from rasa.shared.core.trackers import DialogueStateTracker
+        from extensiones.tracker_store import BoundedTrackerStore, logger
+    except ImportError:
+        return None
+    
+    registros = []
+    class Capturar(logging.Handler):
+        def emit(self, record):
+            registros.append(record)
+    
+    async def recorrer(ruta):
+        store = BoundedTrackerStore(Domain.load("domain.yml"), host=ruta, max_trackers=3,
+                                    flush_interval=0.01, stats_interval=0)
+        for i in range(5):
+            await store.save(DialogueStateTracker(f"usuario{i}", []))
+        await asyncio.sleep(0.1)
+        restaurado = await store.retrieve("usuario0")
+        return store.estadisticas(), restaurado
+    
+    manejador = Capturar()
+    logger.addHandler(manejador)
+    nivel, logger.level = logger.level, logging.INFO
+    try:
+        sin_sqlite, perdido = asyncio.run(recorrer(None))
+        with tempfile.TemporaryDirectory() as directorio:
+            con_sqlite, restaurado = asyncio.run(recorrer(os.path.join(directorio, "trackers.db")))
+    finally:
+        logger.removeHandler(manejador)
+        logger.setLevel(nivel)
+    
+    ok = (
+        sin_sqlite["desalojos_lru"] == 2 and sin_sqlite["residentes"] == 3 and sin_sqlite["fallos"] == 1
+        and perdido is None and sin_sqlite["bytes_residentes"] > 0
+        # Sin SQLite las estadísticas también llegan al log
+        and any(getattr(r, "tracker_store", {}).get("escritos") == 0 for r in registros)
+        and con_sqlite["desalojos_lru"] == 3 and con_sqlite["restaurados"] == 1
+        and con_sqlite["escritos"] == 5 and restaurado is not None and restaurado.sender_id == "usuario0"
+    )
+    return ok, sin_sqlite, con_sqlite
+
+def verificar_calentamiento_rasa():
+    """
+    El calentamiento de CanalListo no cuenta en NLURapida ni llena la cache
+    de NLU; un mensaje real después sí.
+
+    Returns:
+        (ok, aciertos de NLURapida, estadísticas de la cache), o None si Rasa
+        no está instalado
+    """
+    from types import SimpleNamespace
+    
+    try:
+        from rasa.shared.nlu.training_data.message import Message
+        from extensiones import cache_nlu, listo, nlu_rapida
+    except ImportError:
+        return None
+    
+    config = cache_nlu.CacheNLU.get_default_config()
+    componentes = [
+        nlu_rapida.NLURapida(nlu_rapida.NLURapida.get_default_config()),
+        cache_nlu.CacheNLU(config, "verificacion"),
+        cache_nlu.GuardarCacheNLU("verificacion"),
+    ]
+    
+    class Agente:
+        """Solo el tramo del pipeline que lleva estadísticas."""
+        def is_ready(self):
+            return True
+        
+        async def parse_message(self, texto):
+            mensajes = [Message(data={"text": texto})]
+            for componente in componentes:
+                mensajes = componente.process(mensajes)
+            return mensajes[0].as_dict()
+    
+    async def recorrer():
+        nlu_rapida.ACIERTOS_NLU_RAPIDA.reiniciar()
+        cache_nlu.reiniciar_estadisticas()
+        canal = listo.CanalListo(mensajes=50)
+        await canal.calentar(SimpleNamespace(ctx=SimpleNamespace(agent=Agente())))
+        calentado = (canal.estadisticas["mensajes"] > 0 and not nlu_rapida.estadisticas()
+                     and cache_nlu.estadisticas()["entradas"] == 0)
+        await Agente().parse_message("quiero cambiarme de compañía")
+        return calentado, nlu_rapida.estadisticas(), cache_nlu.estadisticas()
+    
+    calentado, aciertos, cache = asyncio.run(recorrer())
+    ok = calentado and aciertos == {"pipeline": 1} and cache["fallos"] == 1 and cache["entradas"] == 1
+    return ok, aciertos, cache
+
+async def plazo_y_salida_simultaneos():
+    """Vence el plazo de un turno en cola y en la misma vuelta del loop se libera otro."""
+    from rasa_sdk_plugins.admision import ESPERA_AGOTADA, ControlAdmision
+    
+    control = ControlAdmision(concurrencia=1, cola=4, espera=5.0)
+    assert await control.entrar() is None
+    espera = asyncio.ensure_future(control.entrar())
+    await asyncio.sleep(0)
+    # Lo que hace el callback del plazo, seguido de un `salir` antes de que
+    # la petición en espera vuelva a correr
+    control._cola[0].set_result(False)
+    control.salir()
+    motivo = await espera
+    return motivo == ESPERA_AGOTADA and control.activas == 0 and control.en_cola == 0
+
+def catalogo_sin_escrituras():
+    """Carga el catálogo con el índice compacto ausente y luego desactualizado."""
+    import shutil
+    import tempfile
+    from actions.operadores import RUTA_CATALOGO, OperatorRegistry
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        catalogo = os.path.join(directorio, "operadores.yml")
+        compacta = os.path.join(directorio, "operadores.marshal")
+        shutil.copyfile(RUTA_CATALOGO, catalogo)
+        sin_compacta = OperatorRegistry.cargar(catalogo, compacta)
+        ok = not os.path.exists(compacta) and sin_compacta.resolver_exacto("Telcel") == "Telcel"
+        
+        # Un índice de otra versión del catálogo se ignora, pero no se reescribe
+        OperatorRegistry.desde_yaml(catalogo).guardar_compacto(compacta)
+        with open(catalogo, "a", encoding="utf-8") as archivo:
+            archivo.write("\n")
+        antes = os.stat(compacta).st_mtime_ns
+        desactualizada = OperatorRegistry.cargar(catalogo, compacta)
+        ok = ok and os.stat(compacta).st_mtime_ns == antes and len(desactualizada) == len(sin_compacta)
+    return ok
+
 def verificacion_final():
     """
     Verificación final completa del bot
@@ -43,8 +304,8 @@ def verificacion_final():
     dispatcher1 = MockDispatcher()
     tracker1 = MockTracker("Spot Uno")
     action1 = ActionSessionStart()
-    action1.run(dispatcher1, tracker1, {})
-    spot_uno_ok = any("Detecté que vienes de Spot Uno" in msg for msg in dispatcher1.messages)
+    ejecutar(action1, dispatcher1, tracker1)
+    spot_uno_ok = any("Detecté que vienes de Spot Uno" in msg for msg in dispatcher1.textos)
     tests.append(("Spot Uno personalizado", spot_uno_ok))
     print(f"   {'✅ OK' if spot_uno_ok else '❌ FALLO'}")
     
@@ -53,8 +314,8 @@ def verificacion_final():
     dispatcher2 = MockDispatcher()
     tracker2 = MockTracker("Telcel")
     action2 = ActionSessionStart()
-    action2.run(dispatcher2, tracker2, {})
-    sin_asteriscos = not any("**" in msg for msg in dispatcher2.messages)
+    ejecutar(action2, dispatcher2, tracker2)
+    sin_asteriscos = not any("**" in msg for msg in dispatcher2.textos)
     tests.append(("Sin asteriscos", sin_asteriscos))
     print(f"   {'✅ OK' if sin_asteriscos else '❌ FALLO'}")
     
@@ -63,8 +324,8 @@ def verificacion_final():
     dispatcher3 = MockDispatcher()
     tracker3 = MockTracker("3", {"estado_menu": "menu_principal"})
     action3 = ActionElegirOpcion()
-    action3.run(dispatcher3, tracker3, {})
-    contacto_ok = any("+52 614 558 7289" in msg for msg in dispatcher3.messages)
+    ejecutar(action3, dispatcher3, tracker3)
+    contacto_ok = any("+52 614 558 7289" in msg for msg in dispatcher3.textos)
     tests.append(("Contacto actualizado", contacto_ok))
     print(f"   {'✅ OK' if contacto_ok else '❌ FALLO'}")
     
@@ -73,8 +334,8 @@ def verificacion_final():
     dispatcher4 = MockDispatcher()
     tracker4 = MockTracker("2", {"estado_menu": "menu_principal"})
     action4 = ActionElegirOpcion()
-    action4.run(dispatcher4, tracker4, {})
-    botones_ok = any("1️⃣" in msg and "2️⃣" in msg for msg in dispatcher4.messages)
+    ejecutar(action4, dispatcher4, tracker4)
+    botones_ok = any("1️⃣" in msg and "2️⃣" in msg for msg in dispatcher4.textos)
     tests.append(("Sistema de botones", botones_ok))
     print(f"   {'✅ OK' if botones_ok else '❌ FALLO'}")
     
@@ -83,11 +344,139 @@ def verificacion_final():
     dispatcher5 = MockDispatcher()
     tracker5 = MockTracker("OPERATOR AT&T NUMERO 6344817289")
     action5 = ActionSessionStart()
-    result5 = action5.run(dispatcher5, tracker5, {})
-    node_red_ok = any("Detecté que vienes de AT&T" in msg for msg in dispatcher5.messages)
+    result5 = ejecutar(action5, dispatcher5, tracker5)
+    node_red_ok = any("Detecté que vienes de AT&T" in msg for msg in dispatcher5.textos)
     tests.append(("Detección Node-RED", node_red_ok))
     print(f"   {'✅ OK' if node_red_ok else '❌ FALLO'}")
     
+    # TEST 6: Consultas lentas concurrentes
+    print("\n6️⃣ Test: Consultas HTTP lentas no se serializan")
+    n_consultas, retardo = 20, 0.2
+    total6 = asyncio.run(consultas_lentas_concurrentes(n_consultas, retardo))
+    concurrencia_ok = total6 < 3 * retardo
+    tests.append(("Consultas concurrentes", concurrencia_ok))
+    print(f"   {n_consultas} consultas de {retardo}s en {total6:.2f}s")
+    print(f"   {'✅ OK' if concurrencia_ok else '❌ FALLO'}")
+    
+    # TEST 7: Submenús según estado_menu
+    print("\n7️⃣ Test: Submenús según estado_menu")
+    dispatcher7 = MockDispatcher()
+    tracker7 = MockTracker("2", {"estado_menu": "portabilidad"})
+    result7 = ejecutar(ActionElegirOpcion(), dispatcher7, tracker7)
+    dispatcher7b = MockDispatcher()
+    tracker7b = MockTracker("2", {"estado_menu": "paquetes"})
+    ejecutar(ActionElegirOpcion(), dispatcher7b, tracker7b)
+    submenus_ok = (
+        any("Con tu NIP ya casi terminamos" in msg for msg in dispatcher7.textos)
+        and result7[0]["value"] == "nip_listo"
+        and any("Plan Premium" in msg for msg in dispatcher7b.textos)
+    )
+    tests.append(("Submenús", submenus_ok))
+    print(f"   {'✅ OK' if submenus_ok else '❌ FALLO'}")
+    
+    # TEST 8: Recarga en caliente del contenido
+    print("\n8️⃣ Test: Recarga en caliente del contenido")
+    recarga_ok = verificar_recarga_contenido()
+    tests.append(("Recarga de contenido", recarga_ok))
+    print(f"   {'✅ OK' if recarga_ok else '❌ FALLO'}")
+    
+    # TEST 9: Botones nativos con payload estable
+    print("\n9️⃣ Test: Botones nativos y payloads de postback")
+    dispatcher9 = MockDispatcher()
+    ejecutar(ActionSessionStart(), dispatcher9, MockTracker("Telcel", canal="telegram"))
+    payload = crear_postback("menu_principal", "1")
+    # Botón de un mensaje anterior: vale el estado en que se mostró, no el slot
+    dispatcher9b = MockDispatcher()
+    tracker9b = MockTracker(payload, {"estado_menu": "paquetes"}, canal="telegram", entities=[
+        {"entity": ENTIDAD_OPCION, "value": "1"}, {"entity": ENTIDAD_ORIGEN, "value": "menu_principal"},
+    ])
+    result9 = ejecutar(ActionElegirOpcion(), dispatcher9b, tracker9b)
+    dispatcher9c = MockDispatcher()
+    ejecutar(ActionSessionStart(), dispatcher9c, MockTracker("Telcel", canal="rest"))
+    botones_nativos_ok = (
+        [b["payload"] for b in dispatcher9.botones][0] == payload
+        and not any("1️⃣" in msg for msg in dispatcher9.textos)
+        and leer_postback(payload).group("opcion", "estado") == ("1", "menu_principal")
+        and result9[0]["value"] == "portabilidad" and len(dispatcher9b.botones) == 3
+        and not dispatcher9c.botones and any("1️⃣" in msg for msg in dispatcher9c.textos)
+    )
+    tests.append(("Botones nativos", botones_nativos_ok))
+    print(f"   {'✅ OK' if botones_nativos_ok else '❌ FALLO'}")
+    
+    # TEST 10: Ningún ejemplo de otro intent se confunde con un operador
+    print("\n🔟 Test: Ejemplos de NLU sin compañías falsas")
+    falsos = falsos_operadores_nlu()
+    for intent, ejemplo, compania, formato in falsos:
+        print(f"   {intent}: '{ejemplo}' -> {compania} ({formato})")
+    dispatcher10 = MockDispatcher()
+    result10 = ejecutar(ActionSessionStart(), dispatcher10, MockTracker("adiós"))
+    sin_falsos_ok = (
+        not falsos
+        and not any(e.get("name") == "compania_operador" and e.get("value") for e in result10)
+        and detectar_mensaje_node_red("Telmex").compania is None
+        and detectar_mensaje_node_red("movistra").compania == "Movistar"
+        # Nombres del catálogo que también son palabras comunes: solo tal cual
+        and not any(detectar_mensaje_node_red(palabra).es_node_red
+                    for palabra in ("francisco", "valor", "rosa", "next", "marketing"))
+        and detectar_mensaje_node_red("Valor").compania == "Valor"
+    )
+    tests.append(("Ejemplos de NLU sin compañías falsas", sin_falsos_ok))
+    print(f"   {'✅ OK' if sin_falsos_ok else '❌ FALLO'}")
+    
+    # TEST 11: El calentamiento no deja observaciones en /metrics
+    print("\n1️⃣1️⃣ Test: Calentamiento fuera de las métricas")
+    LLAMADAS_ACCION.reiniciar()
+    BYTES_RESPUESTA.reiniciar()
+    calentamiento = asyncio.run(calentar())
+    sin_metricas_ok = (
+        calentamiento["ejecuciones"] > 0
+        and not LLAMADAS_ACCION.exponer() and not BYTES_RESPUESTA.exponer()
+    )
+    ejecutar(ActionSessionStart(), MockDispatcher(), MockTracker("Telcel"))
+    sin_metricas_ok = sin_metricas_ok and BYTES_RESPUESTA.conteo("action_session_start", "texto") == 1
+    tests.append(("Calentamiento fuera de las métricas", sin_metricas_ok))
+    print(f"   {calentamiento['ejecuciones']} ejecuciones de calentamiento")
+    print(f"   {'✅ OK' if sin_metricas_ok else '❌ FALLO'}")
+    
+    # TEST 12: Admisión con plazo vencido y salida en la misma vuelta del loop
+    print("\n1️⃣2️⃣ Test: Admisión con plazo y salida simultáneos")
+    try:
+        admision_ok = asyncio.run(plazo_y_salida_simultaneos())
+    except ValueError as error:
+        print(f"   ValueError: {error}")
+        admision_ok = False
+    tests.append(("Admisión con plazo y salida simultáneos", admision_ok))
+    print(f"   {'✅ OK' if admision_ok else '❌ FALLO'}")
+    
+    # TEST 13: Cargar el catálogo no escribe el índice compacto
+    print("\n1️⃣3️⃣ Test: Catálogo de operadores sin escrituras al importar")
+    catalogo_ok = catalogo_sin_escrituras()
+    tests.append(("Catálogo sin escrituras al importar", catalogo_ok))
+    print(f"   {'✅ OK' if catalogo_ok else '❌ FALLO'}")
+    
+    # TEST 14: Tracker store acotado (solo con Rasa instalado)
+    print("\n1️⃣4️⃣ Test: Tracker store con LRU y SQLite")
+    tracker_store = verificar_tracker_store()
+    if tracker_store is None:
+        print("   ⏭️ Omitido: Rasa no está instalado")
+    else:
+        tracker_store_ok, sin_sqlite, con_sqlite = tracker_store
+        print(f"   Sin SQLite: {sin_sqlite['desalojos_lru']} desalojos, {sin_sqlite['residentes']} residentes")
+        print(f"   Con SQLite: {con_sqlite['escritos']} escritos, {con_sqlite['restaurados']} restaurados")
+        tests.append(("Tracker store", tracker_store_ok))
+        print(f"   {'✅ OK' if tracker_store_ok else '❌ FALLO'}")
+    
+    # TEST 15: Calentamiento de Rasa fuera de las estadísticas de NLU (solo con Rasa instalado)
+    print("\n1️⃣5️⃣ Test: Calentamiento de Rasa fuera de las estadísticas de NLU")
+    calentamiento_rasa = verificar_calentamiento_rasa()
+    if calentamiento_rasa is None:
+        print("   ⏭️ Omitido: Rasa no está instalado")
+    else:
+        calentamiento_rasa_ok, aciertos_rapida, cache = calentamiento_rasa
+        print(f"   NLURapida: {aciertos_rapida}; cache: {cache['entradas']} entradas, {cache['fallos']} fallos")
+        tests.append(("Calentamiento de Rasa", calentamiento_rasa_ok))
+        print(f"   {'✅ OK' if calentamiento_rasa_ok else '❌ FALLO'}")
+    
     # RESULTADO FINAL
     passed_tests = sum(1 for _, test in tests if test)
     total_tests = len(tests)
@@ -106,6 +495,18 @@ def verificacion_final():
         print("   • Sistema de botones funcional")
         print("   • Integración Node-RED completa")
         print("   • 89+ operadores soportados")
+        print("   • Acciones asíncronas sin bloquear el event loop")
+        print("   • Menú con submenús según estado_menu")
+        print("   • Contenido de campañas recargable sin reiniciar")
+        print("   • Botones nativos con payload estable y texto numerado de respaldo")
+        print("   • Búsqueda aproximada sin confundir otros intents con operadores")
+        print("   • Calentamiento sin observaciones en /metrics")
+        print("   • Rechazo 503 aunque el plazo y una salida coincidan")
+        print("   • Catálogo de operadores cargado sin escribir en el árbol de código")
+        if tracker_store is not None:
+            print("   • Tracker store acotado con estadísticas y restauración desde SQLite")
+        if calentamiento_rasa is not None:
+            print("   • Calentamiento de Rasa sin contar en NLURapida ni en la cache de NLU")
     else:
         print("❌ Hay errores que corregir antes de producción")
         